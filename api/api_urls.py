@@ -1,12 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from api.views.views import CategoriesViewSet, RecordsViewSet
+from api.views.views import (
+    BatchViewSet,
+    CategoriesViewSet,
+    ChangesViewSet,
+    RecordsViewSet,
+)
 
 # Crear el router para los ViewSets
 router = DefaultRouter()
 router.register(r"categories", CategoriesViewSet, basename="category")
 router.register(r"records", RecordsViewSet, basename="record")
+router.register(r"changes", ChangesViewSet, basename="change")
+router.register(r"batch", BatchViewSet, basename="batch")
 
 # URLs de la API
 urlpatterns = [
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from api.views import async_views
+
+# Read-heavy routes served by async views under ASGI, they take precedence
+# over the router routes of api_urls with the same path and name
+urlpatterns = [
+    path("categories/", async_views.categories, name="category-list"),
+    path(
+        "categories/monthly-report/",
+        async_views.monthly_report,
+        name="category-monthly-report",
+    ),
+    path("records/recents/", async_views.recents, name="record-recents"),
+]
@@ -0,0 +1,117 @@
+"""
+Sub-requests of the /api/batch/ endpoint. Each one is resolved against the
+project URLs and handled by its view in the process of the batch request,
+without going through the middleware again, and its response is returned
+as data.
+"""
+
+import json
+import posixpath
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+# Only the API can be requested in a batch, not the admin or the metrics
+API_PREFIX = "/api/"
+
+# Headers of the batch request that do not apply to its sub-requests
+EXCLUDED_META = {
+    "CONTENT_LENGTH",
+    "CONTENT_TYPE",
+    "HTTP_ACCEPT",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_NONE_MATCH",
+}
+
+
+def is_api_path(path):
+    """
+    Whether a path is under API_PREFIX, once its '.' and '..' segments are
+    resolved.
+
+    Examples:
+        >>> is_api_path("/api/records/")
+        True
+        >>> is_api_path("/api/../admin/")
+        False
+    """
+    return (posixpath.normpath(path) + "/").startswith(API_PREFIX)
+
+
+class SubRequest(HttpRequest):
+    """
+    GET request for a path, with the headers, user and session of the batch
+    request it is part of.
+    """
+
+    def __init__(self, parent, path):
+        super().__init__()
+        url = urlsplit(path)
+        self.method = "GET"
+        self.path = self.path_info = url.path
+        self.META = {
+            key: value for key, value in parent.META.items() if key not in EXCLUDED_META
+        }
+        self.META.update(
+            REQUEST_METHOD="GET",
+            PATH_INFO=url.path,
+            QUERY_STRING=url.query,
+            HTTP_ACCEPT="application/json",
+        )
+        self.GET = QueryDict(url.query)
+        self.COOKIES = parent.COOKIES
+        self._scheme = parent.scheme
+        for attribute in ("user", "session"):
+            if hasattr(parent, attribute):
+                setattr(self, attribute, getattr(parent, attribute))
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def get_response(parent, path):
+    """
+    Handles a GET of 'path' as a sub-request of the batch request 'parent'
+    and returns its status code and data.
+    """
+    request = SubRequest(parent, path)
+    try:
+        match = resolve(request.path_info, getattr(parent, "urlconf", None))
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {"detail": "Not found."}
+    request.resolver_match = match
+
+    if iscoroutinefunction(match.func):
+        # Async views mounted under ASGI, their queries run in this thread
+        view = async_to_sync(match.func)
+    else:
+        view = match.func
+    try:
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        # Raised by plain Django views, DRF views return their own response
+        return status.HTTP_404_NOT_FOUND, {"detail": "Not found."}
+    except PermissionDenied:
+        return status.HTTP_403_FORBIDDEN, {
+            "detail": "You do not have permission to perform this action."
+        }
+    if response.streaming:
+        # e.g. the records export, its rows are never read
+        response.close()
+        return status.HTTP_400_BAD_REQUEST, {
+            "detail": "Streaming responses cannot be part of a batch."
+        }
+    return response.status_code, get_data(response)
+
+
+def get_data(response):
+    """Data of a DRF or JSON response, or its text for other responses"""
+    if hasattr(response, "data"):
+        return response.data
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
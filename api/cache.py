@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.renderers import FastJSONRenderer
+from data.versions import aget_data_versions, get_data_versions
+
+# Cached responses are invalidated through the data versions, the timeout
+# only bounds how long unused entries are kept
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Single-flight lock: how long a recomputation may hold it and how often the
+# waiting requests look for its result
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+
+def single_flight(key, compute, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Returns the cached value of 'key', computing it if needed.
+
+    Only one request computes a missing value at a time, the others wait for
+    its result instead of running the same query. 'compute' may return None
+    for results that must not be cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        if cache.add(lock_key, True, timeout=LOCK_TIMEOUT):
+            try:
+                value = compute()
+                if value is not None:
+                    cache.set(key, value, timeout=timeout)
+                return value
+            finally:
+                cache.delete(lock_key)
+
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            return compute()
+
+
+async def asingle_flight(key, compute, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Async version of single_flight, 'compute' is a coroutine function.
+    Waiting requests sleep without holding a thread.
+    """
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        if await cache.aadd(lock_key, True, timeout=LOCK_TIMEOUT):
+            try:
+                value = await compute()
+                if value is not None:
+                    await cache.aset(key, value, timeout=timeout)
+                return value
+            finally:
+                await cache.adelete(lock_key)
+
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await cache.aget(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            return await compute()
+
+
+def cache_validators(view_name, request, renderer_format, tables, versions):
+    """
+    Returns the cache key and the ETag of a response, derived from the
+    view, the query parameters, the rendered format and the data versions.
+    """
+    fingerprint = "|".join(
+        [
+            view_name,
+            request.path,
+            request.GET.urlencode(),
+            renderer_format,
+            *(f"{table}:{versions[table]}" for table in tables),
+        ]
+    )
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+    return f"response:{digest}", f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """
+    Whether the If-None-Match header of the request matches the ETag. The
+    comparison is weak: compressed responses carry the ETag as W/"...".
+    """
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in if_none_match or etag in (
+        tag.removeprefix("W/") for tag in if_none_match
+    )
+
+
+def versioned_cache(*tables):
+    """
+    Caches the data of a successful response until one of the given tables
+    is written.
+
+    The cache key and the ETag are derived from the view, the query
+    parameters, the rendered format and the current data versions of the
+    tables, so a request with a matching If-None-Match gets a 304 without
+    touching the database.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            versions = get_data_versions(*tables)
+            key, etag = cache_validators(
+                f"{type(self).__name__}.{view_method.__name__}",
+                request,
+                request.accepted_renderer.format,
+                tables,
+                versions,
+            )
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+            if etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            uncached_response = None
+
+            def compute():
+                nonlocal uncached_response
+                uncached_response = view_method(self, request, *args, **kwargs)
+                if uncached_response.status_code != status.HTTP_200_OK:
+                    return None
+                return uncached_response.data
+
+            data = single_flight(key, compute)
+            if data is None:
+                return uncached_response
+            return Response(data, headers=headers)
+
+        return wrapper
+
+    return decorator
+
+
+class JSONResponse(HttpResponse):
+    """JSON response rendered like the API responses of the DRF views"""
+
+    renderer = FastJSONRenderer()
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(self.renderer.render(data), **kwargs)
+        self.data = data
+
+
+def async_versioned_cache(*tables):
+    """
+    versioned_cache for async function views returning a JSONResponse. The
+    cached data, ETag and 304 responses are the same as for the DRF views.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            versions = await aget_data_versions(*tables)
+            key, etag = cache_validators(
+                f"{view.__module__}.{view.__name__}", request, "json", tables, versions
+            )
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+            if etag_matches(request, etag):
+                return HttpResponse(
+                    status=status.HTTP_304_NOT_MODIFIED, headers=headers
+                )
+
+            uncached_response = None
+
+            async def compute():
+                nonlocal uncached_response
+                uncached_response = await view(request, *args, **kwargs)
+                if uncached_response.status_code != status.HTTP_200_OK:
+                    return None
+                return uncached_response.data
+
+            data = await asingle_flight(key, compute)
+            if data is None:
+                return uncached_response
+            return JSONResponse(data, headers=headers)
+
+        return wrapper
+
+    return decorator
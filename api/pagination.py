@@ -0,0 +1,168 @@
+import base64
+from datetime import date, time
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from data.models import (
+    KEYSET_NULL_DATE,
+    KEYSET_NULL_TIME,
+    records_keyset_expressions,
+)
+
+
+class RecordsKeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination for Records.
+
+    Pages are walked by seeking on the (date, time, id) key of the last row
+    served instead of using OFFSET, and no COUNT(*) query is issued, so the
+    cost of a page does not depend on how deep the client is. It is enabled
+    by sending the 'cursor' query parameter (empty for the first page).
+    """
+
+    cursor_query_param = "cursor"
+    # Columns the key of a row is read from, see get_key
+    key_fields = ("date", "time", "id")
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, page_size=None):
+        if page_size is not None:
+            self.page_size = page_size
+
+    @classmethod
+    def is_requested(cls, request):
+        """Returns True if the client asked for cursor pagination"""
+        return cls.cursor_query_param in request.GET
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Fetch one extra row to know whether there is a next page
+        rows = list(self.page_queryset(queryset, request)[: self.page_size + 1])
+        return self.page_rows(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, with a Django or DRF request"""
+        queryset = self.page_queryset(queryset, request)[: self.page_size + 1]
+        return self.page_rows([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """Orders the queryset and seeks to the requested cursor"""
+        self.request = request
+        key = self.decode_cursor(request.GET.get(self.cursor_query_param))
+
+        queryset = self.order_queryset(queryset)
+        if key is not None:
+            queryset = queryset.filter(self.seek_filter(*key))
+        return queryset
+
+    def page_rows(self, rows):
+        """Returns the rows of the page, out of the fetched page_size + 1"""
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_key = self.get_key(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_key)
+        )
+
+    @staticmethod
+    def order_queryset(queryset):
+        """Orders a Records queryset by the keyset, newest first"""
+        key_date, key_time, _ = records_keyset_expressions()
+        return queryset.alias(_key_date=key_date, _key_time=key_time).order_by(
+            "-_key_date", "-_key_time", "-id"
+        )
+
+    @staticmethod
+    def seek_filter(key_date, key_time, key_id):
+        """
+        Filter for the rows that come after the given key in descending
+        order. The leading 'date' bound is kept as a separate condition so
+        the database can start the index scan right at the cursor.
+        """
+        return Q(_key_date__lte=key_date) & (
+            Q(_key_date__lt=key_date)
+            | Q(_key_date=key_date, _key_time__lt=key_time)
+            | Q(_key_date=key_date, _key_time=key_time, id__lt=key_id)
+        )
+
+    @staticmethod
+    def get_key(record):
+        """Returns the (date, time, id) key of a record"""
+        return (
+            record.date or KEYSET_NULL_DATE,
+            record.time or KEYSET_NULL_TIME,
+            record.id,
+        )
+
+    @staticmethod
+    def encode_cursor(key):
+        key_date, key_time, key_id = key
+        raw = f"{key_date.isoformat()}|{key_time.isoformat()}|{key_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, encoded):
+        """Decodes the cursor parameter, returns None for the first page"""
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8")
+            key_date, key_time, key_id = raw.split("|", 2)
+            return (
+                date.fromisoformat(key_date),
+                time.fromisoformat(key_time),
+                int(key_id),
+            )
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    The default page number pagination, with an apaginate_queryset for the
+    async views. Pages, links and errors are the ones of the DRF views.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, with a Django or DRF request"""
+        if not isinstance(request, Request):
+            # The query_params the DRF methods read
+            request = Request(request)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Counted here, the Paginator would run the query synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+
+        self.request = request
+        return [row async for row in self.page.object_list]
+
+    def get_paginated_data(self, data):
+        """Body of get_paginated_response, for the async views"""
+        return self.get_paginated_response(data).data
@@ -1,5 +1,10 @@
+from urllib.parse import urlsplit
+
 from rest_framework import serializers
-from data.models import Categories, Records
+
+from api.batch import API_PREFIX, is_api_path
+from data.categories import get_category_registry
+from data.models import Categories, Records, SOURCE_CHOICES, to_cents
 
 
 class CategoriesSerializer(serializers.ModelSerializer):
@@ -11,10 +16,58 @@ class CategoriesSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class AmountField(serializers.DecimalField):
+    """
+    Amount stored as an integer number of centavos, represented as a string
+    with two decimals in pesos, e.g. 1050 <-> "10.50".
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_digits", 18)
+        kwargs.setdefault("decimal_places", 2)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return to_cents(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        sign = "-" if value < 0 else ""
+        pesos, centavos = divmod(abs(value), 100)
+        return f"{sign}{pesos}.{centavos:02d}"
+
+
+class CategoryNameField(serializers.ReadOnlyField):
+    """
+    Name of the record category, read from the category registry instead of
+    loading or joining the category for every row. As with a related
+    source, it is left out of the representation when there is no category.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "category_id"
+        super().__init__(**kwargs)
+        self.registry = None
+
+    def get_attribute(self, instance):
+        category_id = super().get_attribute(instance)
+        if category_id is None:
+            raise serializers.SkipField()
+        return category_id
+
+    def to_representation(self, value):
+        # One registry per serializer, reloaded if the category is newer
+        if self.registry is None or self.registry.get(value) is None:
+            self.registry = get_category_registry()
+        category = self.registry.get(value)
+        return category.name if category is not None else None
+
+
 class RecordsSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Records"""
 
-    category_name = serializers.CharField(source="category.name", read_only=True)
+    id = serializers.CharField(source="external_id", read_only=True)
+    category_name = CategoryNameField()
+    amount = AmountField(source="amount_cents")
 
     class Meta:
         model = Records
@@ -29,13 +82,14 @@ class RecordsSerializer(serializers.ModelSerializer):
             "sync",
             "source",
         ]
-        read_only_fields = ["id"]
 
 
 class RecordsListSerializer(serializers.ModelSerializer):
     """Serializer para listar Records con información de categoría"""
 
-    category_name = serializers.CharField(source="category.name", read_only=True)
+    id = serializers.CharField(source="external_id", read_only=True)
+    category_name = CategoryNameField()
+    amount = AmountField(source="amount_cents", read_only=True)
 
     class Meta:
         model = Records
@@ -51,40 +105,311 @@ class RecordsListSerializer(serializers.ModelSerializer):
         ]
 
 
+# Columns fetched for the records list, in RecordsListSerializer field order,
+# followed by the primary key that the keyset cursor seeks on
+RECORDS_LIST_VALUES = (
+    "external_id",
+    "description",
+    "date",
+    "time",
+    "category_id",
+    "amount_cents",
+    "sync",
+    "source",
+    "id",
+)
+
+# Column of RECORDS_LIST_VALUES each RecordsListSerializer field is read from
+RECORDS_LIST_COLUMNS = dict(zip(RecordsListSerializer.Meta.fields, RECORDS_LIST_VALUES))
+
+
+def records_list_values(fields=None, extra=()):
+    """
+    Returns the columns of RECORDS_LIST_VALUES to fetch for the given fields
+    (all of them by default) and the 'extra' columns, in RECORDS_LIST_VALUES
+    order.
+    """
+    if fields is None:
+        return RECORDS_LIST_VALUES
+    needed = {RECORDS_LIST_COLUMNS[name] for name in fields}.union(extra)
+    return tuple(column for column in RECORDS_LIST_VALUES if column in needed)
+
+
+def records_list_converters(registry=None, fields=None, values=RECORDS_LIST_VALUES):
+    """
+    Returns, for each rendered field of RecordsListSerializer (all of them
+    or the given ones, in serializer order), its position in the fetched
+    'values' columns, its name, its to_representation and whether it is
+    left out of a row when the value is None.
+    """
+    serializer_fields = RecordsListSerializer().fields
+    if registry is not None:
+        serializer_fields["category_name"].registry = registry
+    return [
+        (
+            values.index(RECORDS_LIST_COLUMNS[name]),
+            name,
+            serializer_fields[name].to_representation,
+            isinstance(serializer_fields[name], CategoryNameField),
+        )
+        for name in RecordsListSerializer.Meta.fields
+        if fields is None or name in fields
+    ]
+
+
+def serialize_records_list(
+    rows, registry=None, fields=None, values=RECORDS_LIST_VALUES
+):
+    """
+    Renders rows of the 'values' columns (RECORDS_LIST_VALUES by default)
+    with the RecordsListSerializer representation, without building model
+    instances or running the serializer machinery per row. Columns that
+    aren't a serializer field (the primary key) are not rendered, nor the
+    fields not in 'fields' if given.
+
+    As in the serializer, 'category_name' is left out of the row when the
+    record has no category. Async views pass the category registry they
+    loaded, so the names are read without database access.
+    """
+    converters = records_list_converters(registry, fields, values)
+    results = []
+    for row in rows:
+        data = {}
+        for index, name, to_representation, skip_none in converters:
+            value = row[index]
+            if value is None:
+                if not skip_none:
+                    data[name] = None
+            else:
+                data[name] = to_representation(value)
+        results.append(data)
+    return results
+
+
+def serialize_records_columns(
+    rows, registry=None, fields=None, values=RECORDS_LIST_VALUES
+):
+    """
+    Columnar version of serialize_records_list: the field names once and a
+    list of values per row, {"columns": [...], "rows": [[...], ...]}. A
+    record without category has a null 'category_name'.
+    """
+    converters = records_list_converters(registry, fields, values)
+    return {
+        "columns": [name for _, name, _, _ in converters],
+        "rows": [
+            [
+                None if row[index] is None else to_representation(row[index])
+                for index, _, to_representation, _ in converters
+            ]
+            for row in rows
+        ],
+    }
+
+
+class RecordsListQuerySerializer(serializers.Serializer):
+    """Serializer para los parámetros de representación del listado de records"""
+
+    fields = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Campos a devolver separados por comas, por defecto todos",
+    )
+    layout = serializers.ChoiceField(
+        choices=["rows", "columns"],
+        default="rows",
+        help_text=(
+            "'rows' devuelve un objeto por record, 'columns' los nombres de "
+            "los campos una vez y una lista de valores por record"
+        ),
+    )
+
+    def validate_fields(self, value):
+        """Validar que los campos existen en el listado"""
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        if not names:
+            return None
+        unknown = names - set(RecordsListSerializer.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Los siguientes campos no existen: {sorted(unknown)}"
+            )
+        return names
+
+    def values(self, extra=()):
+        """
+        Columnas a consultar para los campos pedidos, más las de 'extra'
+        (p. ej. las de la clave del cursor)
+        """
+        return records_list_values(self.validated_data.get("fields"), extra)
+
+    def serialize(self, rows, registry=None, values=RECORDS_LIST_VALUES):
+        """
+        Representa las filas, de las columnas 'values', con los campos y el
+        formato pedidos
+        """
+        fields = self.validated_data.get("fields")
+        if self.validated_data["layout"] == "columns":
+            return serialize_records_columns(rows, registry, fields, values)
+        return serialize_records_list(rows, registry, fields, values)
+
+
+class RecordsExportQuerySerializer(serializers.Serializer):
+    """Serializer para los parámetros de la exportación de records"""
+
+    output = serializers.ChoiceField(choices=["ndjson", "csv"], default="ndjson")
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    source = serializers.ChoiceField(choices=SOURCE_CHOICES, required=False)
+
+
+class RecordsSearchQuerySerializer(serializers.Serializer):
+    """Serializer para los parámetros de la búsqueda de records"""
+
+    q = serializers.CharField(min_length=2, max_length=200)
+    limit = serializers.IntegerField(default=50, min_value=1, max_value=200)
+
+
 class RecordsBulkSyncSerializer(serializers.Serializer):
     """Serializer para operación bulk de sincronización de records"""
 
     record_ids = serializers.ListField(
         child=serializers.CharField(max_length=40),
         min_length=1,
-        max_length=1000,
+        max_length=100000,
         help_text=("Lista de IDs de records a marcar como sincronizados"),
     )
+    strict = serializers.BooleanField(
+        default=True,
+        help_text=(
+            "Si es verdadero, falla sin modificar nada cuando algún ID no "
+            "existe. Si es falso, marca los existentes e informa los "
+            "desconocidos"
+        ),
+    )
+
+
+class RecordsBulkUpsertItemSerializer(serializers.Serializer):
+    """Serializer para cada record de la carga masiva"""
 
-    def validate_record_ids(self, value):
-        """Validar que los IDs existen en la base de datos"""
-        from data.models import Records
+    id = serializers.CharField(source="external_id", max_length=40)
+    description = serializers.CharField(
+        max_length=350, allow_null=True, allow_blank=True, required=False
+    )
+    date = serializers.DateField(allow_null=True, required=False)
+    time = serializers.TimeField(allow_null=True, required=False)
+    category = serializers.IntegerField(allow_null=True, required=False)
+    amount = AmountField(source="amount_cents")
+    sync = serializers.BooleanField(default=False)
+    source = serializers.ChoiceField(
+        choices=SOURCE_CHOICES, allow_null=True, required=False
+    )
 
-        # Verificar que todos los IDs existen
+
+class RecordsBulkUpsertSerializer(serializers.Serializer):
+    """Serializer para la carga masiva de records"""
+
+    records = serializers.ListField(
+        child=RecordsBulkUpsertItemSerializer(),
+        min_length=1,
+        max_length=10000,
+        help_text="Lista de records a insertar, los IDs existentes se omiten",
+    )
+
+    def validate_records(self, value):
+        """Validar que las categorías existen en la base de datos"""
+        category_ids = {
+            record["category"] for record in value if record.get("category") is not None
+        }
         existing_ids = set(
-            Records.objects.filter(id__in=value).values_list("id", flat=True)
+            Categories.objects.filter(id__in=category_ids).values_list("id", flat=True)
         )
-        invalid_ids = set(value) - existing_ids
+        invalid_ids = category_ids - existing_ids
 
         if invalid_ids:
             raise serializers.ValidationError(
-                f"Los siguientes IDs no existen: {list(invalid_ids)}"
+                f"Las siguientes categorías no existen: {sorted(invalid_ids)}"
             )
 
         return value
 
+    def to_records(self):
+        """Construye las instancias de Records a partir de los datos validados"""
+        records = []
+        for record in self.validated_data["records"]:
+            record = dict(record)
+            record["category_id"] = record.pop("category", None)
+            records.append(Records(**record))
+        return records
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Serializer para cada pedido de un batch"""
+
+    id = serializers.CharField(max_length=100, required=False)
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.CharField(max_length=2000)
+
+    def validate_path(self, value):
+        """
+        Validar que la ruta es absoluta y de la API, con su query string
+        opcional
+        """
+        if not value.startswith("/"):
+            raise serializers.ValidationError("La ruta debe comenzar con '/'")
+        if not is_api_path(urlsplit(value).path):
+            raise serializers.ValidationError(
+                f"La ruta debe pertenecer a la API ({API_PREFIX})"
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer para un batch de pedidos de lectura"""
+
+    requests = serializers.ListField(
+        child=BatchItemSerializer(),
+        min_length=1,
+        max_length=20,
+        help_text="Pedidos a resolver, en orden",
+    )
+
 
 class CategoryReportSerializer(serializers.Serializer):
     """Serializer para el reporte de categorías por mes"""
 
     month = serializers.IntegerField()
     year = serializers.IntegerField()
-    categories = serializers.DictField(
-        child=serializers.DecimalField(max_digits=10, decimal_places=2)
+    categories = serializers.DictField(child=AmountField())
+    total = AmountField()
+
+
+class CategoryTimeseriesQuerySerializer(serializers.Serializer):
+    """Serializer para los parámetros de la serie temporal de categorías"""
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(
+        choices=["day", "week", "month"], default="month"
     )
-    total = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def validate(self, attrs):
+        """Validar que el rango de fechas sea coherente"""
+        start_date = attrs.get("start_date")
+        end_date = attrs.get("end_date")
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError(
+                "start_date debe ser anterior o igual a end_date"
+            )
+        return attrs
+
+
+class CategoryTimeseriesSerializer(serializers.Serializer):
+    """Serializer para la serie temporal de totales por categoría"""
+
+    granularity = serializers.CharField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    buckets = serializers.ListField(child=serializers.DateField())
+    categories = serializers.DictField(child=serializers.ListField(child=AmountField()))
+    total = serializers.ListField(child=AmountField())
@@ -0,0 +1,138 @@
+"""Tests for the async views served under ASGI"""
+
+import json
+import re
+from datetime import date, time
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import include, path
+from rest_framework.test import APITestCase
+
+from data.categories import get_category_registry
+from data.metrics import metrics_view
+from data.models import Categories, Records
+from data.versions import aget_data_versions
+
+# Routes as mounted by data/urls.py when ASYNC_VIEWS is enabled
+urlpatterns = [
+    path("api/", include("api.async_urls")),
+    path("api/", include("api.api_urls")),
+    path("metrics", metrics_view, name="metrics"),
+]
+ASYNC_URLCONF = "api.tests.test_async"
+
+
+class AsyncViewsTests(APITestCase):
+    """The async views return the same responses as the DRF views"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Categories.objects.create(name="Comida")
+        Categories.objects.create(name="Alquiler")
+        for i in range(15):
+            Records.objects.create(
+                external_id=f"record-{i:02d}",
+                date=date(2025, 7, 1 + i % 3),
+                time=time(12, i) if i % 2 else None,
+                category=cls.food if i % 4 else None,
+                amount=f"{i}.25",
+                source="macro",
+            )
+
+    def setUp(self):
+        cache.clear()
+        get_category_registry()
+
+    def assertSameResponses(self, url):
+        drf = self.client.get(url, HTTP_ACCEPT="application/json")
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, drf.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(drf.content))
+        return response
+
+    def test_same_responses(self):
+        for url in [
+            "/api/categories/",
+            "/api/categories/?page=2",
+            "/api/categories/?page=last",
+            "/api/categories/?page=x",
+            "/api/categories/monthly-report/?month=7&year=2025",
+            "/api/categories/monthly-report/?month=13",
+            "/api/categories/monthly-report/?month=abc",
+            "/api/records/recents/",
+            "/api/records/recents/?size=4",
+            "/api/records/recents/?size=4&cursor=",
+            "/api/records/recents/?size=4&cursor=invalid",
+            "/api/records/recents/?size=0",
+            "/api/records/recents/?size=101",
+            "/api/records/recents/?size=x",
+            "/api/records/recents/?size=4&fields=id,amount",
+            "/api/records/recents/?size=4&cursor=&fields=amount",
+            "/api/records/recents/?size=4&cursor=&layout=columns",
+            "/api/records/recents/?fields=nope",
+        ]:
+            with self.subTest(url=url):
+                self.assertSameResponses(url)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_cursor_walk(self):
+        url = "/api/records/recents/?size=4&cursor="
+        ids = []
+        while url:
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            ids.extend(row["id"] for row in data["results"])
+            url = data["next"]
+        self.assertEqual(sorted(ids), [f"record-{i:02d}" for i in range(15)])
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_cached_and_not_modified(self):
+        url = "/api/categories/monthly-report/?month=7&year=2025"
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+        response = await self.async_client.get(
+            url, headers={"If-None-Match": first["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        await Records.objects.filter(external_id="record-01").aupdate(
+            amount_cents=100000
+        )
+        changed = await self.async_client.get(url)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(json.loads(changed.content)["total"], "1107.50")
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    def test_create_category(self):
+        response = self.client.post(
+            "/api/categories/", {"name": "Viajes"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Categories.objects.filter(name="Viajes").exists())
+        response = self.client.get("/api/categories/")
+        names = [row["name"] for row in response.data["results"]]
+        self.assertIn("Viajes", names)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF, METRICS_TOKEN="scraper-token")
+    async def test_metrics_count_queries(self):
+        async def queries():
+            metrics = await self.async_client.get(
+                "/metrics", headers={"Authorization": "Bearer scraper-token"}
+            )
+            match = re.search(
+                r'expensy_db_queries_per_request_sum\{route="record-recents",'
+                r'method="GET"\} (\S+)',
+                metrics.content.decode("utf-8"),
+            )
+            return float(match.group(1)) if match else 0
+
+        await aget_data_versions("records", "categories")
+        before = await queries()
+        await self.async_client.get("/api/records/recents/")
+        self.assertEqual(await queries() - before, 1)
@@ -0,0 +1,135 @@
+"""Tests for the /api/batch/ endpoint"""
+
+import json
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.test import override_settings
+from django.urls import include, path
+from rest_framework.test import APITestCase
+
+from data import versions
+from data.categories import get_category_registry
+from data.models import Categories, Records
+
+DASHBOARD = [
+    "/api/categories/",
+    "/api/categories/monthly-report/?month=7&year=2025",
+    "/api/records/recents/?size=5",
+    "/api/records/?source=macro",
+]
+
+
+def not_found(request):
+    raise Http404
+
+
+def forbidden(request):
+    raise PermissionDenied
+
+
+# Plain Django views next to the API, their exceptions are not handled by DRF
+urlpatterns = [
+    path("api/not-found/", not_found),
+    path("api/forbidden/", forbidden),
+    path("api/", include("api.api_urls")),
+]
+
+
+class BatchTests(APITestCase):
+    URL = "/api/batch/"
+
+    @classmethod
+    def setUpTestData(cls):
+        food = Categories.objects.create(name="Comida")
+        for i in range(8):
+            Records.objects.create(
+                external_id=f"record-{i}",
+                date=date(2025, 7, 1 + i),
+                category=food if i % 2 else None,
+                amount=i + 1,
+                source="macro" if i % 3 else "mercado_pago",
+            )
+
+    def setUp(self):
+        cache.clear()
+        get_category_registry()
+
+    def batch(self, *paths):
+        return self.client.post(
+            self.URL,
+            {
+                "requests": [
+                    {"id": str(i), "path": path} for i, path in enumerate(paths)
+                ]
+            },
+            format="json",
+        )
+
+    def assertSameAsSeparateRequests(self, response, paths):
+        self.assertEqual(response.status_code, 200)
+        responses = json.loads(response.content)["responses"]
+        self.assertEqual([item["id"] for item in responses], ["0", "1", "2", "3"])
+        for item, path in zip(responses, paths):
+            separate = self.client.get(path, HTTP_ACCEPT="application/json")
+            self.assertEqual(item["status"], separate.status_code, path)
+            self.assertEqual(item["body"], json.loads(separate.content), path)
+
+    def test_dashboard(self):
+        response = self.batch(*DASHBOARD)
+        self.assertSameAsSeparateRequests(response, DASHBOARD)
+
+    @override_settings(ROOT_URLCONF="api.tests.test_async")
+    def test_async_views(self):
+        response = self.batch(*DASHBOARD)
+        self.assertSameAsSeparateRequests(response, DASHBOARD)
+
+    def test_status_per_sub_request(self):
+        response = self.batch(
+            "/api/categories/monthly-report/?month=13",
+            "/api/records/missing/",
+            "/api/nothing/",
+            "/api/batch/",
+            "/api/records/export/",
+        )
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.data["responses"]]
+        self.assertEqual(statuses, [400, 404, 404, 400, 400])
+        self.assertIn("error", response.data["responses"][0]["body"])
+
+    @override_settings(ROOT_URLCONF="api.tests.test_batch")
+    def test_django_view_exceptions(self):
+        response = self.batch("/api/not-found/", "/api/forbidden/", "/api/categories/")
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.data["responses"]]
+        self.assertEqual(statuses, [404, 403, 200])
+
+    def test_invalid_batch(self):
+        for requests in [
+            [],
+            [{"path": "api/categories/"}],
+            [{"path": "/admin/"}],
+            [{"path": "/metrics"}],
+            [{"path": "/api/../admin/"}],
+            [{"method": "POST", "path": "/api/categories/"}],
+            [{"path": "/api/categories/"}] * 21,
+        ]:
+            with self.subTest(requests=requests[:1]):
+                response = self.client.post(
+                    self.URL, {"requests": requests}, format="json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_data_versions_read_once(self):
+        with mock.patch.object(
+            versions, "_read_versions", wraps=versions._read_versions
+        ) as read_versions:
+            self.batch(*DASHBOARD)
+        # The records and categories versions, each read once
+        tables = [
+            table for call in read_versions.call_args_list for table in call.args[0]
+        ]
+        self.assertEqual(sorted(tables), ["categories", "records"])
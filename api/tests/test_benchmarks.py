@@ -0,0 +1,115 @@
+"""Tests for the seed_records and benchmark management commands"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import LiveServerTestCase
+from rest_framework.test import APITestCase
+
+from data.models import SOURCE_CHOICES, Categories, MonthlyTotals, Records
+
+
+class SeedAndBenchmarkTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed_records", records=2000, batch_size=700, days=400, stdout=StringIO()
+        )
+
+    def test_seeded_data(self):
+        self.assertEqual(Records.objects.count(), 2000)
+        self.assertEqual(Categories.objects.count(), 25)
+        self.assertEqual(
+            set(Records.objects.values_list("source", flat=True)),
+            {source for source, _ in SOURCE_CHOICES},
+        )
+
+        # Skewed: the most used category has several times the median share
+        counts = sorted(
+            Records.objects.exclude(category=None)
+            .values("category")
+            .annotate(count=Count("id"))
+            .values_list("count", flat=True)
+        )
+        self.assertGreater(counts[-1], 4 * counts[len(counts) // 2])
+
+        self.assertEqual(
+            MonthlyTotals.objects.aggregate(total=Sum("count"))["total"],
+            Records.objects.exclude(date=None).count(),
+        )
+
+    def test_same_seed_same_data(self):
+        ids = set(Records.objects.values_list("external_id", flat=True))
+        call_command(
+            "seed_records",
+            records=2000,
+            batch_size=700,
+            days=400,
+            clear=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            set(Records.objects.values_list("external_id", flat=True)), ids
+        )
+
+    def test_benchmark_results(self):
+        unsynced = Records.objects.filter(sync=False).count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_api",
+                iterations=2,
+                warmup=0,
+                output=output,
+                stderr=StringIO(),
+            )
+            with open(output) as file:
+                report = json.load(file)
+
+            call_command(
+                "benchmark_api",
+                iterations=1,
+                warmup=0,
+                cases=["recents_cached"],
+                compare=output,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        self.assertEqual(report["meta"]["records"], 2000)
+        results = {result["name"]: result for result in report["results"]}
+        self.assertIn("bulk_sync", results)
+        self.assertEqual(results["recents_cached"]["queries"], 0)
+        for result in results.values():
+            self.assertLessEqual(result["min"], result["median"])
+            self.assertLessEqual(result["median"], result["max"])
+        # bulk-sync is rolled back
+        self.assertEqual(Records.objects.filter(sync=False).count(), unsynced)
+
+
+class ConcurrencyBenchmarkTests(LiveServerTestCase):
+    def test_levels(self):
+        call_command("seed_records", records=200, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_concurrency",
+                url=self.live_server_url,
+                concurrency=[1, 3],
+                duration=0.3,
+                warmup=0.1,
+                output=output,
+                stderr=StringIO(),
+            )
+            with open(output) as file:
+                report = json.load(file)
+
+        self.assertEqual([level["concurrency"] for level in report["results"]], [1, 3])
+        for level in report["results"]:
+            self.assertGreater(level["requests"], 0)
+            self.assertEqual(level["errors"], 0)
+            self.assertLessEqual(level["p50"], level["p99"])
@@ -0,0 +1,132 @@
+"""Tests for the versioned response cache of the Expensy API"""
+
+import threading
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from api.cache import single_flight
+from api.tests import expire_version_checks, stamp_immediately
+from data.models import Categories, Records
+
+
+class VersionedCacheTests(APITestCase):
+    """Read endpoints are cached until records or categories are written"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Comida")
+        Records.objects.create(
+            external_id="a",
+            date=date(2025, 7, 1),
+            category=cls.category,
+            amount="10.00",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def report(self, **headers):
+        return self.client.get(
+            "/api/categories/monthly-report/?month=7&year=2025", **headers
+        )
+
+    def test_cached_response_skips_database(self):
+        first = self.report()
+        with self.assertNumQueries(0):
+            second = self.report()
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.report()["ETag"]
+        with self.assertNumQueries(0):
+            response = self.report(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_record_write_invalidates(self):
+        etag = self.report()["ETag"]
+        Records.objects.create(
+            external_id="b",
+            date=date(2025, 7, 2),
+            category=self.category,
+            amount="5.00",
+        )
+        response = self.report(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], "15.00")
+
+    def test_bulk_write_invalidates_recents(self):
+        self.assertFalse(
+            self.client.get("/api/records/recents/").data["results"][0]["sync"]
+        )
+        Records.objects.filter(external_id="a").update(sync=True)
+        self.assertTrue(
+            self.client.get("/api/records/recents/").data["results"][0]["sync"]
+        )
+
+    def test_category_write_invalidates(self):
+        self.client.get("/api/categories/")
+        self.category.name = "Supermercado"
+        self.category.save()
+        response = self.client.get("/api/categories/")
+        self.assertEqual(response.data["results"][0]["name"], "Supermercado")
+        self.assertIn("Supermercado", self.report().data["categories"])
+
+    def test_other_process_write_invalidates(self):
+        stamp_immediately()
+        etag = self.report()["ETag"]
+        # Written without bumping the data version, as a scraper with its
+        # own cache would
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE categories SET name = 'Supermercado'")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.report(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        expire_version_checks("records", "categories")
+        response = self.report(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Supermercado", response.data["categories"])
+
+        expire_version_checks("records", "categories")
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                self.report(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+            )
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get("/api/categories/monthly-report/?month=13")
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("ETag", response)
+
+
+class SingleFlightTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": 1}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(single_flight("single-flight", compute))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 1}] * 8)
@@ -0,0 +1,287 @@
+"""Tests for the Categories endpoints of the Expensy API"""
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from rest_framework.test import APITestCase
+
+from api.tests import check_data_versions, expire_version_checks, stamp_immediately
+from data.categories import get_category_registry
+from data.models import Categories, MonthlyTotals, Records
+
+
+class MonthlyReportTests(APITestCase):
+    """monthly-report is served from the MonthlyTotals rollup"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Categories.objects.create(name="Comida")
+        cls.transport = Categories.objects.create(name="Transporte")
+
+    def setUp(self):
+        cache.clear()
+
+    def create_record(self, record_id, amount, record_date, category, source="macro"):
+        return Records.objects.create(
+            external_id=record_id,
+            description=record_id,
+            date=record_date,
+            category=category,
+            amount=Decimal(amount),
+            source=source,
+        )
+
+    def assert_totals_match_records(self):
+        expected = {
+            (
+                row["date__year"],
+                row["date__month"],
+                row["category_id"],
+                row["source"],
+            ): (
+                row["amount"],
+                row["count"],
+            )
+            for row in Records.objects.exclude(date=None)
+            .values("date__year", "date__month", "category_id", "source")
+            .annotate(amount=Sum("amount_cents"), count=Count("id"))
+        }
+        actual = {
+            (row.year, row.month, row.category_id, row.source): (
+                row.amount_cents,
+                row.count,
+            )
+            for row in MonthlyTotals.objects.filter(count__gt=0)
+        }
+        self.assertEqual(actual, expected)
+
+    def report(self, month, year):
+        response = self.client.get(
+            f"/api/categories/monthly-report/?month={month}&year={year}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_report_totals(self):
+        self.create_record("a", "100.50", date(2025, 7, 1), self.food)
+        self.create_record("b", "20.25", date(2025, 7, 31), self.food, "mercado pago")
+        self.create_record("c", "5.00", date(2025, 7, 15), self.transport)
+        self.create_record("d", "7.00", date(2025, 7, 15), None)
+        self.create_record("e", "99.00", date(2025, 8, 1), self.food)
+
+        data = self.report(7, 2025)
+        self.assertEqual(
+            data["categories"],
+            {"Comida": "120.75", "Sin categoría": "7.00", "Transporte": "5.00"},
+        )
+        self.assertEqual(data["total"], "132.75")
+
+    def test_empty_month(self):
+        data = self.report(1, 2020)
+        self.assertEqual(
+            data, {"month": 1, "year": 2020, "categories": {}, "total": "0.00"}
+        )
+
+    def test_record_update_and_delete(self):
+        record = self.create_record("a", "10.00", date(2025, 7, 1), self.food)
+        self.create_record("b", "1.00", date(2025, 7, 2), self.food)
+
+        record.amount = Decimal("15.00")
+        record.category = self.transport
+        record.save()
+        self.assert_totals_match_records()
+
+        record.date = date(2025, 6, 30)
+        record.save()
+        self.assert_totals_match_records()
+        self.assertEqual(self.report(6, 2025)["categories"], {"Transporte": "15.00"})
+
+        record.delete()
+        self.assert_totals_match_records()
+        self.assertEqual(self.report(6, 2025)["categories"], {})
+
+    def test_bulk_paths(self):
+        Records.objects.bulk_create(
+            [
+                Records(
+                    external_id=str(i),
+                    date=date(2025, 1 + i % 3, 1),
+                    amount=i,
+                    category=self.food,
+                )
+                for i in range(12)
+            ]
+        )
+        self.assert_totals_match_records()
+
+        Records.objects.filter(date__month=1).update(category=self.transport)
+        self.assert_totals_match_records()
+
+        Records.objects.filter(date__month=2).update(date=date(2025, 5, 5))
+        self.assert_totals_match_records()
+
+        Records.objects.filter(date__month=3).delete()
+        self.assert_totals_match_records()
+
+        Records.objects.update(sync=True)
+        self.assert_totals_match_records()
+
+    def test_rebuild_command(self):
+        self.create_record("a", "10.00", date(2025, 7, 1), self.food)
+        self.create_record("b", "1.00", date(2025, 7, 2), self.transport)
+        MonthlyTotals.objects.all().delete()
+
+        call_command("rebuild_monthly_totals", stdout=StringIO())
+        self.assert_totals_match_records()
+
+
+class TimeseriesTests(APITestCase):
+    """timeseries returns a dense, columnar matrix of totals"""
+
+    @classmethod
+    def setUpTestData(cls):
+        food = Categories.objects.create(name="Comida")
+        transport = Categories.objects.create(name="Transporte")
+        rows = [
+            ("a", date(2025, 1, 6), food, "10.00"),
+            ("b", date(2025, 1, 8), food, "5.50"),
+            ("c", date(2025, 1, 20), transport, "3.00"),
+            ("d", date(2025, 3, 1), None, "1.00"),
+            ("e", date(2024, 12, 31), food, "100.00"),
+        ]
+        for record_id, record_date, category, amount in rows:
+            Records.objects.create(
+                external_id=record_id,
+                date=record_date,
+                category=category,
+                amount=amount,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, query):
+        return self.client.get(f"/api/categories/timeseries/?{query}")
+
+    def test_month_granularity_zero_fills(self):
+        check_data_versions()
+        with self.assertNumQueries(1):
+            response = self.get("start_date=2025-01-01&end_date=2025-04-30")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["buckets"],
+            ["2025-01-01", "2025-02-01", "2025-03-01", "2025-04-01"],
+        )
+        self.assertEqual(
+            response.data["categories"],
+            {
+                "Comida": ["15.50", "0.00", "0.00", "0.00"],
+                "Sin categoría": ["0.00", "0.00", "1.00", "0.00"],
+                "Transporte": ["3.00", "0.00", "0.00", "0.00"],
+            },
+        )
+        self.assertEqual(response.data["total"], ["18.50", "0.00", "1.00", "0.00"])
+
+    def test_week_granularity(self):
+        response = self.get(
+            "start_date=2025-01-01&end_date=2025-01-21&granularity=week"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["buckets"],
+            ["2024-12-30", "2025-01-06", "2025-01-13", "2025-01-20"],
+        )
+        self.assertEqual(
+            response.data["categories"]["Comida"], ["0.00", "15.50", "0.00", "0.00"]
+        )
+
+    def test_day_granularity(self):
+        response = self.get("start_date=2025-01-06&end_date=2025-01-08&granularity=day")
+        self.assertEqual(
+            response.data["categories"], {"Comida": ["10.00", "0.00", "5.50"]}
+        )
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get("granularity=year").status_code, 400)
+        self.assertEqual(
+            self.get("start_date=2025-02-01&end_date=2025-01-01").status_code, 400
+        )
+        self.assertEqual(
+            self.get(
+                "start_date=2000-01-01&end_date=2025-01-01&granularity=day"
+            ).status_code,
+            400,
+        )
+
+
+class CategoryRegistryTests(APITestCase):
+    """The category registry serves lookups from memory until a write"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Categories.objects.create(name="Comida", alt_name="Food")
+        cls.education = Categories.objects.create(name="Educación Física")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups(self):
+        registry = get_category_registry()
+        self.assertEqual(registry.get(self.food.id), self.food)
+        self.assertIsNone(registry.get(None))
+        self.assertEqual(registry.by_name("Comida"), self.food)
+        self.assertEqual(registry.by_name(" educacion  FISICA"), self.education)
+        self.assertEqual(registry.by_alt_name("Food"), self.food)
+        self.assertEqual(registry.match("fisica"), self.education)
+        self.assertIsNone(registry.match("Transporte"))
+
+    def test_cached_until_write(self):
+        registry = get_category_registry()
+        with self.assertNumQueries(0):
+            self.assertIs(get_category_registry(), registry)
+
+        transport = Categories.objects.create(name="Transporte")
+        with self.assertNumQueries(1):
+            self.assertEqual(get_category_registry().match("transp"), transport)
+
+        Categories.objects.filter(id=transport.id).update(name="Viajes")
+        self.assertEqual(get_category_registry().get(transport.id).name, "Viajes")
+
+    def test_checked_against_table(self):
+        stamp_immediately()
+        registry = get_category_registry()
+
+        # Written by another process, without bumping the data version
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE categories SET name = %s WHERE id = %s",
+                ["Deportes", self.education.id],
+            )
+        self.assertIs(get_category_registry(), registry)
+        expire_version_checks("categories")
+        with self.assertNumQueries(2):
+            registry = get_category_registry()
+        self.assertEqual(registry.get(self.education.id).name, "Deportes")
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM categories WHERE id = %s", [self.food.id])
+        expire_version_checks("categories")
+        self.assertIsNone(get_category_registry().get(self.food.id))
+
+    def test_serializers_use_registry(self):
+        for i in range(10):
+            Records.objects.create(external_id=str(i), category=self.food, amount=i)
+        get_category_registry()
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/records/")
+        self.assertEqual(
+            {row["category_name"] for row in response.data["results"]}, {"Comida"}
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/records/1/")
+        self.assertEqual(response.data["category_name"], "Comida")
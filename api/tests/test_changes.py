@@ -0,0 +1,129 @@
+"""Tests for the change feed of the Expensy API"""
+
+import threading
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from api.tests import stamp_immediately
+from data.models import Categories, Records
+
+
+class ChangesFeedTests(APITestCase):
+    """changes returns the rows written after a change sequence, in order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Comida")
+        for i in range(3):
+            Records.objects.create(
+                external_id=f"record-{i}",
+                date=date(2025, 7, 1 + i),
+                category=cls.category,
+                amount="10.00",
+            )
+
+    def setUp(self):
+        stamp_immediately()
+
+    def feed(self, since=0, limit=None):
+        url = f"/api/changes/?since={since}"
+        if limit is not None:
+            url += f"&limit={limit}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_feed_is_ordered_by_sequence(self):
+        data = self.feed()
+        self.assertEqual(
+            [(change["type"], change["data"]["id"]) for change in data["changes"]],
+            [
+                ("category", self.category.id),
+                ("record", "record-0"),
+                ("record", "record-1"),
+                ("record", "record-2"),
+            ],
+        )
+        seqs = [change["seq"] for change in data["changes"]]
+        self.assertEqual(seqs, sorted(set(seqs)))
+        self.assertEqual(data["next_since"], seqs[-1])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(data["changes"][1]["data"]["category_name"], "Comida")
+
+    def test_only_returns_later_changes(self):
+        since = self.feed()["next_since"]
+        self.assertEqual(self.feed(since)["changes"], [])
+
+        Records.objects.filter(external_id="record-0").update(sync=True)
+        record = Records.objects.get(external_id="record-2")
+        record.description = "Updated"
+        record.save()
+
+        data = self.feed(since)
+        self.assertEqual(
+            [change["data"]["id"] for change in data["changes"]],
+            ["record-0", "record-2"],
+        )
+        self.assertTrue(data["changes"][0]["data"]["sync"])
+        self.assertEqual(data["changes"][1]["data"]["description"], "Updated")
+
+    def test_limit_pages_through_changes(self):
+        ids = []
+        since = 0
+        while True:
+            data = self.feed(since, limit=1)
+            ids.extend(change["data"]["id"] for change in data["changes"])
+            since = data["next_since"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(ids, [self.category.id, "record-0", "record-1", "record-2"])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get("/api/changes/?since=x").status_code, 400)
+        self.assertEqual(self.client.get("/api/changes/?limit=0").status_code, 400)
+        self.assertEqual(self.client.get("/api/changes/?since=-1").status_code, 400)
+
+
+@skipUnless(connection.vendor == "postgresql", "concurrent writers need PostgreSQL")
+class ConcurrentWritersTests(APITransactionTestCase):
+    """A transaction committed after another one comes later in the feed"""
+
+    def feed(self, since):
+        response = self.client.get(f"/api/changes/?since={since}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def create_record(self, external_id):
+        return Records.objects.create(
+            external_id=external_id, date=date(2025, 7, 1), amount="10.00"
+        )
+
+    def test_out_of_order_commits(self):
+        written, commit = threading.Event(), threading.Event()
+
+        def slow_writer():
+            # Writes first and commits last, on its own connection
+            try:
+                with transaction.atomic():
+                    self.create_record("slow")
+                    written.set()
+                    commit.wait(10)
+            finally:
+                connection.close()
+
+        since = self.feed(0)["next_since"]
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        self.assertTrue(written.wait(10))
+
+        self.create_record("fast")
+        data = self.feed(since)
+        self.assertEqual([change["data"]["id"] for change in data["changes"]], ["fast"])
+
+        commit.set()
+        writer.join()
+        data = self.feed(data["next_since"])
+        self.assertEqual([change["data"]["id"] for change in data["changes"]], ["slow"])
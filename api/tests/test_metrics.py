@@ -0,0 +1,229 @@
+"""Tests for the request metrics exposed at /metrics"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.sqlite3 import base as sqlite3_base
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from data.backends.persistent import ConnectionStatsMixin
+from data.categories import get_category_registry
+from data.metrics import (
+    DB_CONNECTIONS_CLOSED,
+    DB_CONNECTIONS_OPEN,
+    DB_CONNECTIONS_OPENED,
+    DB_CONNECT_DURATION,
+    DB_HEALTH_CHECKS,
+    Histogram,
+    format_labels,
+)
+from data.models import Categories, Records
+
+
+@override_settings(METRICS_TOKEN="scraper-token")
+class MetricsEndpointTests(APITestCase):
+    """The middleware aggregates requests per resolved route"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name="Comida")
+        for i in range(3):
+            Records.objects.create(external_id=str(i), category=category, amount=i)
+
+    def setUp(self):
+        cache.clear()
+        get_category_registry()
+
+    def sample(self, text, name, **labels):
+        pattern = re.escape(name) + r"\{([^}]*)\} (\S+)"
+        for match in re.finditer(pattern, text):
+            pairs = dict(re.findall(r'(\w+)="([^"]*)"', match.group(1)))
+            if pairs == labels:
+                return float(match.group(2))
+        return 0
+
+    def metrics(self):
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer scraper-token"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode("utf-8")
+
+    def test_access(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer other")
+        self.assertEqual(response.status_code, 403)
+
+        user = User.objects.create_user("user", password="secret")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+        with override_settings(METRICS_TOKEN=None):
+            self.client.logout()
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+            self.assertEqual(response.status_code, 403)
+
+    def test_records_per_route(self):
+        before = self.metrics()
+        self.client.get("/api/records/")
+        self.client.get("/api/records/")
+        self.client.get("/api/records/not-found/")
+        after = self.metrics()
+
+        def delta(name, **labels):
+            return self.sample(after, name, **labels) - self.sample(
+                before, name, **labels
+            )
+
+        route = {"route": "record-list", "method": "GET"}
+        self.assertEqual(delta("expensy_http_requests_total", status="200", **route), 2)
+        self.assertEqual(
+            delta("expensy_http_request_duration_seconds_count", **route), 2
+        )
+        self.assertEqual(
+            delta("expensy_http_request_duration_seconds_bucket", le="+Inf", **route),
+            2,
+        )
+        self.assertGreater(delta("expensy_http_response_size_bytes_sum", **route), 0)
+        # The page count plus the page itself, per request
+        self.assertEqual(delta("expensy_db_queries_per_request_sum", **route), 4)
+        self.assertEqual(
+            delta(
+                "expensy_http_requests_total",
+                route="record-detail",
+                method="GET",
+                status="404",
+            ),
+            1,
+        )
+
+    def test_unresolved_paths_share_a_route(self):
+        self.client.get("/nothing/here/")
+        self.assertGreater(
+            self.sample(
+                self.metrics(),
+                "expensy_http_requests_total",
+                route="unmatched",
+                method="GET",
+                status="404",
+            ),
+            0,
+        )
+
+
+class HistogramTests(APITestCase):
+    def test_concurrent_observations(self):
+        histogram = Histogram("test_seconds", "Test.", ["route"], (1, 5))
+
+        def observe():
+            for value in range(10):
+                histogram.observe(("route",), value)
+
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            histogram.samples(),
+            [
+                'test_seconds_bucket{route="route",le="1"} 16',
+                'test_seconds_bucket{route="route",le="5"} 48',
+                'test_seconds_bucket{route="route",le="+Inf"} 80',
+                'test_seconds_sum{route="route"} 360',
+                'test_seconds_count{route="route"} 80',
+            ],
+        )
+
+
+class StatsDatabaseWrapper(ConnectionStatsMixin, sqlite3_base.DatabaseWrapper):
+    pass
+
+
+class ConnectionStatsTests(SimpleTestCase):
+    """Statistics of persistent connections, on a SQLite file database"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.alias = f"stats-{self._testMethodName}"
+        self.settings_dict = {
+            **connection.settings_dict,
+            "NAME": os.path.join(directory.name, "db.sqlite3"),
+            "CONN_MAX_AGE": 60,
+            "CONN_HEALTH_CHECKS": True,
+        }
+
+    def wrapper(self, **settings):
+        wrapper = StatsDatabaseWrapper({**self.settings_dict, **settings}, self.alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def request(self, wrapper):
+        # What the request_started and request_finished handlers do around
+        # the queries of a request
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        wrapper.close_if_unusable_or_obsolete()
+
+    def value(self, metric, *labels):
+        series = metric.name + format_labels(metric.labelnames, (self.alias, *labels))
+        for line in metric.samples():
+            if line.startswith(series + " "):
+                return float(line.split()[-1])
+        return 0
+
+    def test_reused_until_max_age(self):
+        wrapper = self.wrapper()
+        for _ in range(3):
+            self.request(wrapper)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPENED), 1)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPEN), 1)
+        self.assertEqual(
+            DB_CONNECT_DURATION.samples()[-1],
+            f'expensy_db_connect_duration_seconds_count{{alias="{self.alias}"}} 1',
+        )
+        # Checked before the queries of the second and third requests
+        self.assertEqual(self.value(DB_HEALTH_CHECKS, "ok"), 2)
+
+        wrapper.close_at = time.monotonic() - 1
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(self.value(DB_CONNECTIONS_CLOSED, "max_age"), 1)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPEN), 0)
+
+    def test_connection_per_request(self):
+        wrapper = self.wrapper(CONN_MAX_AGE=0)
+        for _ in range(3):
+            self.request(wrapper)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPENED), 3)
+        self.assertEqual(self.value(DB_CONNECTIONS_CLOSED, "max_age"), 3)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPEN), 0)
+        self.assertEqual(self.value(DB_HEALTH_CHECKS, "ok"), 0)
+
+    def test_failed_health_check(self):
+        wrapper = self.wrapper()
+        self.request(wrapper)
+        with mock.patch.object(wrapper, "is_usable", return_value=False):
+            self.request(wrapper)
+        self.assertEqual(self.value(DB_HEALTH_CHECKS, "failed"), 1)
+        self.assertEqual(self.value(DB_CONNECTIONS_CLOSED, "health_check"), 1)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPENED), 2)
+
+        wrapper.close()
+        self.assertEqual(self.value(DB_CONNECTIONS_CLOSED, "closed"), 1)
+        self.assertEqual(self.value(DB_CONNECTIONS_OPEN), 0)
@@ -0,0 +1,279 @@
+"""
+Tests for the offline parsers of the bank pages and of the Mercado Pago API
+responses. The fixtures are hand-written, shaped as the XPaths of the parsers
+expect, and the API responses are synthetic: they check the parsing, not
+that the real pages still match it.
+"""
+
+import base64
+import json
+import time
+from datetime import date
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from parsers import macro, mercado_pago
+from services.selenium_service import SeleniumService
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class MacroParserTests(SimpleTestCase):
+    def test_movements(self):
+        rows = macro.movement_rows(read_fixture("macro_movements.html"))
+        self.assertEqual(len(rows), 5)
+
+        movements = [macro.parse_movement(row) for row in rows[:4]]
+        self.assertEqual(
+            movements[0],
+            {
+                "id": macro.get_record_id("03/07/2025,40012233,-45230.18"),
+                "description": "PAGOS360 DPEC. 03/07/2025",
+                "concept": "PAGOS360 DPEC",
+                "date": date(2025, 7, 3),
+                "amount": "-45230.18",
+            },
+        )
+        self.assertEqual(
+            [movement["concept"] for movement in movements[1:]],
+            [
+                "DEBITO PRESTAMOS CUOTA 7/24",
+                "TRANSFERENCIA RECIBIDA",
+                "MERCADOLIBRE SRL 30703088534",
+            ],
+        )
+        self.assertEqual(
+            [movement["amount"] for movement in movements[1:]],
+            ["-120000.00", "30000.00", "1250000.50"],
+        )
+
+        # A date that doesn't exist fails the row only, its concept can
+        # still be read to skip it first
+        with self.assertRaises(ValueError):
+            macro.parse_movement(rows[4])
+        self.assertEqual(macro.movement_concept(rows[4]), "PAGOS360 AGUASCORRIENT")
+        self.assertEqual(
+            [macro.movement_concept(row) for row in rows[:4]],
+            [movement["concept"] for movement in movements],
+        )
+
+    def test_no_movements(self):
+        self.assertEqual(macro.parse_movements("<html><body></body></html>"), [])
+
+
+class MercadoPagoParserTests(SimpleTestCase):
+    def test_spending_page(self):
+        page = read_fixture("mercado_pago_spending.html")
+        self.assertEqual(
+            mercado_pago.parse_categories(page),
+            ["Supermercado", "Transporte", "Servicios"],
+        )
+        self.assertEqual(mercado_pago.parse_month(page), date(2025, 7, 1))
+
+    def test_category_page(self):
+        rows = mercado_pago.transaction_rows(read_fixture("mercado_pago_category.html"))
+        self.assertEqual(
+            [mercado_pago.parse_transaction(row, date(2025, 7, 1)) for row in rows],
+            [
+                {
+                    "description": "Carrefour - Pago con QR",
+                    "amount": -8868.06,
+                    "date": date(2025, 7, 3),
+                },
+                {
+                    "description": "Día % - Pago con tarjeta de débito",
+                    "amount": -3559.69,
+                    "date": date(2025, 7, 12),
+                },
+                {
+                    "description": "Coto - Pago con dinero en cuenta",
+                    "amount": -28200.0,
+                    "date": date(2025, 7, 28),
+                },
+            ],
+        )
+
+    def test_amount_without_label(self):
+        page = read_fixture("mercado_pago_category.html")
+        for label in ["-8868 pesos con 06 centavos", "-28200 pesos"]:
+            page = page.replace(f'aria-label="{label}"', "")
+        rows = mercado_pago.transaction_rows(page)
+        self.assertEqual(
+            [mercado_pago.parse_amount(row) for row in rows],
+            [-8868.06, -3559.69, -28200.0],
+        )
+
+        row = mercado_pago.transaction_rows(
+            page.replace('<span class="andes-money-amount__fraction">8.868</span>', "")
+        )[0]
+        with self.assertRaises(ValueError):
+            mercado_pago.parse_transaction(row, date(2025, 7, 1))
+
+    def test_operation_page(self):
+        self.assertEqual(
+            mercado_pago.parse_operation_id(
+                read_fixture("mercado_pago_operation.html")
+            ),
+            "118473629514",
+        )
+        with self.assertRaises(ValueError):
+            mercado_pago.parse_operation_id(read_fixture("mercado_pago_category.html"))
+
+
+class MercadoPagoApiParserTests(SimpleTestCase):
+    """
+    On synthetic responses, shaped as parsers.mercado_pago assumes: they
+    check that shape is read, not that the API sends it. To be replaced by
+    an anonymized real capture, see extract/mercado_pago.py
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.july, cls.june = json.loads(
+            read_fixture("mercado_pago_responses_synthetic.json")
+        )
+
+    def test_month_responses(self):
+        # Two pages, the first one fetched twice
+        items = mercado_pago.movement_items(self.july)
+        self.assertEqual(len(items), 4)
+        self.assertEqual(mercado_pago.movements_total(self.july), 4)
+        self.assertEqual(mercado_pago.movements_total([]), 0)
+
+        movements = [mercado_pago.parse_movement(item) for item in items]
+        self.assertEqual(
+            movements[0],
+            {
+                "id": "118473629514",
+                "description": "Carrefour - Pago con QR",
+                "amount": -8868.06,
+                "date": date(2025, 7, 3),
+                "category": "Supermercado",
+            },
+        )
+        self.assertEqual(
+            [movement["date"] for movement in movements],
+            [date(2025, 7, 3), date(2025, 7, 12), date(2025, 7, 14), date(2025, 7, 31)],
+        )
+
+    def test_invalid_movement(self):
+        coto, no_amount = mercado_pago.movement_items(self.june)
+        self.assertEqual(mercado_pago.parse_movement(coto)["amount"], -28200.0)
+        self.assertEqual(mercado_pago.parse_movement(coto)["category"], "Supermercado")
+        with self.assertRaises(TypeError):
+            mercado_pago.parse_movement(no_amount)
+
+
+class NetworkResponsesTests(SimpleTestCase):
+    """SeleniumService.network_responses reads the Chrome performance log"""
+
+    class Driver:
+        def __init__(self, events, bodies):
+            self.log = [
+                {"message": json.dumps({"message": event}), "level": "INFO"}
+                for event in events
+            ]
+            self.bodies = bodies
+
+        def get_log(self, log_type):
+            log, self.log = self.log, []
+            return log
+
+        def execute_cdp_cmd(self, command, params):
+            return self.bodies[params["requestId"]]
+
+    @staticmethod
+    def received(request_id, url, status=200, mime_type="application/json"):
+        return {
+            "method": "Network.responseReceived",
+            "params": {
+                "requestId": request_id,
+                "response": {"url": url, "status": status, "mimeType": mime_type},
+            },
+        }
+
+    @staticmethod
+    def finished(request_id):
+        return {
+            "method": "Network.loadingFinished",
+            "params": {"requestId": request_id},
+        }
+
+    def test_network_responses(self):
+        api = "https://example.com" + mercado_pago.API_PATH
+        body = {"results": [], "paging": {"total": 0}}
+        driver = SeleniumService(
+            self.Driver(
+                [
+                    self.received("1", api + "?offset=0"),
+                    {"method": "Network.requestWillBeSent", "params": {}},
+                    self.received("2", "https://example.com/other"),
+                    self.received("3", api + "?offset=3", status=500),
+                    self.received("4", api + "?offset=6", mime_type="text/html"),
+                    self.received("5", api + "?offset=9"),
+                    self.received("6", api + "?offset=12"),
+                    self.finished("1"),
+                    self.finished("2"),
+                    self.finished("3"),
+                    self.finished("4"),
+                    self.finished("6"),
+                    self.received("7", api + "?offset=15"),
+                    {"method": "Network.loadingFailed", "params": {"requestId": "7"}},
+                ],
+                {
+                    "1": {"body": json.dumps(body), "base64Encoded": False},
+                    "6": {
+                        "body": base64.b64encode(json.dumps(body).encode()).decode(),
+                        "base64Encoded": True,
+                    },
+                },
+            )
+        )
+
+        responses = driver.network_responses(mercado_pago.API_PATH)
+        self.assertEqual(
+            responses,
+            [
+                {"url": api + "?offset=0", "status": 200, "body": body},
+                {"url": api + "?offset=12", "status": 200, "body": body},
+            ],
+        )
+        # The log is drained, the response still loading is kept
+        self.assertEqual(driver.network_responses(mercado_pago.API_PATH), [])
+        driver.driver.log = [
+            {"message": json.dumps({"message": self.finished(request_id)})}
+            for request_id in ["5", "7"]
+        ]
+        driver.driver.bodies["5"] = {"body": json.dumps(body), "base64Encoded": False}
+        self.assertEqual(
+            driver.network_responses(mercado_pago.API_PATH),
+            [{"url": api + "?offset=9", "status": 200, "body": body}],
+        )
+
+
+class ParserPerformanceTests(SimpleTestCase):
+    def test_thousands_of_rows(self):
+        # The fixture rows repeated up to 5000 movements
+        page = read_fixture("macro_movements.html")
+        start, end = page.index('<tr class="evenRow">'), page.index("</tbody>")
+        rows = page[start:end]
+        page = page[:start] + rows * 1000 + page[end:]
+
+        started = time.perf_counter()
+        movements = []
+        for row in macro.movement_rows(page):
+            try:
+                movements.append(macro.parse_movement(row))
+            except ValueError:
+                pass
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(movements), 4000)
+        # Tens of milliseconds on a laptop, with a wide margin for CI runners
+        self.assertLess(elapsed, 2)
@@ -0,0 +1,708 @@
+"""Tests for the Records endpoints of the Expensy API"""
+
+import csv
+import io
+import json
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.pagination import RecordsKeysetPagination
+from api.serializers.models import RECORDS_LIST_VALUES, RecordsListSerializer
+from api.tests import check_data_versions
+from data.admin import EstimatedCountPaginator, RecordsAdmin
+from data.categories import get_category_registry
+from data.models import Categories, MonthlyTotals, Records
+from load.records_load import RecordsLoader
+
+
+class RecordsKeysetPaginationTests(APITestCase):
+    """Cursor mode of /api/records/ and /api/records/recents/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Comida")
+        rows = [
+            ("a", date(2025, 7, 1), time(10, 0)),
+            ("b", date(2025, 7, 1), time(10, 0)),
+            ("c", date(2025, 7, 1), None),
+            ("d", date(2025, 6, 30), time(23, 0)),
+            ("e", None, None),
+            ("f", date(2025, 7, 2), None),
+        ]
+        for record_id, record_date, record_time in rows:
+            Records.objects.create(
+                external_id=record_id,
+                description=f"Record {record_id}",
+                date=record_date,
+                time=record_time,
+                category=cls.category,
+                amount=Decimal("10.00"),
+            )
+        cls.expected_order = ["f", "b", "a", "c", "d", "e"]
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_list_cursor_walks_every_row_once(self):
+        with mock.patch.object(RecordsKeysetPagination, "page_size", 2):
+            ids = self.walk("/api/records/?cursor=")
+        self.assertEqual(ids, self.expected_order)
+
+    def test_list_cursor_skips_count_query(self):
+        check_data_versions()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/records/?cursor=")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_recents_cursor_uses_size_as_page_size(self):
+        ids = self.walk("/api/records/recents/?size=4&cursor=")
+        self.assertEqual(ids, self.expected_order)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/records/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_sync_filter_applies_in_cursor_mode(self):
+        Records.objects.filter(external_id__in=["a", "b"]).update(sync=True)
+        ids = self.walk("/api/records/?sync=true&cursor=")
+        self.assertEqual(ids, ["b", "a"])
+
+
+class RecordsListFastPathTests(APITestCase):
+    """The list and recents endpoints render values() rows directly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Categories.objects.create(name=f"Category {i}") for i in range(5)]
+        for i in range(30):
+            Records.objects.create(
+                external_id=f"record-{i:02d}",
+                description=None if i % 7 == 0 else f"Record {i}",
+                date=None if i == 3 else date(2025, 1 + i % 12, 1 + i % 28),
+                time=None if i % 2 else time(i % 24, i, 5),
+                category=None if i % 5 == 0 else categories[i % 5],
+                amount=Decimal(f"{i * 13}.{i:02d}"),
+                sync=bool(i % 3),
+                source="macro" if i % 4 else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        # Query counts below are for a loaded category registry
+        get_category_registry()
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_list_output_matches_model_serializer(self):
+        response = self.client.get("/api/records/", HTTP_ACCEPT="application/json")
+        queryset = Records.objects.all().order_by("-date", "-time")
+        expected = RecordsListSerializer(queryset, many=True).data
+        self.assertEqual(self.render(response.data["results"]), self.render(expected))
+
+    def test_recents_output_matches_model_serializer(self):
+        response = self.client.get("/api/records/recents/?size=20")
+        queryset = Records.objects.all().order_by("-date", "-time")[:20]
+        expected = RecordsListSerializer(queryset, many=True).data
+        self.assertEqual(self.render(response.data["results"]), self.render(expected))
+
+    def test_list_query_count(self):
+        # One COUNT(*) for the page number pagination plus the page itself
+        with self.assertNumQueries(2):
+            self.client.get("/api/records/")
+
+    def test_recents_query_count(self):
+        check_data_versions()
+        with self.assertNumQueries(1):
+            self.client.get("/api/records/recents/?size=30")
+
+    def test_sparse_fields(self):
+        response = self.client.get("/api/records/?fields=id, amount,category_name")
+        full = self.client.get("/api/records/")
+        expected = [
+            {
+                name: row[name]
+                for name in ("id", "category_name", "amount")
+                if name in row
+            }
+            for row in full.data["results"]
+        ]
+        self.assertEqual(response.data["results"], expected)
+
+        # Only the columns of the requested fields are read, plus the key
+        # of the cursor when there is one
+        for url, selected in [
+            ("/api/records/?fields=amount", ["amount_cents"]),
+            ("/api/records/recents/?fields=amount", ["amount_cents"]),
+            (
+                "/api/records/?cursor=&fields=amount",
+                ["date", "time", "amount_cents", "id"],
+            ),
+            (
+                "/api/records/recents/?cursor=&fields=amount",
+                ["date", "time", "amount_cents", "id"],
+            ),
+        ]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.data["results"])
+                self.assertEqual(set(response.data["results"][0]), {"amount"})
+                query = queries.captured_queries[-1]["sql"]
+                columns = query[: query.index(" FROM ")]
+                self.assertEqual(
+                    [
+                        column
+                        for column in RECORDS_LIST_VALUES
+                        if f'"{column}"' in columns
+                    ],
+                    selected,
+                )
+
+        response = self.client.get("/api/records/?fields=id,secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.data)
+
+    def test_columns_layout(self):
+        for url in [
+            "/api/records/",
+            "/api/records/?cursor=",
+            "/api/records/recents/?size=20",
+            "/api/records/recents/?size=20&cursor=",
+        ]:
+            with self.subTest(url=url):
+                separator = "&" if "?" in url else "?"
+                rows = self.client.get(url).data["results"]
+                columnar = self.client.get(f"{url}{separator}layout=columns").data
+                columns = columnar["results"]["columns"]
+                self.assertEqual(columns, RecordsListSerializer.Meta.fields)
+                self.assertEqual(
+                    [
+                        {
+                            name: value
+                            for name, value in zip(columns, values)
+                            if not (name == "category_name" and value is None)
+                        }
+                        for values in columnar["results"]["rows"]
+                    ],
+                    rows,
+                )
+
+        response = self.client.get("/api/records/?layout=columns&fields=amount,id")
+        self.assertEqual(response.data["results"]["columns"], ["id", "amount"])
+        response = self.client.get("/api/records/?layout=table")
+        self.assertEqual(response.status_code, 400)
+
+
+class RecordsExportTests(APITestCase):
+    """export streams the records as NDJSON or CSV"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name="Comida")
+        for i in range(5):
+            Records.objects.create(
+                external_id=f"record-{i}",
+                description=f"Récord, {i}",
+                date=date(2025, 7, 1 + i),
+                category=category if i else None,
+                amount=Decimal(f"{i}.50"),
+                sync=bool(i % 2),
+                source="macro" if i < 3 else "mercado pago",
+            )
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson_rows_match_list(self):
+        response = self.client.get("/api/records/export/")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        listed = self.client.get("/api/records/").data["results"]
+        self.assertEqual(rows, json.loads(JSONRenderer().render(listed)))
+
+    def test_csv(self):
+        response = self.client.get("/api/records/export/?output=csv&source=macro")
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(
+            [row["id"] for row in rows], ["record-2", "record-1", "record-0"]
+        )
+        self.assertEqual(rows[2]["description"], "Récord, 0")
+        self.assertEqual(rows[2]["category_name"], "")
+
+    def test_filters(self):
+        response = self.client.get(
+            "/api/records/export/?sync=true&start_date=2025-07-02&end_date=2025-07-04"
+        )
+        ids = [json.loads(line)["id"] for line in self.content(response).splitlines()]
+        self.assertEqual(ids, ["record-3", "record-1"])
+
+    def test_invalid_output(self):
+        response = self.client.get("/api/records/export/?output=xml")
+        self.assertEqual(response.status_code, 400)
+
+
+class RecordsBulkUpsertTests(APITestCase):
+    """bulk-upsert inserts new records and skips the existing ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Comida")
+        Records.objects.create(
+            external_id="existing",
+            date=date(2025, 7, 1),
+            amount="1.00",
+            description="Old",
+            source="macro",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def payload(self, ids, **extra):
+        return {
+            "records": [
+                {
+                    "id": record_id,
+                    "description": f"Record {record_id}",
+                    "date": "2025-07-02",
+                    "category": self.category.id,
+                    "amount": "10.50",
+                    "source": "macro",
+                    **extra,
+                }
+                for record_id in ids
+            ]
+        }
+
+    def test_inserts_and_skips(self):
+        ids = [f"new-{i}" for i in range(500)] + ["existing", "new-0"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/records/bulk-upsert/", self.payload(ids), format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["inserted_count"], 500)
+        self.assertEqual(response.data["skipped_count"], 2)
+        self.assertEqual(response.data["total_requested"], 502)
+        self.assertLess(len(queries), 20)
+
+        self.assertEqual(Records.objects.count(), 501)
+        self.assertEqual(Records.objects.get(external_id="existing").description, "Old")
+        record = Records.objects.get(external_id="new-1")
+        self.assertEqual(record.category, self.category)
+        self.assertEqual(record.amount, Decimal("10.50"))
+
+        report = self.client.get(
+            "/api/categories/monthly-report/?month=7&year=2025"
+        ).data
+        self.assertEqual(report["total"], "5251.00")
+
+    def test_same_id_other_source(self):
+        response = self.client.post(
+            "/api/records/bulk-upsert/",
+            self.payload(["existing"], source="mercado pago"),
+            format="json",
+        )
+        self.assertEqual(response.data["inserted_count"], 1)
+        self.assertEqual(
+            set(
+                Records.objects.filter(external_id="existing").values_list(
+                    "source", flat=True
+                )
+            ),
+            {"macro", "mercado pago"},
+        )
+
+    def test_unknown_category(self):
+        response = self.client.post(
+            "/api/records/bulk-upsert/",
+            self.payload(["new"], category=999),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Records.objects.filter(external_id="new").exists())
+
+    def test_conflict_after_lookup(self):
+        # As if another transaction stored "existing" after the lookup
+        records = [
+            Records(external_id=record_id, amount="1.00", source="macro")
+            for record_id in ["existing", "new"]
+        ]
+        self.assertEqual(Records.objects.insert_ignoring_conflicts(records), 1)
+        self.assertIsNone(records[0].pk)
+        self.assertEqual(records[1], Records.objects.get(external_id="new"))
+
+
+class RecordsLoaderTests(APITestCase):
+    """The extractors save a run of records in a single batch"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Comida")
+        Records.objects.create(
+            external_id="existing",
+            date=date(2025, 7, 1),
+            amount="1.00",
+            description="Old",
+            source="macro",
+        )
+
+    def parse(self, row):
+        if row["description"] is None:
+            return None
+        return Records(
+            external_id=row["id"],
+            description=row["description"],
+            amount=float(row["amount"]),
+            category=self.category,
+            date=date(2025, 7, 2),
+            source="macro",
+        )
+
+    def test_load(self):
+        rows = [
+            {"id": f"new-{i}", "description": "New", "amount": "10.5"}
+            for i in range(100)
+        ] + [
+            {"id": "existing", "description": "New", "amount": "1"},
+            {"id": "uncategorized", "description": None, "amount": "1"},
+            {"id": "bad-amount", "description": "New", "amount": "1,5"},
+            {"id": "no-amount", "description": "New"},
+        ]
+        loader = RecordsLoader()
+        with self.assertLogs("load.records_load", "ERROR"):
+            for row in rows:
+                loader.add(self.parse, row)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = loader.load()
+        self.assertEqual(result, {"inserted": 100, "skipped": 2, "failed": 2})
+
+        # The existence check and the insert run in the same transaction
+        statements = [query["sql"] for query in queries]
+        self.assertTrue(statements[0].startswith("SAVEPOINT"))
+        self.assertTrue(statements[1].startswith("SELECT"))
+        self.assertTrue(any(sql.startswith("INSERT") for sql in statements))
+        self.assertTrue(statements[-1].startswith("RELEASE SAVEPOINT"))
+        self.assertLess(len(statements), 10)
+
+        self.assertEqual(Records.objects.count(), 101)
+        self.assertEqual(Records.objects.get(external_id="existing").description, "Old")
+        self.assertEqual(
+            MonthlyTotals.objects.get(month=7, category=self.category).count, 100
+        )
+
+
+class RecordsBulkSyncTests(APITestCase):
+    """bulk-sync marks records and classifies the requested ids"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Records.objects.bulk_create(
+            [
+                Records(external_id=f"record-{i}", amount=1, sync=i < 100)
+                for i in range(12000)
+            ]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, payload):
+        return self.client.post("/api/records/bulk-sync/", payload, format="json")
+
+    def test_marks_large_batches(self):
+        ids = [f"record-{i}" for i in range(12000)]
+        response = self.post({"record_ids": ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated_count"], 11900)
+        self.assertEqual(response.data["already_synced_count"], 100)
+        self.assertEqual(response.data["unknown_ids"], [])
+        self.assertFalse(Records.objects.filter(sync=False).exists())
+
+    def test_strict_rejects_unknown_ids(self):
+        response = self.post({"record_ids": ["record-500", "missing"]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("missing", response.data["record_ids"][0])
+        self.assertFalse(Records.objects.get(external_id="record-500").sync)
+
+    def test_non_strict_reports_unknown_ids(self):
+        response = self.post(
+            {"record_ids": ["record-500", "record-1", "missing"], "strict": False}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated_count"], 1)
+        self.assertEqual(response.data["already_synced_count"], 1)
+        self.assertEqual(response.data["unknown_ids"], ["missing"])
+        self.assertTrue(Records.objects.get(external_id="record-500").sync)
+
+
+class RecordsSearchTests(APITestCase):
+    """search matches descriptions through the search index, ranked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name="Comida")
+        descriptions = [
+            ("a", "Supermercado Día - Compra"),
+            ("b", "Farmacia del centro"),
+            ("c", "Compra supermercado mayorista supermercado"),
+            ("d", None),
+            ("e", "Café Martínez"),
+        ]
+        for record_id, description in descriptions:
+            Records.objects.create(
+                external_id=record_id,
+                description=description,
+                date=date(2025, 7, 1),
+                category=category,
+                amount="1.00",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        response = self.client.get("/api/records/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def assertRanked(self, query, ids):
+        # The order between matches depends on the ranking of the database
+        response = self.client.get("/api/records/search/", {"q": query})
+        results = response.data["results"]
+        self.assertCountEqual([row["id"] for row in results], ids)
+        ranks = [row["rank"] for row in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_ranked_matches(self):
+        self.assertRanked("supermercado", ["c", "a"])
+
+    def test_prefix_and_accents(self):
+        self.assertRanked("super compra", ["c", "a"])
+        self.assertEqual(self.search("cafe martinez"), ["e"])
+
+    @skipUnless(connection.vendor == "postgresql", "FTS5 only matches prefixes")
+    def test_partial_word(self):
+        self.assertRanked("mercad", ["c", "a"])
+        self.assertEqual(self.search("50%"), [])
+
+    def test_index_follows_writes(self):
+        Records.objects.filter(external_id="b").update(description="Supermercado chino")
+        Records.objects.get(external_id="a").delete()
+        self.assertEqual(set(self.search("supermercado")), {"b", "c"})
+
+    def test_result_fields(self):
+        response = self.client.get("/api/records/search/?q=farmacia")
+        row = response.data["results"][0]
+        self.assertEqual(row["description"], "Farmacia del centro")
+        self.assertEqual(row["category_name"], "Comida")
+        self.assertGreater(row["rank"], 0)
+
+    def test_invalid_query(self):
+        response = self.client.get("/api/records/search/?q=a")
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_search(self):
+        model_admin = RecordsAdmin(Records, site)
+        queryset, _ = model_admin.get_search_results(
+            None, Records.objects.all(), "farmac"
+        )
+        self.assertEqual(list(queryset.values_list("external_id", flat=True)), ["b"])
+        queryset, _ = model_admin.get_search_results(None, Records.objects.all(), "e")
+        self.assertIn("e", queryset.values_list("external_id", flat=True))
+
+
+class RecordsAmountTests(APITestCase):
+    """Amounts are stored in centavos and represented as two-decimal pesos"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_compatibility_property(self):
+        record = Records(amount="10.5")
+        self.assertEqual(record.amount_cents, 1050)
+        self.assertEqual(record.amount, Decimal("10.50"))
+        record.amount = 0.1 + 0.2
+        self.assertEqual(record.amount_cents, 30)
+        record.amount = Decimal("-0.005")
+        self.assertEqual(record.amount_cents, -1)
+
+    def test_api_round_trip(self):
+        amount = "123456789012.34"
+        response = self.client.post(
+            "/api/records/",
+            {"description": "Big", "date": "2025-07-01", "amount": amount},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["amount"], amount)
+        record = Records.objects.get(external_id=response.data["id"])
+        self.assertEqual(record.amount_cents, 12345678901234)
+
+        listed = self.client.get("/api/records/").data["results"][0]
+        self.assertEqual(listed["amount"], amount)
+        report = self.client.get(
+            "/api/categories/monthly-report/?month=7&year=2025"
+        ).data
+        self.assertEqual(report["total"], amount)
+
+    def test_representation(self):
+        for cents, text in [(0, "0.00"), (5, "0.05"), (-5, "-0.05"), (-1050, "-10.50")]:
+            Records.objects.all().delete()
+            Records.objects.create(external_id="a", amount_cents=cents)
+            self.assertEqual(self.client.get("/api/records/a/").data["amount"], text)
+
+
+class RecordsExternalIdTests(APITestCase):
+    """Records have an integer pk and are addressed by their external id"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unique_per_source(self):
+        Records.objects.create(external_id="a", amount=1, source="macro")
+        Records.objects.create(external_id="a", amount=1, source="mercado pago")
+        Records.objects.create(external_id="a", amount=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Records.objects.create(external_id="a", amount=1, source="macro")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Records.objects.create(external_id="a", amount=1)
+
+    def test_detail_by_external_id(self):
+        record = Records.objects.create(external_id="abc-1", amount=1, source="macro")
+        self.assertIsInstance(record.pk, int)
+
+        response = self.client.get("/api/records/abc-1/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], "abc-1")
+        self.assertEqual(self.client.get(f"/api/records/{record.pk}/").status_code, 404)
+
+        response = self.client.patch(
+            "/api/records/abc-1/", {"description": "Editado"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Records.objects.get(pk=record.pk).description, "Editado")
+
+    def test_detail_shared_id_needs_source(self):
+        Records.objects.create(external_id="abc-1", amount=1, source="macro")
+        Records.objects.create(external_id="abc-1", amount=2, source="mercado pago")
+
+        self.assertEqual(self.client.get("/api/records/abc-1/").status_code, 400)
+        response = self.client.get("/api/records/abc-1/?source=mercado pago")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["amount"], "2.00")
+
+
+class RecordsAdminChangelistTests(APITestCase):
+    """The Records changelist does not scan the table on every page"""
+
+    URL = "/admin/data/records/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Categories.objects.create(name="Comida")
+        cls.rent = Categories.objects.create(name="Alquiler")
+        for i in range(30):
+            Records.objects.create(
+                external_id=f"r{i:02d}",
+                description=f"Compra {i}",
+                date=date(2025, 6 + i % 2, 1 + i % 5),
+                category=cls.food if i % 3 else None,
+                amount=i + 1,
+                source="macro",
+            )
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+
+    def setUp(self):
+        cache.clear()
+        get_category_registry()
+        self.client.force_login(self.user)
+
+    def test_changelist_queries(self):
+        # The date hierarchy is cached until the records change
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Comida")
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(self.URL)
+        self.assertLess(len(cached), len(first))
+        self.assertFalse(any("DISTINCT" in q["sql"] for q in cached.captured_queries))
+        # Only the filtered count, no second count of the whole table
+        counts = [q for q in cached.captured_queries if "COUNT(*)" in q["sql"]]
+        self.assertEqual(len(counts), 1)
+
+        Records.objects.filter(external_id="r00").update(date=date(2024, 1, 1))
+        response = self.client.get(self.URL)
+        self.assertContains(response, "?date__year=2024")
+
+    def test_estimated_count(self):
+        with mock.patch("data.admin.estimated_table_rows", return_value=50_000):
+            paginator = EstimatedCountPaginator(Records.objects.order_by("-pk"), 25)
+            self.assertEqual(paginator.count, 50_000)
+            paginator = EstimatedCountPaginator(
+                Records.objects.filter(source="macro").order_by("-pk"), 25
+            )
+            self.assertEqual(paginator.count, 30)
+        with mock.patch("data.admin.estimated_table_rows", return_value=500):
+            paginator = EstimatedCountPaginator(Records.objects.order_by("-pk"), 25)
+            self.assertEqual(paginator.count, 30)
+
+    def action(self, action, pks, **data):
+        return self.client.post(
+            self.URL,
+            {"action": action, "_selected_action": pks, "index": 0, **data},
+        )
+
+    def test_recategorize(self):
+        pks = list(Records.objects.filter(category=None).values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.action("recategorize", pks, category=self.rent.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Records.objects.filter(category=self.rent).count(), len(pks))
+        updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            sum(
+                MonthlyTotals.objects.filter(category=self.rent).values_list(
+                    "count", flat=True
+                )
+            ),
+            len(pks),
+        )
+
+        # Without a category nothing changes
+        self.action("recategorize", pks)
+        self.assertEqual(Records.objects.filter(category=self.rent).count(), len(pks))
+
+    def test_mark_synced_and_unsynced(self):
+        pks = list(Records.objects.values_list("pk", flat=True)[:10])
+        self.action("mark_synced", pks)
+        self.assertEqual(Records.objects.filter(sync=True).count(), 10)
+        self.action("mark_unsynced", pks[:4])
+        self.assertEqual(Records.objects.filter(sync=True).count(), 6)
@@ -0,0 +1,127 @@
+"""Tests for the JSON renderer and the compression of the API responses"""
+
+import gzip
+import json
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.renderers import FastJSONRenderer
+from data import compression
+from data.categories import get_category_registry
+from data.models import Categories, Records
+
+
+class FastJSONRendererTests(APITestCase):
+    def test_same_output_as_drf(self):
+        Point = namedtuple("Point", "x y")
+        data = {
+            "text": "Café, línea nueva",
+            "amount": Decimal("10.50"),
+            "date": date(2025, 7, 1),
+            "time": time(12, 30, 15, 123456),
+            "datetime": datetime(2025, 7, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            "naive": datetime(2025, 7, 1, 12, 30),
+            "uuid": uuid.UUID(int=1),
+            "lazy": gettext_lazy("Not found."),
+            "point": Point(1, 2),
+            "nested": [{"a": None, "b": True, "c": 1.5}, (1, 2)],
+            1: "int key",
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_and_empty(self):
+        renderer = FastJSONRenderer()
+        self.assertEqual(renderer.render(None), b"")
+        self.assertEqual(
+            renderer.render({"a": 1}, "application/json; indent=4"),
+            JSONRenderer().render({"a": 1}, "application/json; indent=4"),
+        )
+
+
+class CompressionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name="Comida")
+        for i in range(60):
+            Records.objects.create(
+                external_id=f"record-{i:02d}",
+                description=f"Compra {i}",
+                date=date(2025, 7, 1 + i % 28),
+                category=category,
+                amount=i,
+                source="macro",
+            )
+
+    def setUp(self):
+        cache.clear()
+        get_category_registry()
+
+    def test_gzip(self):
+        plain = self.client.get("/api/records/", HTTP_ACCEPT="application/json")
+        response = self.client.get(
+            "/api/records/",
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        plain = self.client.get("/api/records/", HTTP_ACCEPT="application/json")
+        response = self.client.get(
+            "/api/records/",
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip, br",
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+    def test_not_compressed(self):
+        for url, accept_encoding in [
+            ("/api/records/", "identity"),
+            ("/api/records/", "gzip;q=0"),
+            # Under the minimum size
+            ("/api/records/recents/?size=1", "gzip"),
+            # HTML
+            ("/api/records/?format=api", "gzip"),
+        ]:
+            with self.subTest(url=url, accept_encoding=accept_encoding):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_weak_etag_still_matches(self):
+        url = "/api/records/recents/?size=60"
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_export(self):
+        response = self.client.get("/api/records/export/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(
+            {json.loads(line)["description"] for line in lines},
+            {f"Compra {i}" for i in range(60)},
+        )
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            compression.accepted_encodings("gzip;q=0.5, br;q=0, deflate; q=x"),
+            {"gzip", "deflate"},
+        )
@@ -0,0 +1,114 @@
+"""
+Async versions of the read-heavy endpoints, served in place of the DRF views
+when the application runs under ASGI (see data/asgi.py). They read through
+Django's async ORM interface, so a request waiting on the database does not
+hold a worker thread, and render the same JSON as the DRF views. Only JSON
+is rendered, the browsable API stays on the DRF views.
+"""
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+
+from api.cache import JSONResponse, async_versioned_cache
+from api.pagination import AsyncPageNumberPagination, RecordsKeysetPagination
+from api.serializers.models import (
+    CategoriesSerializer,
+    RecordsListQuerySerializer,
+)
+from api.views.views import (
+    CategoriesViewSet,
+    build_monthly_report,
+    monthly_report_totals,
+    parse_recents_size,
+    parse_report_period,
+)
+from data.categories import aget_category_registry
+from data.models import Records
+
+# DRF view of the categories collection, for the methods other than GET
+category_list_view = CategoriesViewSet.as_view({"get": "list", "post": "create"})
+
+
+async def categories(request):
+    """Lists the categories, other methods are handled by the DRF view"""
+    if request.method == "GET":
+        return await categories_list(request)
+    return await sync_to_async(category_list_view)(request)
+
+
+# As for the DRF views, the DRF view enforces CSRF itself for session
+# authenticated requests
+categories.csrf_exempt = True
+
+
+@async_versioned_cache("categories")
+async def categories_list(request):
+    """
+    Async version of CategoriesViewSet.list, with the same page number
+    pagination.
+    """
+    fields = CategoriesSerializer.Meta.fields
+    queryset = CategoriesViewSet.queryset.values_list(*fields)
+    paginator = AsyncPageNumberPagination()
+    try:
+        page = await paginator.apaginate_queryset(queryset, request)
+    except NotFound as e:
+        return JSONResponse({"detail": e.detail}, status=status.HTTP_404_NOT_FOUND)
+
+    results = [dict(zip(fields, row)) for row in page]
+    return JSONResponse(paginator.get_paginated_data(results))
+
+
+@async_versioned_cache("records", "categories")
+async def monthly_report(request):
+    """Async version of CategoriesViewSet.monthly_report"""
+    try:
+        month, year = parse_report_period(request.GET)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = [total async for total in monthly_report_totals(month, year)]
+    return JSONResponse(build_monthly_report(month, year, totals))
+
+
+@async_versioned_cache("records", "categories")
+async def recents(request):
+    """Async version of RecordsViewSet.recents, including its cursor mode"""
+    try:
+        size = parse_recents_size(request.GET)
+    except ValidationError as e:
+        return JSONResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+    representation = RecordsListQuerySerializer(data=request.GET)
+    if not representation.is_valid():
+        return JSONResponse(representation.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    registry = await aget_category_registry()
+
+    if RecordsKeysetPagination.is_requested(request):
+        paginator = RecordsKeysetPagination(page_size=size)
+        values = representation.values(paginator.key_fields)
+        queryset = Records.objects.values_list(*values, named=True)
+        try:
+            page = await paginator.apaginate_queryset(queryset, request)
+        except NotFound as e:
+            return JSONResponse({"detail": e.detail}, status=status.HTTP_404_NOT_FOUND)
+        return JSONResponse(
+            {
+                "count": len(page),
+                "size": size,
+                "next": paginator.get_next_link(),
+                "results": representation.serialize(page, registry, values),
+            }
+        )
+
+    values = representation.values()
+    queryset = Records.objects.values_list(*values, named=True)
+    recent_records = [row async for row in queryset.order_by("-date", "-time")[:size]]
+    return JSONResponse(
+        {
+            "count": len(recent_records),
+            "size": size,
+            "results": representation.serialize(recent_records, registry, values),
+        }
+    )
@@ -1,20 +1,139 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 
-from data.models import Categories, Records
+from data.models import Categories, MonthlyTotals, Records
+from data.versions import data_versions_snapshot
+from api.batch import get_response
+from api.cache import versioned_cache
+from api.pagination import RecordsKeysetPagination
 from api.serializers.models import (
+    BatchSerializer,
     CategoriesSerializer,
     RecordsSerializer,
     RecordsListSerializer,
     CategoryReportSerializer,
+    CategoryTimeseriesQuerySerializer,
+    CategoryTimeseriesSerializer,
     RecordsBulkSyncSerializer,
+    RecordsBulkUpsertSerializer,
+    RecordsExportQuerySerializer,
+    RecordsListQuerySerializer,
+    RecordsSearchQuerySerializer,
+    RECORDS_LIST_VALUES,
+    serialize_records_list,
 )
-from django.db.models import Sum
+from django.db import connection, transaction
+from django.db.models import DateField, Sum
+from django.http import StreamingHttpResponse
+from django.db.models.functions import Trunc
 from django.utils import timezone
-from datetime import datetime
-import calendar
+from datetime import timedelta
+from urllib.parse import urlsplit
+import csv
+import json
+
+# Upper bound of buckets returned by the categories timeseries
+TIMESERIES_MAX_BUCKETS = 2000
+
+# Rows fetched per round trip by the records export
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def truncate_date(value, granularity):
+    """Returns the first day of the day/week/month bucket of a date"""
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, granularity):
+    """Returns the first day of the bucket following the given one"""
+    if granularity == "week":
+        return value + timedelta(days=7)
+    if granularity == "month":
+        if value.month == 12:
+            return value.replace(year=value.year + 1, month=1)
+        return value.replace(month=value.month + 1)
+    return value + timedelta(days=1)
+
+
+def parse_report_period(params):
+    """
+    Returns the (month, year) of the monthly report, defaulting to the
+    current month. Raises ValueError for invalid values.
+    """
+    current_date = timezone.now()
+    month = int(params.get("month", current_date.month))
+    year = int(params.get("year", current_date.year))
+
+    # Validate month range
+    if month < 1 or month > 12:
+        raise ValueError("Month must be between 1 and 12")
+
+    # Validate year (reasonable range)
+    if year < 1900 or year > 2100:
+        raise ValueError("Year must be between 1900 and 2100")
+
+    return month, year
+
+
+def monthly_report_totals(month, year):
+    """Totals of a month by category name, read from the monthly totals"""
+    return (
+        MonthlyTotals.objects.filter(year=year, month=month, count__gt=0)
+        .values("category__name")
+        .annotate(total_amount=Sum("amount_cents"))
+        .order_by("category__name")
+    )
+
+
+def build_monthly_report(month, year, totals):
+    """Renders the rows of monthly_report_totals as the monthly report"""
+    categories_dict = {}
+    total_sum = 0
+
+    for total in totals:
+        category_name = total["category__name"] or "Sin categoría"
+        amount = total["total_amount"]
+        categories_dict[category_name] = amount
+        total_sum += amount
+
+    report_data = {
+        "month": month,
+        "year": year,
+        "categories": categories_dict,
+        "total": total_sum,
+    }
+    return CategoryReportSerializer(report_data).data
+
+
+def parse_recents_size(params):
+    """Returns the 'size' parameter of recents, from 1 to 100 (default 10)"""
+    try:
+        size = int(params.get("size", "10"))
+    except ValueError:
+        raise ValidationError("The 'size' parameter must be a valid integer")
+
+    # Validate that size doesn't exceed 100 records
+    if size > 100:
+        raise ValidationError("The 'size' parameter cannot exceed 100 records")
+
+    # Validate that size is positive
+    if size <= 0:
+        raise ValidationError("The 'size' parameter must be a positive number")
+
+    return size
 
 
 class CategoriesViewSet(viewsets.ModelViewSet):
@@ -27,7 +146,12 @@ class CategoriesViewSet(viewsets.ModelViewSet):
     serializer_class = CategoriesSerializer
     permission_classes = []
 
+    @versioned_cache("categories")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=["get"], url_path="monthly-report")
+    @versioned_cache("records", "categories")
     def monthly_report(self, request):
         """
         Returns a monthly report of records summarized by categories.
@@ -35,69 +159,91 @@ class CategoriesViewSet(viewsets.ModelViewSet):
         - month: month number (1-12), defaults to current month
         - year: year number, defaults to current year
         """
-        # Get month and year parameters, default to current date
-        current_date = timezone.now()
-        month = request.query_params.get("month", current_date.month)
-        year = request.query_params.get("year", current_date.year)
-
         try:
-            month = int(month)
-            year = int(year)
-
-            # Validate month range
-            if month < 1 or month > 12:
-                raise ValueError("Month must be between 1 and 12")
-
-            # Validate year (reasonable range)
-            if year < 1900 or year > 2100:
-                raise ValueError("Year must be between 1900 and 2100")
-
+            month, year = parse_report_period(request.query_params)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get the first and last day of the month
-        first_day = datetime(year, month, 1).date()
-        last_day = datetime(year, month, 31).date()
-
-        # Adjust last day for months with fewer days
-        last_day = min(
-            last_day, datetime(year, month, calendar.monthrange(year, month)[1]).date()
+        # Read the precomputed monthly totals, one row per category and source
+        return Response(
+            build_monthly_report(month, year, monthly_report_totals(month, year))
         )
 
-        # Query records for the specified month and aggregate by category
-        records = (
-            Records.objects.filter(date__gte=first_day, date__lte=last_day)
-            .values("category__name")
-            .annotate(total_amount=Sum("amount"))
-            .order_by("category__name")
+    @action(detail=False, methods=["get"], url_path="timeseries")
+    @versioned_cache("records", "categories")
+    def timeseries(self, request):
+        """
+        Returns the totals by category for every day, week or month of a date
+        range, computed with a single grouped query. The output is columnar:
+        the bucket start dates plus one array of totals per category, with
+        zeros for the buckets without records.
+        Parameters:
+        - start_date: first day of the range (YYYY-MM-DD), defaults to the
+          first day of the month eleven months before end_date
+        - end_date: last day of the range (YYYY-MM-DD), defaults to today
+        - granularity: day, week or month, defaults to month
+        """
+        query = CategoryTimeseriesQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        granularity = query.validated_data["granularity"]
+        end_date = query.validated_data.get("end_date") or timezone.now().date()
+        start_date = query.validated_data.get("start_date")
+        if start_date is None:
+            months_back = end_date.year * 12 + end_date.month - 12
+            start_date = end_date.replace(
+                year=months_back // 12, month=months_back % 12 + 1, day=1
+            )
+            start_date = min(start_date, end_date)
+
+        buckets = []
+        bucket = truncate_date(start_date, granularity)
+        while bucket <= end_date:
+            buckets.append(bucket)
+            if len(buckets) > TIMESERIES_MAX_BUCKETS:
+                return Response(
+                    {
+                        "error": (
+                            f"The range cannot span more than "
+                            f"{TIMESERIES_MAX_BUCKETS} buckets"
+                        )
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            bucket = next_bucket(bucket, granularity)
+        bucket_index = {bucket: index for index, bucket in enumerate(buckets)}
+
+        # Totals by bucket and category in one GROUP BY query
+        rows = (
+            Records.objects.filter(date__gte=start_date, date__lte=end_date)
+            .annotate(bucket=Trunc("date", granularity, output_field=DateField()))
+            .values_list("bucket", "category__name")
+            .annotate(total_amount=Sum("amount_cents"))
+            .order_by()
         )
 
-        # Build the categories dictionary
-        categories_dict = {}
-        total_sum = 0
-
-        for record in records:
-            category_name = record["category__name"] or "Sin categoría"
-            amount = record["total_amount"]
-            categories_dict[category_name] = amount
-            total_sum += amount
-
-        # Prepare response data
-        report_data = {
-            "month": month,
-            "year": year,
-            "categories": categories_dict,
-            "total": total_sum,
+        # Amounts are integer centavos
+        categories = {}
+        totals = [0] * len(buckets)
+        for bucket, category_name, amount in rows:
+            category_name = category_name or "Sin categoría"
+            if category_name not in categories:
+                categories[category_name] = [0] * len(buckets)
+            index = bucket_index[bucket]
+            categories[category_name][index] += amount
+            totals[index] += amount
+
+        timeseries_data = {
+            "granularity": granularity,
+            "start_date": start_date,
+            "end_date": end_date,
+            "buckets": buckets,
+            "categories": dict(sorted(categories.items())),
+            "total": totals,
         }
 
-        # Validate with serializer
-        serializer = CategoryReportSerializer(data=report_data)
-        if serializer.is_valid():
-            return Response(serializer.data)
-        else:
-            return Response(
-                serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(CategoryTimeseriesSerializer(timeseries_data).data)
 
 
 class RecordsViewSet(viewsets.ModelViewSet):
@@ -108,6 +254,9 @@ class RecordsViewSet(viewsets.ModelViewSet):
     queryset = Records.objects.all().order_by("-date", "-time")
     serializer_class = RecordsSerializer
     permission_classes = []
+    # Records are addressed by their external id, the 'source' parameter
+    # disambiguates an id shared by several sources
+    lookup_field = "external_id"
 
     def filter_queryset(self, queryset):
         queryset = super().filter_queryset(queryset)
@@ -122,53 +271,221 @@ class RecordsViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_object(self):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            external_id=self.kwargs[self.lookup_field]
+        )
+        source = self.request.query_params.get("source")
+        if source:
+            queryset = queryset.filter(source=source)
+
+        records = list(queryset[:2])
+        if not records:
+            raise NotFound()
+        if len(records) > 1:
+            raise ValidationError(
+                "More than one record has this id, send the 'source' parameter"
+            )
+        self.check_object_permissions(self.request, records[0])
+        return records[0]
+
+    @property
+    def paginator(self):
+        """Uses keyset pagination when the client sends a 'cursor' parameter"""
+        if not hasattr(self, "_paginator"):
+            if RecordsKeysetPagination.is_requested(self.request):
+                self._paginator = RecordsKeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
     def get_serializer_class(self):
         """Returns the appropriate serializer based on the action"""
         if self.action == "list":
             return RecordsListSerializer
         return RecordsSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Lists records reading only the listed columns, with the category
+        names taken from the category registry, and rendering the rows
+        directly.
+        Parameters:
+        - fields: comma separated fields to return, defaults to all
+        - layout: 'rows' (default) or 'columns', see serialize_records_columns
+        """
+        representation = RecordsListQuerySerializer(data=request.query_params)
+        representation.is_valid(raise_exception=True)
+        # Only the columns of the requested fields, and the cursor key
+        values = representation.values(getattr(self.paginator, "key_fields", ()))
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *values, named=True
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                representation.serialize(page, values=values)
+            )
+
+        return Response(representation.serialize(queryset, values=values))
+
     @action(detail=False, methods=["get"], url_path="recents")
+    @versioned_cache("records", "categories")
     def recents(self, request):
         """
         Returns the most recent records loaded, ordered by date.
         Receives a 'size' parameter to limit the number of records
-        (maximum 100).
+        (maximum 100). Sending a 'cursor' parameter switches to keyset
+        pagination, returning 'size' records per page and a 'next' link.
+        The 'fields' and 'layout' parameters are those of the list.
         """
-        # Get the size parameter from the query
-        size_param = request.query_params.get("size", "10")
-
-        try:
-            size = int(size_param)
-        except ValueError:
-            raise ValidationError("The 'size' parameter must be a valid integer")
-
-        # Validate that size doesn't exceed 100 records
-        if size > 100:
-            raise ValidationError("The 'size' parameter cannot exceed 100 records")
-
-        # Validate that size is positive
-        if size <= 0:
-            raise ValidationError("The 'size' parameter must be a positive number")
+        size = parse_recents_size(request.query_params)
+        representation = RecordsListQuerySerializer(data=request.query_params)
+        representation.is_valid(raise_exception=True)
+
+        if RecordsKeysetPagination.is_requested(request):
+            paginator = RecordsKeysetPagination(page_size=size)
+            values = representation.values(paginator.key_fields)
+            page = paginator.paginate_queryset(
+                Records.objects.values_list(*values, named=True),
+                request,
+                self,
+            )
+            return Response(
+                {
+                    "count": len(page),
+                    "size": size,
+                    "next": paginator.get_next_link(),
+                    "results": representation.serialize(page, values=values),
+                }
+            )
 
         # Get the most recent records ordered by date
         # (most recent first)
-        recent_records = Records.objects.all().order_by("-date", "-time")[:size]
+        values = representation.values()
+        recent_records = list(
+            Records.objects.values_list(*values, named=True).order_by("-date", "-time")[
+                :size
+            ]
+        )
+
+        return Response(
+            {
+                "count": len(recent_records),
+                "size": size,
+                "results": representation.serialize(recent_records, values=values),
+            }
+        )
 
-        # Serialize the results
-        serializer = RecordsListSerializer(recent_records, many=True)
+    @action(detail=False, methods=["get"], url_path="search")
+    @versioned_cache("records", "categories")
+    def search(self, request):
+        """
+        Searches the record descriptions, best matches first. Each result
+        has the fields of the list endpoint plus its 'rank'.
+        Parameters:
+        - q: text to search (at least 2 characters)
+        - limit: maximum number of results (up to 200), defaults to 50
+        - sync: true/false (or 1/0) filter, as in the list endpoint
+        """
+        query = RecordsSearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = list(
+            self.filter_queryset(Records.objects.all())
+            .search(query.validated_data["q"])
+            .values_list("rank", *RECORDS_LIST_VALUES)[: query.validated_data["limit"]]
+        )
+        results = serialize_records_list(row[1:] for row in rows)
+        for row, data in zip(rows, results):
+            data["rank"] = round(row[0], 4)
 
         return Response(
-            {"count": len(recent_records), "size": size, "results": serializer.data}
+            {
+                "query": query.validated_data["q"],
+                "count": len(results),
+                "results": results,
+            }
         )
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Streams every record as NDJSON (one JSON object per line) or CSV,
+        reading the table through a server-side cursor so memory stays
+        constant regardless of its size. Rows have the same fields as the
+        list endpoint.
+        Parameters:
+        - output: ndjson or csv, defaults to ndjson
+        - sync: true/false (or 1/0) filter, as in the list endpoint
+        - start_date, end_date: date bounds (YYYY-MM-DD), inclusive
+        - source: record source
+        """
+        query = RecordsExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(Records.objects.all())
+        if "start_date" in query.validated_data:
+            queryset = queryset.filter(date__gte=query.validated_data["start_date"])
+        if "end_date" in query.validated_data:
+            queryset = queryset.filter(date__lte=query.validated_data["end_date"])
+        if "source" in query.validated_data:
+            queryset = queryset.filter(source=query.validated_data["source"])
+        queryset = RecordsKeysetPagination.order_queryset(queryset).values_list(
+            *RECORDS_LIST_VALUES, named=True
+        )
+
+        output = query.validated_data["output"]
+        if output == "csv":
+            response = StreamingHttpResponse(
+                self.export_csv(queryset), content_type="text/csv"
+            )
+        else:
+            response = StreamingHttpResponse(
+                self.export_ndjson(queryset), content_type="application/x-ndjson"
+            )
+        response["Content-Disposition"] = f'attachment; filename="records.{output}"'
+        return response
+
+    @staticmethod
+    def export_chunks(queryset):
+        """
+        Yields the serialized records in chunks. The cursor is read inside a
+        transaction so it also works behind a transaction-mode pooler.
+        """
+        with transaction.atomic():
+            chunk = []
+            for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                chunk.append(row)
+                if len(chunk) == EXPORT_CHUNK_SIZE:
+                    yield serialize_records_list(chunk)
+                    chunk = []
+            if chunk:
+                yield serialize_records_list(chunk)
+
+    def export_ndjson(self, queryset):
+        encoder = json.JSONEncoder(ensure_ascii=False)
+        for chunk in self.export_chunks(queryset):
+            yield "".join(f"{encoder.encode(row)}\n" for row in chunk)
+
+    def export_csv(self, queryset):
+        fields = RecordsListSerializer.Meta.fields
+        writer = csv.DictWriter(Echo(), fieldnames=fields)
+        yield writer.writerow(dict(zip(fields, fields)))
+        for chunk in self.export_chunks(queryset):
+            yield "".join(writer.writerow(row) for row in chunk)
+
     @action(detail=False, methods=["post"], url_path="bulk-sync")
     def bulk_sync(self, request):
         """
         Marca múltiples records como sincronizados (sync=True).
 
         Recibe una lista de IDs de records y los marca como sincronizados
-        en una sola operación.
+        en una sola operación. Con 'strict' en falso, los IDs que no existen
+        se informan en lugar de rechazar el pedido.
         """
         serializer = RecordsBulkSyncSerializer(data=request.data)
 
@@ -177,20 +494,181 @@ class RecordsViewSet(viewsets.ModelViewSet):
 
         record_ids = serializer.validated_data["record_ids"]
 
-        # Obtener los records que no están ya sincronizados
-        records_to_update = Records.objects.filter(id__in=record_ids, sync=False)
+        # Marcar y clasificar los IDs en una sola sentencia
+        with transaction.atomic():
+            result = Records.objects.mark_synced(record_ids)
+            unknown_ids = result["unknown"]
+            if unknown_ids and serializer.validated_data["strict"]:
+                transaction.set_rollback(True)
+                return Response(
+                    {"record_ids": [f"Los siguientes IDs no existen: {unknown_ids}"]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        # Contar cuántos records se van a actualizar
-        records_count = records_to_update.count()
-
-        # Actualizar todos los records como sincronizados
-        records_to_update.update(sync=True)
+        records_count = len(result["updated"])
 
         return Response(
             {
                 "message": f"Se marcaron {records_count} records como sincronizados",
                 "updated_count": records_count,
+                "already_synced_count": len(result["already_synced"]),
+                "unknown_ids": unknown_ids,
                 "total_requested": len(record_ids),
             },
             status=status.HTTP_200_OK,
         )
+
+    @action(detail=False, methods=["post"], url_path="bulk-upsert")
+    def bulk_upsert(self, request):
+        """
+        Inserta múltiples records en una sola operación.
+
+        Los records cuyo ID ya existe se omiten. Devuelve cuántos records se
+        insertaron y cuántos se omitieron.
+        """
+        serializer = RecordsBulkUpsertSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = Records.objects.bulk_upsert(serializer.to_records())
+
+        return Response(
+            {
+                "message": (
+                    f"Se insertaron {result['inserted']} records y se omitieron "
+                    f"{result['skipped']}"
+                ),
+                "inserted_count": result["inserted"],
+                "skipped_count": result["skipped"],
+                "total_requested": len(serializer.validated_data["records"]),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ChangesViewSet(viewsets.ViewSet):
+    """
+    Change feed of records and categories. Every insert or update stamps
+    the row with a value from a single, monotonically increasing change
+    sequence, so each consumer can keep the last sequence it processed and
+    pull only what changed after it. Deletions are not part of the feed.
+
+    The value is drawn when the writing transaction commits (see migration
+    0008), so a row never becomes visible with a sequence lower than one
+    already returned. Rows of transactions still open are pending (-1) and
+    left out until they commit.
+    """
+
+    permission_classes = []
+    default_limit = 500
+    max_limit = 5000
+
+    def list(self, request):
+        """
+        Returns the records and categories changed after 'since', ordered by
+        change sequence.
+        Parameters:
+        - since: last change sequence already processed, defaults to 0
+        - limit: maximum number of changes (up to 5000), defaults to 500
+        """
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError("The 'since' and 'limit' parameters must be integers")
+
+        if since < 0:
+            raise ValidationError("The 'since' parameter can't be negative")
+
+        if limit <= 0 or limit > self.max_limit:
+            raise ValidationError(
+                f"The 'limit' parameter must be between 1 and {self.max_limit}"
+            )
+
+        # Fetch one extra row per table to know whether there are more changes
+        records = list(
+            Records.objects.filter(change_seq__gt=since)
+            .order_by("change_seq")
+            .values_list("change_seq", *RECORDS_LIST_VALUES)[: limit + 1]
+        )
+        categories = list(
+            Categories.objects.filter(change_seq__gt=since)
+            .order_by("change_seq")
+            .values_list("change_seq", *CategoriesSerializer.Meta.fields)[: limit + 1]
+        )
+
+        changes = [
+            {"seq": row[0], "type": "record", "data": data}
+            for row, data in zip(
+                records, serialize_records_list(row[1:] for row in records)
+            )
+        ]
+        changes.extend(
+            {
+                "seq": row[0],
+                "type": "category",
+                "data": dict(zip(CategoriesSerializer.Meta.fields, row[1:])),
+            }
+            for row in categories
+        )
+        changes.sort(key=lambda change: change["seq"])
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return Response(
+            {
+                "changes": changes,
+                "next_since": changes[-1]["seq"] if changes else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class BatchViewSet(viewsets.ViewSet):
+    """
+    Runs several GET requests of the API in one round trip, e.g. the calls
+    of a dashboard load. The sub-requests are handled in process by their
+    views, with the user of the batch request, and each one keeps its own
+    status code.
+    """
+
+    # Each sub-request is checked by its own view
+    permission_classes = []
+
+    def create(self, request):
+        """
+        Returns the responses of the sub-requests, in order, as
+        {"responses": [{"id", "status", "body"}]}.
+
+        They run in one transaction, on one database connection (also behind
+        the transaction pooler) and a single snapshot of the data versions,
+        so their cached responses and ETags are consistent with each other.
+        On PostgreSQL they also read a single snapshot of the database.
+        """
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        responses = []
+        # The isolation level can only be set by the first query of the
+        # transaction, not inside one already open
+        repeatable_read = (
+            connection.vendor == "postgresql" and not connection.in_atomic_block
+        )
+        with transaction.atomic(), data_versions_snapshot():
+            if repeatable_read:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            for item in serializer.validated_data["requests"]:
+                if urlsplit(item["path"]).path == request.path:
+                    status_code = status.HTTP_400_BAD_REQUEST
+                    data = {"detail": "A batch cannot contain another batch."}
+                else:
+                    status_code, data = get_response(request._request, item["path"])
+                responses.append(
+                    {"id": item.get("id"), "status": status_code, "body": data}
+                )
+
+        return Response({"responses": responses})
@@ -1,6 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .categories import get_category_registry
 from .models import Categories, Records
 
+# Tables estimated below this many rows are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
 # Admin dashboard title configuration
 admin.site.site_header = "Expensy - Panel de Administración"
 admin.site.site_title = "Expensy Admin"
@@ -16,18 +26,141 @@ class CategoriesAdmin(admin.ModelAdmin):
     ordering = ("name",)
 
 
+class RecordsAdminForm(forms.ModelForm):
+    """Edits the amount in pesos, it is stored in centavos"""
+
+    amount = forms.DecimalField(max_digits=18, decimal_places=2)
+
+    class Meta:
+        model = Records
+        exclude = ("id", "amount_cents")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.amount_cents is not None:
+            self.initial.setdefault("amount", self.instance.amount)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("amount") is not None:
+            self.instance.amount = cleaned_data["amount"]
+        return cleaned_data
+
+
+def estimated_table_rows(queryset):
+    """
+    Rows of the queryset's table according to the PostgreSQL planner
+    statistics, kept up to date by autovacuum. None on other databases or
+    when the table was never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of an unfiltered queryset instead of
+    running a COUNT(*) over the whole table. Filtered querysets, and small
+    tables, are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.has_filters():
+            estimate = estimated_table_rows(self.object_list)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class RecordsActionForm(ActionForm):
+    """Action form with the category the selected records are moved to"""
+
+    category = forms.ModelChoiceField(
+        queryset=Categories.objects.order_by("name"),
+        required=False,
+        label="Categoría",
+    )
+
+
 @admin.register(Records)
 class RecordsAdmin(admin.ModelAdmin):
-    list_display = ("description", "date", "category", "amount", "source")
+    form = RecordsAdminForm
+    action_form = RecordsActionForm
+    actions = ("recategorize", "mark_synced", "mark_unsynced")
+    # Counts and date hierarchy that do not scan the table on every page (the
+    # hierarchy is cached in templates/admin/data/records/change_list.html).
+    # The category column reads the category registry, so the categories are
+    # neither joined nor queried per row.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = ("description", "date", "category_name", "amount", "source")
     list_display_links = ("description",)
     list_filter = ("category", "source", "date")
-    search_fields = ("description", "id")
+    search_fields = ("description", "external_id")
     date_hierarchy = "date"
     list_per_page = 25
     ordering = ("-date",)
     readonly_fields = ("id",)
     exclude = ("id",)
 
+    @admin.display(description="category", ordering="category__name")
+    def category_name(self, obj):
+        """Category name from the category registry, without joining it"""
+        category = get_category_registry().get(obj.category_id)
+        return category.name if category else self.get_empty_value_display()
+
+    @admin.display(description="amount", ordering="amount_cents")
+    def amount(self, obj):
+        return obj.amount
+
+    # The actions update the selection with a single UPDATE, which also keeps
+    # the monthly totals and the cached responses up to date
+
+    @admin.action(description="Cambiar la categoría de los registros seleccionados")
+    def recategorize(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields["action"].choices = self.get_action_choices(request)
+        category = form.cleaned_data["category"] if form.is_valid() else None
+        if category is None:
+            self.message_user(
+                request, "Elegí la categoría de destino.", level=messages.WARNING
+            )
+            return
+        rows = queryset.update(category=category)
+        self.message_user(request, f"{rows} registros movidos a {category.name}.")
+
+    @admin.action(description="Marcar los registros seleccionados como sincronizados")
+    def mark_synced(self, request, queryset):
+        rows = queryset.update(sync=True)
+        self.message_user(request, f"{rows} registros marcados como sincronizados.")
+
+    @admin.action(
+        description="Marcar los registros seleccionados como no sincronizados"
+    )
+    def mark_unsynced(self, request, queryset):
+        rows = queryset.update(sync=False)
+        self.message_user(request, f"{rows} registros marcados como no sincronizados.")
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Searches descriptions through the full-text/trigram index instead of
+        a LIKE scan. An exact external id also matches.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = queryset.search(search_term).values("pk")
+        return queryset.filter(Q(pk__in=matches) | Q(external_id=search_term)), False
+
     fieldsets = (
         ("Información básica", {"fields": ("description", "amount")}),
         ("Fechas", {"fields": ("date",)}),
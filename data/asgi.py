@@ -0,0 +1,22 @@
+"""
+ASGI config for core project.
+
+It exposes the ASGI callable as a module-level variable named `application`
+and serves the read-heavy endpoints with async views (see ASYNC_VIEWS), e.g.
+with `gunicorn -k uvicorn.workers.UvicornWorker data.asgi:application`.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data.settings")
+os.environ.setdefault("ASYNC_VIEWS", "1")
+# Requests run in threads of their own, a persistent connection would never
+# be reused nor closed
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+application = get_asgi_application()
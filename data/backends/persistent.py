@@ -0,0 +1,68 @@
+"""
+Statistics of persistent database connections.
+
+Django keeps one connection per thread and reuses it across requests for
+CONN_MAX_AGE seconds, checking it first when CONN_HEALTH_CHECKS is enabled.
+The mixin records when those connections are opened, reused and closed, and
+why, in the metrics exposed at /metrics (see data/metrics.py).
+"""
+
+import time
+
+from data.metrics import (
+    DB_CONNECT_DURATION,
+    DB_CONNECTIONS_CLOSED,
+    DB_CONNECTIONS_OPEN,
+    DB_CONNECTIONS_OPENED,
+    DB_HEALTH_CHECKS,
+)
+
+
+class ConnectionStatsMixin:
+    """Mixin for a DatabaseWrapper that records its connection statistics"""
+
+    # Reason of the close in progress, when it is not an explicit close()
+    close_reason = None
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        DB_CONNECT_DURATION.observe((self.alias,), time.perf_counter() - start)
+        DB_CONNECTIONS_OPENED.inc((self.alias,))
+        DB_CONNECTIONS_OPEN.inc((self.alias,))
+
+    def close(self):
+        connection = self.connection
+        try:
+            super().close()
+        finally:
+            if connection is not None and self.connection is None:
+                reason = self.close_reason or "closed"
+                DB_CONNECTIONS_CLOSED.inc((self.alias, reason))
+                DB_CONNECTIONS_OPEN.dec((self.alias,))
+
+    def close_if_health_check_failed(self):
+        # Runs before the first query of every request made on a connection
+        # left open by a previous one
+        checked = (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+        )
+        self.close_reason = "health_check"
+        try:
+            super().close_if_health_check_failed()
+        finally:
+            self.close_reason = None
+        if checked:
+            result = "ok" if self.connection is not None else "failed"
+            DB_HEALTH_CHECKS.inc((self.alias, result))
+
+    def close_if_unusable_or_obsolete(self):
+        # Runs at the start and end of every request
+        expired = self.close_at is not None and time.monotonic() >= self.close_at
+        self.close_reason = "max_age" if expired else "unusable"
+        try:
+            super().close_if_unusable_or_obsolete()
+        finally:
+            self.close_reason = None
@@ -0,0 +1,50 @@
+"""
+PostgreSQL backend for a transaction-mode pooler (e.g. PgBouncer or
+Supavisor on port 6543), with the connection statistics of
+data.backends.persistent.
+
+Behind such a pooler consecutive transactions of one client connection can
+run on different server connections, so nothing may depend on state that
+outlives a transaction:
+
+- server-side cursors are only declared inside a transaction, outside one
+  Django would declare them WITH HOLD and they would stay on the server
+  connection;
+- the session time zone is not SET, it has to be the default of the role or
+  database (ALTER ROLE ... SET timezone TO 'UTC');
+- prepared statements are already disabled by Django for psycopg 3.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+from data.backends.persistent import ConnectionStatsMixin
+
+
+class DatabaseWrapper(ConnectionStatsMixin, base.DatabaseWrapper):
+    def ensure_timezone(self):
+        if self.connection is None:
+            return False
+        conn_timezone_name = self.connection.info.parameter_status("TimeZone")
+        if self.timezone_name and conn_timezone_name != self.timezone_name:
+            raise ImproperlyConfigured(
+                f"The database time zone is {conn_timezone_name}, not "
+                f"{self.timezone_name}. A SET TIME ZONE would not survive the "
+                "transaction pooler, set it as the default of the role instead."
+            )
+        return False
+
+    def ensure_role(self):
+        if self.settings_dict["OPTIONS"].get("assume_role"):
+            raise ImproperlyConfigured(
+                "assume_role sets the role of the session, which does not "
+                "survive the transaction pooler."
+            )
+        return False
+
+    def create_cursor(self, name=None):
+        if name and self.connection.autocommit:
+            # Iterated outside atomic(): the rows are fetched by a regular
+            # cursor instead
+            name = None
+        return super().create_cursor(name)
@@ -0,0 +1,125 @@
+"""Process-wide, in-memory registry of the categories."""
+
+import threading
+import unicodedata
+from typing import Dict, Iterator, List, Optional
+
+from asgiref.sync import sync_to_async
+
+from data.models import Categories
+from data.versions import aget_data_versions, get_data_versions
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a category name for lookups: accents removed, case folded and
+    whitespace collapsed.
+
+    Examples:
+        >>> normalize_name("  Educación   Física ")
+        'educacion fisica'
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+class CategoryRegistry:
+    """
+    Immutable snapshot of the categories table with in-memory lookups.
+
+    The instances it returns are shared by every thread of the process and
+    must be treated as read-only.
+    """
+
+    def __init__(self, categories: List[Categories], version: int):
+        self.version = version
+        self._categories = sorted(categories, key=lambda category: category.id)
+        self._by_id = {category.id: category for category in self._categories}
+        self._by_name: Dict[str, Categories] = {}
+        self._by_normalized_name: Dict[str, Categories] = {}
+        self._by_alt_name: Dict[str, Categories] = {}
+        for category in self._categories:
+            self._by_name.setdefault(category.name, category)
+            self._by_normalized_name.setdefault(normalize_name(category.name), category)
+            if category.alt_name:
+                self._by_alt_name.setdefault(category.alt_name, category)
+        self._matches: Dict[str, Optional[Categories]] = {}
+
+    def __iter__(self) -> Iterator[Categories]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def get(self, category_id: Optional[int]) -> Optional[Categories]:
+        """Category with the given id, or None"""
+        return self._by_id.get(category_id)
+
+    def by_name(self, name: str) -> Optional[Categories]:
+        """Category with the given name, compared exactly and then normalized"""
+        category = self._by_name.get(name)
+        if category is None:
+            category = self._by_normalized_name.get(normalize_name(name))
+        return category
+
+    def by_alt_name(self, alt_name: str) -> Optional[Categories]:
+        """Category with the given alternative name, or None"""
+        return self._by_alt_name.get(alt_name)
+
+    def match(self, text: str) -> Optional[Categories]:
+        """
+        First category, by id, whose normalized name contains the normalized
+        text. Replaces the name__icontains lookups of the scrapers.
+        """
+        if text not in self._matches:
+            normalized = normalize_name(text)
+            self._matches[text] = next(
+                (
+                    category
+                    for category in self._categories
+                    if normalized in normalize_name(category.name)
+                ),
+                None,
+            )
+        return self._matches[text]
+
+
+_registry: Optional[CategoryRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_category_registry() -> CategoryRegistry:
+    """
+    Get the category registry of the process, reloading it with a single
+    query when the categories data version changed since it was loaded. The
+    version also follows the writes of other processes, see
+    data.versions.CHECK_INTERVAL.
+
+    Each call checks the version in the cache, so code doing many lookups
+    should get the registry once and keep it for the whole batch.
+    """
+    global _registry
+    version = get_data_versions("categories")["categories"]
+    registry = _registry
+    if registry is not None and registry.version == version:
+        return registry
+
+    with _registry_lock:
+        if _registry is None or _registry.version != version:
+            # The version is read before the rows, a write in between only
+            # causes one extra reload on the next call
+            _registry = CategoryRegistry(list(Categories.objects.all()), version)
+        return _registry
+
+
+async def aget_category_registry() -> CategoryRegistry:
+    """
+    Async version of get_category_registry. Only a reload runs in a thread,
+    an up to date registry is returned without leaving the event loop.
+    """
+    version = (await aget_data_versions("categories"))["categories"]
+    registry = _registry
+    if registry is not None and registry.version == version:
+        return registry
+    return await sync_to_async(get_category_registry)()
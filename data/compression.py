@@ -0,0 +1,118 @@
+"""
+Compression of the API responses: brotli when the client accepts it and the
+brotli package is installed, gzip otherwise.
+
+Only JSON, NDJSON and CSV bodies of at least MIN_SIZE bytes are compressed.
+The HTML pages (admin, browsable API) are left alone, as they carry CSRF
+tokens next to content an attacker could reflect (BREACH).
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+# Quality for compressing on every request, the default (11) is for static
+# assets and several times slower
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(header: str) -> set:
+    """Content codings of an Accept-Encoding header, without the q=0 ones"""
+    encodings = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "").lower()
+        if params.startswith("q="):
+            try:
+                if not float(params[2:]):
+                    continue
+            except ValueError:
+                pass
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+def brotli_sequence(sequence):
+    """Compresses the chunks of a streaming response as they are produced"""
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresses the API responses the client accepts compressed. As with
+    Django's GZipMiddleware, strong ETags become weak ones, which the
+    versioned response cache still matches.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    @staticmethod
+    def compress(request, response):
+        content_type = response.get("Content-Type", "")
+        if response.has_header("Content-Encoding") or not content_type.startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encodings = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in encodings:
+            encoding = "br"
+        elif "gzip" in encodings:
+            encoding = "gzip"
+        else:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            if encoding == "br":
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            if encoding == "br":
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
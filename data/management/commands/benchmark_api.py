@@ -0,0 +1,305 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timezone
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Max
+from django.test import Client
+
+from api.renderers import FastJSONRenderer
+from api.serializers.models import (
+    RECORDS_LIST_VALUES,
+    RecordsListSerializer,
+    RecordsSerializer,
+    serialize_records_columns,
+    serialize_records_list,
+)
+from data.categories import get_category_registry
+from data.metrics import QueryTimer
+from data.models import Records
+from data.versions import bump_data_version
+
+# Rows rendered by the serializer cases and ids sent to bulk-sync
+SERIALIZER_ROWS = 5000
+BULK_SYNC_IDS = 10000
+
+
+class Case:
+    """
+    A benchmarked operation. 'before' runs untimed before every iteration,
+    e.g. to invalidate the response cache.
+    """
+
+    def __init__(self, name, run, before=None):
+        self.name = name
+        self.run = run
+        self.before = before
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the API hot paths against the current database and writes the "
+        "results as JSON, optionally comparing them with a previous run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Timed iterations per case (default: 20)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed iterations per case (default: 2)",
+        )
+        parser.add_argument(
+            "--case",
+            action="append",
+            dest="cases",
+            help="Only run the given case, can be repeated",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the JSON results to (default: standard output)",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON results of a previous run to compare the medians with",
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help=(
+                "Fail if a median is slower than in --compare by more than this "
+                "fraction (e.g. 0.2)"
+            ),
+        )
+        parser.add_argument(
+            "--conn-max-age",
+            type=int,
+            help=(
+                "CONN_MAX_AGE of the database connection for this run, e.g. 0 "
+                "to measure the cost of connecting for every request"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["warmup"] < 0:
+            raise CommandError("--iterations must be positive, --warmup not negative")
+
+        record_count = Records.objects.count()
+        if not record_count:
+            raise CommandError("There are no records, run seed_records first")
+
+        if options["conn_max_age"] is not None:
+            # Takes effect on the next connection
+            connection.settings_dict["CONN_MAX_AGE"] = options["conn_max_age"]
+            connection.close()
+
+        cases = self.get_cases(record_count)
+        if options["cases"]:
+            unknown = set(options["cases"]) - {case.name for case in cases}
+            if unknown:
+                raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}")
+            cases = [case for case in cases if case.name in options["cases"]]
+
+        results = []
+        for case in cases:
+            result = measure(case, options["iterations"], options["warmup"])
+            results.append(result)
+            self.stderr.write(
+                f"{case.name}: median {result['median'] * 1000:.2f} ms, "
+                f"{result['queries']} queries, {result['connects']} connects"
+            )
+
+        report = {"meta": get_meta(record_count), "results": results}
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["max_regression"])
+
+    def get_cases(self, record_count):
+        client = Client()
+
+        def get(url):
+            response = client.get(url, HTTP_ACCEPT="application/json")
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+            return response
+
+        def invalidate_records():
+            bump_data_version("records")
+
+        def invalidate_categories():
+            bump_data_version("categories")
+
+        def request_cycle():
+            # The test client does not close the connections around the
+            # request as the WSGI and ASGI handlers do
+            close_old_connections()
+            get("/api/categories/")
+            close_old_connections()
+
+        # Inputs taken from the current data
+        latest = Records.objects.aggregate(latest=Max("date"))["latest"] or date.today()
+        report_url = (
+            f"/api/categories/monthly-report/?month={latest.month}&year={latest.year}"
+        )
+        page_url = f"/api/records/?page={max(record_count // 100, 1)}"
+        queryset = Records.objects.order_by("-date", "-time")
+        rows = list(queryset.values_list(*RECORDS_LIST_VALUES)[:SERIALIZER_ROWS])
+        instances = list(queryset[:SERIALIZER_ROWS])
+        sync_ids = list(queryset.values_list("external_id", flat=True)[:BULK_SYNC_IDS])
+        renderer = FastJSONRenderer()
+        records_data = serialize_records_list(rows)
+
+        def cursor_walk():
+            url = "/api/records/?cursor="
+            for _ in range(5):
+                url = get(url).data["next"]
+
+        def bulk_sync():
+            # Rolled back so every iteration updates the same rows
+            with transaction.atomic():
+                response = client.post(
+                    "/api/records/bulk-sync/",
+                    json.dumps({"record_ids": sync_ids, "strict": False}),
+                    content_type="application/json",
+                )
+                transaction.set_rollback(True)
+            if response.status_code != 200:
+                raise CommandError(f"bulk-sync returned {response.status_code}")
+
+        return [
+            Case("list_first_page", lambda: get("/api/records/")),
+            Case("list_deep_page", lambda: get(page_url)),
+            Case("list_cursor_5_pages", cursor_walk),
+            Case(
+                "recents",
+                lambda: get("/api/records/recents/?size=100"),
+                before=invalidate_records,
+            ),
+            Case("recents_cached", lambda: get("/api/records/recents/?size=100")),
+            Case("monthly_report", lambda: get(report_url), before=invalidate_records),
+            Case("monthly_report_cached", lambda: get(report_url)),
+            Case("bulk_sync", bulk_sync),
+            Case("request_cycle", request_cycle, before=invalidate_categories),
+            Case("serialize_records_list", lambda: serialize_records_list(rows)),
+            Case("serialize_records_columns", lambda: serialize_records_columns(rows)),
+            Case("render_records_json", lambda: renderer.render(records_data)),
+            Case(
+                "records_list_serializer",
+                lambda: RecordsListSerializer(instances, many=True).data,
+            ),
+            Case(
+                "records_serializer",
+                lambda: RecordsSerializer(instances, many=True).data,
+            ),
+        ]
+
+    def compare(self, results, path, max_regression):
+        with open(path) as file:
+            baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+        regressions = []
+        for result in results:
+            previous = baseline.get(result["name"])
+            if previous is None:
+                continue
+            change = result["median"] / previous["median"] - 1
+            self.stderr.write(
+                f"{result['name']}: {previous['median'] * 1000:.2f} ms -> "
+                f"{result['median'] * 1000:.2f} ms ({change:+.1%})"
+            )
+            if max_regression is not None and change > max_regression:
+                regressions.append(result["name"])
+
+        if regressions:
+            raise CommandError(f"Regressions: {', '.join(regressions)}")
+
+
+def measure(case, iterations, warmup):
+    """
+    Runs a case and returns its timings in seconds and the number of
+    database queries and connections opened of its last iteration.
+    """
+    # Cached cases start from a warm cache and a loaded category registry
+    cache.clear()
+    get_category_registry()
+
+    connects = []
+
+    def count_connect(sender, connection, **kwargs):
+        connects.append(connection.alias)
+
+    timings = []
+    queries = 0
+    connection_created.connect(count_connect)
+    try:
+        for iteration in range(warmup + iterations):
+            if case.before:
+                case.before()
+            # The execute wrapper is installed on the connection object, which
+            # survives a reconnect
+            timer = QueryTimer()
+            connects.clear()
+            with connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                case.run()
+                elapsed = time.perf_counter() - start
+            if iteration >= warmup:
+                timings.append(elapsed)
+                queries = timer.count
+    finally:
+        connection_created.disconnect(count_connect)
+
+    timings.sort()
+    return {
+        "name": case.name,
+        "iterations": iterations,
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "max": timings[-1],
+        "queries": queries,
+        "connects": len(connects),
+    }
+
+
+def get_meta(record_count):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "database": connection.vendor,
+        "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+        "records": record_count,
+    }
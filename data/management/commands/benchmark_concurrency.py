@@ -0,0 +1,224 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Read endpoints served by async views under ASGI
+DEFAULT_PATHS = [
+    "/api/records/recents/?size=100",
+    "/api/categories/monthly-report/",
+    "/api/categories/",
+]
+DEFAULT_CONCURRENCY = [1, 8, 32, 128]
+
+
+class Worker(threading.Thread):
+    """
+    Sends requests over one keep-alive connection until the deadline,
+    cycling through the paths, and records their latencies.
+    """
+
+    def __init__(self, url, paths, start_at, warmup_until, deadline, offset):
+        super().__init__(daemon=True)
+        self.url = url
+        self.paths = paths
+        self.start_at = start_at
+        self.warmup_until = warmup_until
+        self.deadline = deadline
+        self.offset = offset
+        self.latencies = []
+        self.errors = 0
+
+    def connect(self):
+        connection_class = (
+            http.client.HTTPSConnection
+            if self.url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        return connection_class(self.url.hostname, self.url.port, timeout=30)
+
+    def run(self):
+        connection = self.connect()
+        index = self.offset
+        while time.monotonic() < self.start_at:
+            time.sleep(0.001)
+        while True:
+            start = time.monotonic()
+            if start >= self.deadline:
+                break
+            path = self.paths[index % len(self.paths)]
+            index += 1
+            try:
+                connection.request("GET", path, headers={"Accept": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = self.connect()
+                ok = False
+            end = time.monotonic()
+            if start < self.warmup_until:
+                continue
+            if ok:
+                self.latencies.append(end - start)
+            else:
+                self.errors += 1
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests a running server (e.g. gunicorn on data.wsgi or an ASGI "
+        "server on data.asgi) with an increasing number of concurrent "
+        "clients and reports the throughput and latency percentiles of each "
+        "level, optionally comparing them with a previous run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server (default: http://127.0.0.1:8000)",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, can be repeated (default: the read endpoints)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            action="append",
+            type=int,
+            help=(
+                "Concurrent clients, can be repeated to test several levels "
+                f"(default: {', '.join(map(str, DEFAULT_CONCURRENCY))})"
+            ),
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=20,
+            help="Measured seconds per level (default: 20)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=2,
+            help="Unmeasured seconds at the start of each level (default: 2)",
+        )
+        parser.add_argument(
+            "--label",
+            help="Name of the setup under test, e.g. 'wsgi' or 'asgi'",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the JSON results to (default: standard output)",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON results of a previous run to compare each level with",
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise CommandError("--url must be an http(s) URL")
+        levels = options["concurrency"] or DEFAULT_CONCURRENCY
+        if min(levels) < 1 or options["duration"] <= 0 or options["warmup"] < 0:
+            raise CommandError(
+                "--concurrency and --duration must be positive, --warmup not negative"
+            )
+        paths = options["paths"] or DEFAULT_PATHS
+
+        results = []
+        for concurrency in levels:
+            result = run_level(
+                url, paths, concurrency, options["duration"], options["warmup"]
+            )
+            results.append(result)
+            self.stderr.write(
+                f"{concurrency} clients: {result['throughput']:.1f} req/s, "
+                f"p50 {result['p50'] * 1000:.1f} ms, "
+                f"p99 {result['p99'] * 1000:.1f} ms, {result['errors']} errors"
+            )
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "label": options["label"],
+                "url": options["url"],
+                "paths": paths,
+                "duration": options["duration"],
+                "warmup": options["warmup"],
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(results, options["compare"])
+
+    def compare(self, results, path):
+        with open(path) as file:
+            baseline = {
+                result["concurrency"]: result for result in json.load(file)["results"]
+            }
+
+        for result in results:
+            previous = baseline.get(result["concurrency"])
+            if previous is None or not previous["requests"]:
+                continue
+            self.stderr.write(
+                f"{result['concurrency']} clients: "
+                f"{previous['throughput']:.1f} -> {result['throughput']:.1f} req/s "
+                f"({result['throughput'] / previous['throughput'] - 1:+.1%}), "
+                f"p99 {previous['p99'] * 1000:.1f} -> {result['p99'] * 1000:.1f} ms"
+            )
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of sorted timings"""
+    if not timings:
+        return 0.0
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def run_level(url, paths, concurrency, duration, warmup):
+    """Runs 'concurrency' clients for warmup + duration seconds"""
+    # Every client starts at the same time, once all the threads exist
+    start_at = time.monotonic() + 0.1 + concurrency * 0.001
+    warmup_until = start_at + warmup
+    deadline = warmup_until + duration
+    workers = [
+        Worker(url, paths, start_at, warmup_until, deadline, offset)
+        for offset in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    timings = sorted(latency for worker in workers for latency in worker.latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(timings),
+        "errors": sum(worker.errors for worker in workers),
+        "throughput": len(timings) / duration,
+        "mean": statistics.mean(timings) if timings else 0.0,
+        "p50": percentile(timings, 0.5),
+        "p95": percentile(timings, 0.95),
+        "p99": percentile(timings, 0.99),
+        "max": timings[-1] if timings else 0.0,
+    }
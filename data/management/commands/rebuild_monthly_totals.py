@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from data.models import MonthlyTotals
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the monthly totals by category and source from the records"
+
+    def handle(self, *args, **options):
+        MonthlyTotals.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Monthly totals rebuilt: {MonthlyTotals.objects.count()} rows"
+            )
+        )
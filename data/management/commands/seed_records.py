@@ -0,0 +1,254 @@
+import math
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+
+from data.models import Categories, MonthlyTotals, Records
+
+CATEGORY_NAMES = [
+    ("Supermercado", "Groceries"),
+    ("Comida", "Restaurant, fast-food"),
+    ("Transporte", "Public transport"),
+    ("Servicios", "Energy, utilities"),
+    ("Tarjeta de crédito", "Charges, Fees"),
+    ("Alquiler", "Rent"),
+    ("Salud", "Health care, doctor"),
+    ("Farmacia", "Drug-store, chemist"),
+    ("Combustible", "Fuel"),
+    ("Entretenimiento", "Life & Entertainment"),
+    ("Ropa", "Clothes & shoes"),
+    ("Educación", "Education, development"),
+    ("Impuestos", "Taxes"),
+    ("Préstamos", "Loan, interests"),
+    ("Suscripciones", "Subscriptions"),
+    ("Hogar", "Home, garden"),
+    ("Tecnología", "Electronics, accessories"),
+    ("Seguros", "Insurances"),
+    ("Viajes", "Holiday, trips, hotels"),
+    ("Mascotas", "Pets, animals"),
+    ("Regalos", "Gifts, joy"),
+    ("Gimnasio", "Active sport, fitness"),
+    ("Sueldo", "Wage, invoices"),
+    ("Ventas", "Sale"),
+    ("Otros gastos", "Others"),
+]
+
+MERCHANTS = [
+    "Carrefour",
+    "Coto",
+    "Día",
+    "Jumbo",
+    "Farmacity",
+    "YPF",
+    "Shell",
+    "Axion",
+    "Mercado Libre",
+    "Rappi",
+    "PedidosYa",
+    "Uber",
+    "Cabify",
+    "Netflix",
+    "Spotify",
+    "Personal",
+    "Movistar",
+    "Edenor",
+    "Aysa",
+    "Metrogas",
+    "DPEC",
+    "Aguas de Corrientes",
+    "Starbucks",
+    "Café Martínez",
+    "McDonald's",
+    "Burger King",
+    "Garbarino",
+    "Fravega",
+    "Easy",
+    "Sodimac",
+    "Zara",
+    "Adidas",
+    "Despegar",
+    "Aerolíneas Argentinas",
+    "OSDE",
+    "Swiss Medical",
+    "La Anónima",
+    "Kiosco",
+    "Verdulería",
+    "Panadería",
+]
+
+OPERATIONS = [
+    "Compra",
+    "Pago",
+    "Transferencia",
+    "Débito automático",
+    "Suscripción",
+    "Pago con QR",
+    "Cuota",
+]
+
+# Share of each of the SOURCE_CHOICES and of the records without date, time
+# or category
+SOURCE_WEIGHTS = {"macro": 55, "mercado pago": 35, "ingreso manual": 10}
+NULL_DATE_RATE = 0.005
+NULL_CATEGORY_RATE = 0.03
+TIME_RATE = 0.6
+
+# Records older than this are almost all synchronized
+SYNC_AGE_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds synthetic categories and records with skewed category, date and "
+        "amount distributions, for benchmarks and load tests"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--records",
+            type=int,
+            default=1_000_000,
+            help="Number of records to create (default: 1000000)",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=len(CATEGORY_NAMES),
+            help=f"Number of categories to use (default: {len(CATEGORY_NAMES)})",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=3 * 365,
+            help="Days of history, ending today (default: 1095)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Records inserted per statement (default: 5000)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed, the same seed generates the same data (default: 42)",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every record and category before seeding",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to seed (default: 'default')",
+        )
+
+    def handle(self, *args, **options):
+        if options["records"] < 0 or options["categories"] < 1 or options["days"] < 1:
+            raise CommandError(
+                "--records must be positive, --categories and --days at least 1"
+            )
+
+        database = options["database"]
+        rng = random.Random(options["seed"])
+
+        if options["clear"]:
+            Records.objects.using(database).all().delete()
+            Categories.objects.using(database).all().delete()
+
+        categories = self.get_categories(options["categories"], database)
+        # Zipf-like weights: a few categories concentrate most records
+        rng.shuffle(categories)
+        category_weights = [1 / (rank + 1) ** 1.2 for rank in range(len(categories))]
+
+        created = 0
+        records = RecordGenerator(rng, categories, category_weights, options["days"])
+        # Plain QuerySet inserts: the monthly totals are rebuilt once at the end
+        queryset = models.QuerySet(Records, using=database)
+        while created < options["records"]:
+            size = min(options["batch_size"], options["records"] - created)
+            with transaction.atomic(using=database):
+                queryset.bulk_create([records.generate() for _ in range(size)])
+            created += size
+            self.stdout.write(f"Created {created}/{options['records']} records")
+
+        MonthlyTotals.objects.db_manager(database).rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {created} records in {len(categories)} categories"
+            )
+        )
+
+    def get_categories(self, count, database):
+        categories = []
+        for index in range(count):
+            name, alt_name = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+            if index >= len(CATEGORY_NAMES):
+                name = f"{name} {index // len(CATEGORY_NAMES) + 1}"
+            category, _ = Categories.objects.using(database).get_or_create(
+                name=name, defaults={"alt_name": alt_name}
+            )
+            categories.append(category)
+        return categories
+
+
+class RecordGenerator:
+    """Builds unsaved records from a seeded random generator"""
+
+    def __init__(self, rng, categories, category_weights, days):
+        self.rng = rng
+        self.categories = categories
+        self.category_weights = category_weights
+        self.days = days
+        self.today = date.today()
+        self.sources = list(SOURCE_WEIGHTS)
+        self.source_weights = list(SOURCE_WEIGHTS.values())
+
+    def generate(self):
+        rng = self.rng
+        record_date = self.random_date()
+        category = None
+        if rng.random() >= NULL_CATEGORY_RATE:
+            category = rng.choices(self.categories, self.category_weights)[0]
+        merchant = rng.choice(MERCHANTS)
+        operation = rng.choice(OPERATIONS)
+
+        if record_date is None:
+            sync = False
+        elif (self.today - record_date).days > SYNC_AGE_DAYS:
+            sync = rng.random() < 0.98
+        else:
+            sync = rng.random() < 0.3
+
+        return Records(
+            external_id=f"{rng.getrandbits(160):040x}",
+            description=f"{operation} {merchant}",
+            date=record_date,
+            time=self.random_time(),
+            category=category,
+            # Log-normal amounts: mostly small expenses, a long tail of big ones
+            amount=Decimal(round(math.exp(rng.gauss(8, 1.2)), 2)).quantize(
+                Decimal("0.01")
+            ),
+            sync=sync,
+            source=rng.choices(self.sources, self.source_weights)[0],
+        )
+
+    def random_date(self):
+        if self.rng.random() < NULL_DATE_RATE:
+            return None
+        # Exponential decay: recent months have more records than old ones
+        offset = int(self.rng.expovariate(3 / self.days))
+        return self.today - timedelta(days=min(offset, self.days - 1))
+
+    def random_time(self):
+        if self.rng.random() >= TIME_RATE:
+            return None
+        return time(
+            self.rng.randrange(24), self.rng.randrange(60), self.rng.randrange(60)
+        )
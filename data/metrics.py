@@ -0,0 +1,344 @@
+"""
+Per-route request metrics exposed in the Prometheus text format.
+
+The aggregates live in the process memory and are shared by the threads of
+the worker, each metric guarded by its own lock. Run with a single worker
+process (as in the Dockerfile) or every process reports its own share.
+"""
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from typing import Dict, List, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label of the requests that did not resolve to a view, so unknown
+# paths do not create new series
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, with labels"""
+
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: observations per bucket (the last one is +Inf),
+        # sum and count
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(
+                (labels, (list(counts), total, count))
+                for labels, (counts, total, count) in self._values.items()
+            )
+        bucket_names = self.labelnames + ("le",)
+        lines = []
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, observations in zip(self.buckets + (float("inf"),), counts):
+                cumulative += observations
+                bucket_labels = format_labels(
+                    bucket_names, labels + (format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series} {format_value(total)}")
+            lines.append(f"{self.name}_count{series} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(
+    Counter(
+        "expensy_http_requests_total",
+        "Requests by route, method and status code.",
+        ["route", "method", "status"],
+    )
+)
+REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "expensy_http_request_duration_seconds",
+        "Request latency by route.",
+        ["route", "method"],
+        LATENCY_BUCKETS,
+    )
+)
+RESPONSE_SIZE = REGISTRY.register(
+    Histogram(
+        "expensy_http_response_size_bytes",
+        "Response body size by route, streaming responses excluded.",
+        ["route", "method"],
+        SIZE_BUCKETS,
+    )
+)
+DB_QUERIES = REGISTRY.register(
+    Histogram(
+        "expensy_db_queries_per_request",
+        "Database queries issued while handling a request, by route.",
+        ["route", "method"],
+        QUERY_COUNT_BUCKETS,
+    )
+)
+DB_DURATION = REGISTRY.register(
+    Histogram(
+        "expensy_db_query_duration_seconds_per_request",
+        "Time spent in database queries while handling a request, by route.",
+        ["route", "method"],
+        LATENCY_BUCKETS,
+    )
+)
+DB_CONNECTIONS_OPEN = REGISTRY.register(
+    Gauge(
+        "expensy_db_connections_open",
+        "Database connections currently open in this process, by alias.",
+        ["alias"],
+    )
+)
+DB_CONNECTIONS_OPENED = REGISTRY.register(
+    Counter(
+        "expensy_db_connections_opened_total",
+        "Database connections opened, by alias.",
+        ["alias"],
+    )
+)
+DB_CONNECTIONS_CLOSED = REGISTRY.register(
+    Counter(
+        "expensy_db_connections_closed_total",
+        "Database connections closed, by alias and reason (max_age, "
+        "health_check, unusable or closed).",
+        ["alias", "reason"],
+    )
+)
+DB_CONNECT_DURATION = REGISTRY.register(
+    Histogram(
+        "expensy_db_connect_duration_seconds",
+        "Time taken to open a database connection, by alias.",
+        ["alias"],
+        LATENCY_BUCKETS,
+    )
+)
+DB_HEALTH_CHECKS = REGISTRY.register(
+    Counter(
+        "expensy_db_health_checks_total",
+        "Health checks of persistent connections before their reuse in a "
+        "request, by alias and result (ok or failed).",
+        ["alias", "result"],
+    )
+)
+
+
+class QueryTimer:
+    """Database execute wrapper that counts and times the queries it runs"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_route(request) -> str:
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None or not resolver_match.view_name:
+        return UNMATCHED_ROUTE
+    return resolver_match.view_name
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, response size and database queries of every
+    request, labelled with the name of the resolved route (e.g.
+    'record-list', 'category-monthly-report').
+
+    Queries run while a streaming response is consumed happen after the
+    middleware returns and are not counted. It supports both sync and async
+    requests, so it does not force async views into a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with self.count_queries(timer):
+            response = self.get_response(request)
+        self.observe(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        # The async ORM runs the queries of the request in its sync_to_async
+        # thread, the timer is installed on the connections of that thread
+        with await sync_to_async(self.count_queries)(timer):
+            response = await self.get_response(request)
+        self.observe(request, response, timer, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def count_queries(timer):
+        """
+        Installs the timer on the connections of the current thread.
+        Execute wrappers are per connection and connections are per thread,
+        so each request only sees its own queries.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    @staticmethod
+    def observe(request, response, timer, duration):
+        route = get_route(request)
+        labels = (route, request.method)
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+        REQUEST_DURATION.observe(labels, duration)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
+        DB_QUERIES.observe(labels, timer.count)
+        DB_DURATION.observe(labels, timer.duration)
+
+
+def is_metrics_reader(request) -> bool:
+    """
+    Whether a request may read the metrics: it sends the METRICS_TOKEN as a
+    bearer token, or it comes from a staff user.
+    """
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer":
+        return hmac.compare_digest(credentials.encode(), token.encode())
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    """
+    Exposes the collected metrics in the Prometheus text format, to the
+    scraper and staff users only (see is_metrics_reader)
+    """
+    if not is_metrics_reader(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
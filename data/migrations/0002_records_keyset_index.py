@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 13:45
+
+import datetime
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="records",
+            name="id",
+            field=models.CharField(
+                db_column="id",
+                default=uuid.uuid4,
+                max_length=40,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="records",
+            name="source",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("ingreso manual", "Ingreso manual"),
+                    ("mercado pago", "Mercado pago"),
+                    ("macro", "Macro"),
+                ],
+                max_length=50,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="records",
+            index=models.Index(
+                models.OrderBy(
+                    django.db.models.functions.comparison.Coalesce(
+                        models.F("date"), models.Value(datetime.date(1, 1, 1))
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(
+                    django.db.models.functions.comparison.Coalesce(
+                        models.F("time"), models.Value(datetime.time(0, 0))
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="records_keyset_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+import django.db.models.deletion
+
+
+def populate_monthly_totals(apps, schema_editor):
+    Records = apps.get_model("data", "Records")
+    MonthlyTotals = apps.get_model("data", "MonthlyTotals")
+    db_alias = schema_editor.connection.alias
+
+    rows = (
+        Records.objects.using(db_alias)
+        .exclude(date=None)
+        .annotate(bucket_year=ExtractYear("date"), bucket_month=ExtractMonth("date"))
+        .values("bucket_year", "bucket_month", "category_id", "source")
+        .annotate(total_amount=Sum("amount"), total_count=Count("id"))
+        .order_by()
+    )
+    MonthlyTotals.objects.using(db_alias).bulk_create(
+        [
+            MonthlyTotals(
+                year=row["bucket_year"],
+                month=row["bucket_month"],
+                category_id=row["category_id"],
+                source=row["source"],
+                amount=row["total_amount"],
+                count=row["total_count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0002_records_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyTotals",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("month", models.PositiveSmallIntegerField()),
+                (
+                    "source",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("ingreso manual", "Ingreso manual"),
+                            ("mercado pago", "Mercado pago"),
+                            ("macro", "Macro"),
+                        ],
+                        max_length=50,
+                        null=True,
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="data.categories",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "monthly_totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="monthlytotals",
+            constraint=models.UniqueConstraint(
+                fields=("year", "month", "category", "source"),
+                name="monthly_totals_bucket_unique",
+            ),
+        ),
+        migrations.RunPython(populate_monthly_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 4.2 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+TABLES = ["categories", "records"]
+
+POSTGRESQL_FORWARD = [
+    "CREATE SEQUENCE change_seq",
+    """
+    CREATE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('change_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    *(f"""
+        CREATE TRIGGER {table}_change_seq
+        BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION set_change_seq()
+        """ for table in TABLES),
+]
+
+POSTGRESQL_BACKWARD = [
+    *(f"DROP TRIGGER {table}_change_seq ON {table}" for table in TABLES),
+    "DROP FUNCTION set_change_seq()",
+    "DROP SEQUENCE change_seq",
+]
+
+# SQLite has no sequences: a one-row counter table is bumped by AFTER
+# triggers, which then stamp the written row. The WHEN clause keeps that
+# stamping UPDATE from firing the update trigger again.
+SQLITE_STAMP = """
+    UPDATE change_seq SET value = value + 1 WHERE id = 1;
+    UPDATE {table} SET change_seq = (SELECT value FROM change_seq WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+"""
+
+SQLITE_FORWARD = [
+    "CREATE TABLE change_seq (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER)",
+    "INSERT INTO change_seq (id, value) VALUES (1, 0)",
+    *(f"""
+        CREATE TRIGGER {table}_change_seq_insert
+        AFTER INSERT ON {table}
+        BEGIN {SQLITE_STAMP.format(table=table)} END
+        """ for table in TABLES),
+    *(f"""
+        CREATE TRIGGER {table}_change_seq_update
+        AFTER UPDATE ON {table}
+        WHEN NEW.change_seq = OLD.change_seq
+            OR NEW.change_seq < (SELECT value FROM change_seq WHERE id = 1)
+        BEGIN {SQLITE_STAMP.format(table=table)} END
+        """ for table in TABLES),
+]
+
+SQLITE_BACKWARD = [
+    *(
+        f"DROP TRIGGER {table}_change_seq_{event}"
+        for table in TABLES
+        for event in ["insert", "update"]
+    ),
+    "DROP TABLE change_seq",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_change_seq_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_FORWARD)
+    elif vendor == "sqlite":
+        run_statements(schema_editor, SQLITE_FORWARD)
+    else:
+        return
+
+    # Stamp the existing rows, the triggers assign the sequence values
+    for table in TABLES:
+        schema_editor.execute(f"UPDATE {table} SET change_seq = 0")
+
+
+def drop_change_seq_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_BACKWARD)
+    elif vendor == "sqlite":
+        run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0003_monthly_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="categories",
+            name="change_seq",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="records",
+            name="change_seq",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(create_change_seq_triggers, drop_change_seq_triggers),
+    ]
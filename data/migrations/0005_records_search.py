@@ -0,0 +1,95 @@
+from django.db import migrations
+
+from data.search import SEARCH_CONFIG, SQLITE_SEARCH_TABLE
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX records_description_trgm_idx
+    ON records USING gin (description gin_trgm_ops)
+    """,
+    f"""
+    CREATE INDEX records_description_fts_idx
+    ON records USING gin (to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')))
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX records_description_fts_idx",
+    "DROP INDEX records_description_trgm_idx",
+]
+
+# External content FTS5 table: it only stores the index, the text is read
+# from records through the rowid
+SQLITE_INSERT = (
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, description) "
+    "VALUES (NEW.rowid, NEW.description);"
+)
+SQLITE_DELETE = (
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}, rowid, description) "
+    "VALUES ('delete', OLD.rowid, OLD.description);"
+)
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {SQLITE_SEARCH_TABLE} USING fts5(
+        description,
+        content='records',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_SEARCH_TABLE}_insert AFTER INSERT ON records
+    BEGIN {SQLITE_INSERT} END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_SEARCH_TABLE}_delete AFTER DELETE ON records
+    BEGIN {SQLITE_DELETE} END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_SEARCH_TABLE}_update AFTER UPDATE OF description ON records
+    BEGIN {SQLITE_DELETE} {SQLITE_INSERT} END
+    """,
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    *(
+        f"DROP TRIGGER {SQLITE_SEARCH_TABLE}_{event}"
+        for event in ["insert", "delete", "update"]
+    ),
+    f"DROP TABLE {SQLITE_SEARCH_TABLE}",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_FORWARD)
+    elif vendor == "sqlite":
+        run_statements(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_BACKWARD)
+    elif vendor == "sqlite":
+        run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0004_change_seq"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
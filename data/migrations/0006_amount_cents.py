@@ -0,0 +1,80 @@
+# Generated by Django 4.2 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+from data.triggers import reinstall_records_triggers
+
+TABLES = ["records", "monthly_totals"]
+
+
+def run_without_change_seq(schema_editor, statements):
+    """
+    Run the statements without stamping the change sequence: converting the
+    amount column is not a change of the records. On SQLite the table was
+    just rebuilt without its triggers.
+    """
+    postgresql = schema_editor.connection.vendor == "postgresql"
+    if postgresql:
+        schema_editor.execute("ALTER TABLE records DISABLE TRIGGER records_change_seq")
+    for statement in statements:
+        schema_editor.execute(statement)
+    if postgresql:
+        schema_editor.execute("ALTER TABLE records ENABLE TRIGGER records_change_seq")
+
+
+def copy_amounts_to_cents(apps, schema_editor):
+    run_without_change_seq(
+        schema_editor,
+        [
+            f"UPDATE {table} SET amount_cents = CAST(ROUND(amount * 100) AS BIGINT)"
+            for table in TABLES
+        ],
+    )
+
+
+def copy_cents_to_amounts(apps, schema_editor):
+    run_without_change_seq(
+        schema_editor,
+        [f"UPDATE {table} SET amount = amount_cents / 100.0" for table in TABLES],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0005_records_search"),
+    ]
+
+    operations = [
+        # Rebuilding records drops its SQLite triggers, they are restored
+        # after the last table change in both directions
+        migrations.RunPython(migrations.RunPython.noop, reinstall_records_triggers),
+        migrations.AddField(
+            model_name="monthlytotals",
+            name="amount_cents",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="records",
+            name="amount_cents",
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        # Unapplying the removal re-adds amount nullable, for the rows to be
+        # copied back before it is made NOT NULL again
+        migrations.AlterField(
+            model_name="records",
+            name="amount",
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(copy_amounts_to_cents, copy_cents_to_amounts),
+        migrations.RemoveField(
+            model_name="monthlytotals",
+            name="amount",
+        ),
+        migrations.RemoveField(
+            model_name="records",
+            name="amount",
+        ),
+        migrations.RunPython(reinstall_records_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 4.2 on 2026-10-18 15:10
+
+import datetime
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import uuid
+
+from data.triggers import reinstall_records_triggers
+
+
+def replace_primary_key(apps, schema_editor):
+    """
+    Turn the varchar primary key of records into the external_id column and
+    add a bigint identity primary key. The model state already has the new
+    layout, this only changes the table.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, "records")
+
+    if connection.vendor == "postgresql":
+        # Altered in place: the rows get their new id without a table copy
+        # and the triggers are kept
+        for name, constraint in constraints.items():
+            if constraint["columns"] == ["id"] and name.endswith("_like"):
+                schema_editor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        primary_key = next(
+            name
+            for name, constraint in constraints.items()
+            if constraint["primary_key"]
+        )
+        for statement in [
+            f"ALTER TABLE records DROP CONSTRAINT {connection.ops.quote_name(primary_key)}",
+            "ALTER TABLE records RENAME COLUMN id TO external_id",
+            "ALTER TABLE records ADD COLUMN id bigint NOT NULL "
+            "GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY",
+        ]:
+            schema_editor.execute(statement)
+    elif connection.vendor == "sqlite":
+        # SQLite cannot change a primary key: the table is created again and
+        # the rows copied in their current order, taking new ids
+        Records = apps.get_model("data", "Records")
+        schema_editor.alter_db_table(Records, "records", "records_old")
+        for name, constraint in constraints.items():
+            if constraint["index"] and not constraint["primary_key"]:
+                schema_editor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        schema_editor.create_model(Records)
+        columns = ", ".join(
+            connection.ops.quote_name(field.column)
+            for field in Records._meta.local_concrete_fields
+            if not field.primary_key and field.name != "external_id"
+        )
+        schema_editor.execute(
+            f"INSERT INTO records (external_id, {columns}) "
+            f"SELECT id, {columns} FROM records_old ORDER BY rowid"
+        )
+        schema_editor.execute("DROP TABLE records_old")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0006_amount_cents"),
+    ]
+
+    operations = [
+        # The keyset index ends with the primary key, it is rebuilt on the
+        # new one
+        migrations.RemoveIndex(
+            model_name="records",
+            name="records_keyset_idx",
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name="records",
+                    old_name="id",
+                    new_name="external_id",
+                ),
+                migrations.AlterField(
+                    model_name="records",
+                    name="external_id",
+                    field=models.CharField(default=uuid.uuid4, max_length=40),
+                ),
+                migrations.AddField(
+                    model_name="records",
+                    name="id",
+                    field=models.BigAutoField(primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(replace_primary_key),
+        migrations.AddIndex(
+            model_name="records",
+            index=models.Index(
+                models.OrderBy(
+                    django.db.models.functions.comparison.Coalesce(
+                        models.F("date"), models.Value(datetime.date(1, 1, 1))
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(
+                    django.db.models.functions.comparison.Coalesce(
+                        models.F("time"), models.Value(datetime.time(0, 0))
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="records_keyset_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="records",
+            constraint=models.UniqueConstraint(
+                models.F("external_id"),
+                django.db.models.functions.comparison.Coalesce(
+                    "source", models.Value("")
+                ),
+                name="records_source_external_id_unique",
+            ),
+        ),
+        migrations.RunPython(reinstall_records_triggers),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2 on 2026-10-18 18:02
+
+from django.db import migrations
+
+TABLES = ["categories", "records"]
+
+# Drawing the sequence value when the row is written lets transactions commit
+# out of sequence order: a consumer that already read past a value never
+# sees a row committed later with a lower one. The rows are marked pending
+# (-1) instead, and a deferred constraint trigger stamps each one by its
+# primary key when the transaction commits. The advisory lock serializes
+# those stamps, so the values are drawn in commit order and each transaction
+# is visible before the next one draws. The stamping UPDATE runs nested
+# (trigger depth 2) and keeps its value. SQLite needs none of this, its
+# writers are already serialized for the whole transaction.
+CHANGE_SEQ_LOCK = 0x6368616E6765
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        IF pg_trigger_depth() = 1 THEN
+            NEW.change_seq := -1;
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock({CHANGE_SEQ_LOCK});
+        EXECUTE 'UPDATE ' || quote_ident(TG_TABLE_NAME)
+            || ' SET change_seq = nextval(''change_seq'')'
+            || ' WHERE id = $1 AND change_seq = -1'
+            USING NEW.id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    *(f"""
+        CREATE CONSTRAINT TRIGGER {table}_change_seq_stamp
+        AFTER INSERT OR UPDATE ON {table}
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW WHEN (NEW.change_seq = -1)
+        EXECUTE FUNCTION stamp_change_seq()
+        """ for table in TABLES),
+]
+
+POSTGRESQL_BACKWARD = [
+    *(f"DROP TRIGGER {table}_change_seq_stamp ON {table}" for table in TABLES),
+    "DROP FUNCTION stamp_change_seq()",
+    """
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('change_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def stamp_change_seq_at_commit(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_FORWARD)
+
+
+def stamp_change_seq_on_write(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0007_records_surrogate_pk"),
+    ]
+
+    operations = [
+        migrations.RunPython(stamp_change_seq_at_commit, stamp_change_seq_on_write),
+    ]
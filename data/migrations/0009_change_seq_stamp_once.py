@@ -0,0 +1,99 @@
+# Generated by Django 4.2 on 2026-10-18 20:41
+
+from django.db import migrations
+
+TABLES = ["categories", "records"]
+
+# Same lock as 0008_change_seq_at_commit
+CHANGE_SEQ_LOCK = 0x6368616E6765
+
+# Stamping each pending row on its own ran one UPDATE per written row at
+# commit, all of them holding the lock. The first stamp trigger that fires
+# now stamps every pending row of the transaction with one UPDATE per table
+# (served by the change_seq index) and flags the transaction as stamped, the
+# triggers queued for the rest of its rows return right away. A new write
+# clears the flag, so rows written after constraints were set IMMEDIATE are
+# stamped again at the end of their statement.
+STAMPED_SETTING = "change_seq.stamped"
+STAMP_PENDING = "\n        ".join(
+    f"UPDATE {table} SET change_seq = nextval('change_seq') WHERE change_seq = -1;"
+    for table in TABLES
+)
+
+POSTGRESQL_FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        IF pg_trigger_depth() = 1 THEN
+            NEW.change_seq := -1;
+            PERFORM set_config('{STAMPED_SETTING}', '', true);
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+    BEGIN
+        IF current_setting('{STAMPED_SETTING}', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        PERFORM pg_advisory_xact_lock({CHANGE_SEQ_LOCK});
+        {STAMP_PENDING}
+        PERFORM set_config('{STAMPED_SETTING}', 'on', true);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    """
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        IF pg_trigger_depth() = 1 THEN
+            NEW.change_seq := -1;
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock({CHANGE_SEQ_LOCK});
+        EXECUTE 'UPDATE ' || quote_ident(TG_TABLE_NAME)
+            || ' SET change_seq = nextval(''change_seq'')'
+            || ' WHERE id = $1 AND change_seq = -1'
+            USING NEW.id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def stamp_once_per_transaction(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_FORWARD)
+
+
+def stamp_each_row(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        run_statements(schema_editor, POSTGRESQL_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0008_change_seq_at_commit"),
+    ]
+
+    operations = [
+        migrations.RunPython(stamp_once_per_transaction, stamp_each_row),
+    ]
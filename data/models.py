@@ -1,6 +1,18 @@
-from django.db import models
+import calendar
+from datetime import date, time
+from decimal import ROUND_HALF_UP, Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import AutoField, Count, F, Q, Sum, Value
+from django.db.models.constants import OnConflict
+from django.db.models.sql import InsertQuery
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
 import uuid
 
+from data.search import search_records
+from data.versions import bump_data_version
 
 SOURCE_CHOICES = [
     ("ingreso manual", "Ingreso manual"),
@@ -8,39 +20,566 @@ SOURCE_CHOICES = [
     ("macro", "Macro"),
 ]
 
+# Sort key used by the keyset (cursor) pagination of records. NULL dates and
+# times are coalesced to the minimum value so they sort last and the key is
+# always comparable. The composite index on Records uses the same expressions.
+KEYSET_NULL_DATE = date.min
+KEYSET_NULL_TIME = time.min
+
+
+def records_keyset_expressions():
+    """Return the (date, time, id) expressions of the records keyset."""
+    return (
+        Coalesce(F("date"), Value(KEYSET_NULL_DATE)),
+        Coalesce(F("time"), Value(KEYSET_NULL_TIME)),
+        F("id"),
+    )
+
+
+# Ids per statement when mark_synced cannot send them as a single array
+SYNC_FALLBACK_BATCH_SIZE = 5000
+
+# Records fields that feed the monthly totals
+ROLLUP_FIELDS = {"date", "category", "category_id", "amount_cents", "source"}
+
+
+def to_cents(amount):
+    """
+    Convert an amount in pesos (Decimal, str, int or float) to an integer
+    number of centavos, rounding half up.
+
+    Examples:
+        >>> to_cents("10.5")
+        1050
+        >>> to_cents(-0.015)
+        -2
+    """
+    if amount is None:
+        return None
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """
+    Convert an integer number of centavos to a two-decimal Decimal.
+
+    Examples:
+        >>> from_cents(1050)
+        Decimal('10.50')
+    """
+    if cents is None:
+        return None
+    return Decimal(cents).scaleb(-2)
+
+
+def external_key(source, external_id):
+    """
+    Return the deduplication key of a record, as enforced by the
+    records_source_external_id_unique index: records without a source share
+    the empty one.
+    """
+    return source or "", str(external_id)
+
+
+def month_bounds(year, month):
+    """Return the first and last day of a month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+class CategoriesQuerySet(models.QuerySet):
+    """Invalidates cached responses on bulk writes to Categories."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        bump_data_version("categories", using=self.db)
+        return created
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump_data_version("categories", using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        result = super().delete()
+        # Records and monthly totals of the categories are deleted in cascade
+        bump_data_version("categories", "records", using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Categories(models.Model):
     id = models.BigAutoField(primary_key=True, db_column="id")
     name = models.CharField(max_length=120)
     alt_name = models.CharField(max_length=120, blank=True, null=True)
+    # Set by a database trigger on every insert and update
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    objects = CategoriesQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_data_version("categories", using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        bump_data_version("categories", "records", using=using)
+        return result
+
     class Meta:
         db_table = "categories"
 
 
-class Records(models.Model):
-    id = models.CharField(
-        max_length=40, primary_key=True, db_column="id", default=uuid.uuid4
+class MonthlyTotalsManager(models.Manager):
+    def add(self, bucket, amount_cents, count):
+        """Add an amount in centavos and a record count to a MonthlyTotals bucket."""
+        year, month, category_id, source = bucket
+        bucket_filter = {
+            "year": year,
+            "month": month,
+            "category_id": category_id,
+            "source": source,
+        }
+        changes = {
+            "amount_cents": F("amount_cents") + amount_cents,
+            "count": F("count") + count,
+        }
+        if self.filter(**bucket_filter).update(**changes):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(**bucket_filter, amount_cents=amount_cents, count=count)
+        except IntegrityError:
+            # Created concurrently by another transaction
+            self.filter(**bucket_filter).update(**changes)
+
+    def apply_change(self, previous, current):
+        """Move a record's contribution from its previous to its current bucket."""
+        if previous == current:
+            return
+        if previous is not None:
+            self.add(previous[0], -previous[1], -1)
+        if current is not None:
+            self.add(current[0], current[1], 1)
+
+    def refresh_months(self, months):
+        """Recompute the totals of the given (year, month) pairs from Records."""
+        if not months:
+            return
+        self.filter(
+            reduce(or_, (Q(year=year, month=month) for year, month in months))
+        ).delete()
+        records_filter = reduce(
+            or_,
+            (Q(date__range=month_bounds(year, month)) for year, month in months),
+        )
+        self.bulk_create(
+            self.aggregate_records(
+                Records.objects.using(self.db).filter(records_filter)
+            )
+        )
+
+    def rebuild(self):
+        """Recompute every monthly total from Records."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                self.aggregate_records(Records.objects.using(self.db)), batch_size=1000
+            )
+        bump_data_version("records", using=self.db)
+
+    def aggregate_records(self, records):
+        """Group records by bucket in a single query and return unsaved totals."""
+        rows = (
+            records.exclude(date=None)
+            .annotate(
+                bucket_year=ExtractYear("date"), bucket_month=ExtractMonth("date")
+            )
+            .values("bucket_year", "bucket_month", "category_id", "source")
+            .annotate(total_amount=Sum("amount_cents"), total_count=Count("id"))
+            .order_by()
+        )
+        return [
+            self.model(
+                year=row["bucket_year"],
+                month=row["bucket_month"],
+                category_id=row["category_id"],
+                source=row["source"],
+                amount_cents=row["total_amount"],
+                count=row["total_count"],
+            )
+            for row in rows
+        ]
+
+
+class MonthlyTotals(models.Model):
+    """
+    Sum and count of records per (year, month, category, source). Kept up to
+    date in the same transaction as every write to Records, so monthly
+    reports read a handful of rows instead of aggregating the raw records.
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category = models.ForeignKey(
+        Categories, null=True, blank=True, on_delete=models.CASCADE
+    )
+    source = models.CharField(
+        max_length=50, blank=True, null=True, choices=SOURCE_CHOICES
     )
+    amount_cents = models.BigIntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    objects = MonthlyTotalsManager()
+
+    @property
+    def amount(self):
+        """Total amount in pesos, as a two-decimal Decimal."""
+        return from_cents(self.amount_cents)
+
+    class Meta:
+        db_table = "monthly_totals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month", "category", "source"],
+                name="monthly_totals_bucket_unique",
+            ),
+        ]
+
+
+class RecordsQuerySet(models.QuerySet):
+    """
+    Keeps MonthlyTotals in sync and invalidates cached responses on bulk
+    writes to Records.
+    """
+
+    def rollup_months(self):
+        """Return the (year, month) pairs covered by the queryset."""
+        return set(
+            self.exclude(date=None)
+            .annotate(
+                bucket_year=ExtractYear("date"), bucket_month=ExtractMonth("date")
+            )
+            .values_list("bucket_year", "bucket_month")
+            .order_by()
+            .distinct()
+        )
+
+    def search(self, query):
+        """
+        Return the records whose description matches the query, annotated
+        with a 'rank' and best matches first. See data.search.
+        """
+        return search_records(self, query)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            MonthlyTotals.objects.db_manager(self.db).refresh_months(
+                {(obj.date.year, obj.date.month) for obj in objs if obj.date}
+            )
+        bump_data_version("records", using=self.db)
+        return created
+
+    def bulk_upsert(self, objs, batch_size=None):
+        """
+        Insert the records whose (source, external_id) is not stored yet,
+        skipping the rest.
+
+        The existing keys are resolved with a single query and the new
+        records are inserted with ON CONFLICT DO NOTHING, both in one
+        transaction, so a whole batch costs a couple of statements instead of
+        a lookup and a save per record.
+
+        Returns:
+            Dictionary with the 'inserted' and 'skipped' counts. Records
+            inserted by a concurrent transaction after the lookup count as
+            skipped, see insert_ignoring_conflicts
+        """
+        objs = list(objs)
+        unique_objs = {}
+        for obj in objs:
+            unique_objs.setdefault(external_key(obj.source, obj.external_id), obj)
+
+        inserted = 0
+        with transaction.atomic(using=self.db):
+            existing_keys = {
+                external_key(source, external_id)
+                for source, external_id in self.filter(
+                    external_id__in=[external_id for _, external_id in unique_objs]
+                ).values_list("source", "external_id")
+            }
+            new_objs = [
+                obj for key, obj in unique_objs.items() if key not in existing_keys
+            ]
+            if new_objs:
+                inserted = self.insert_ignoring_conflicts(new_objs, batch_size)
+
+        return {"inserted": inserted, "skipped": len(objs) - inserted}
+
+    def insert_ignoring_conflicts(self, objs, batch_size=None):
+        """
+        Insert new records with ON CONFLICT DO NOTHING, as bulk_create with
+        ignore_conflicts, and return how many rows were actually inserted.
+
+        bulk_create doesn't report the rows skipped by a conflict, so where
+        the database supports it (PostgreSQL, SQLite 3.35+) the statement
+        RETURNING the primary key is run through the insert compiler, and
+        the returned keys are set on the inserted objects. Elsewhere it
+        falls back to bulk_create and the count is an upper bound.
+        """
+        connection = connections[self.db]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+            return len(objs)
+
+        opts = self.model._meta
+        fields = [
+            field for field in opts.concrete_fields if not isinstance(field, AutoField)
+        ]
+        self._prepare_for_bulk_create(objs)
+        max_batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        batch_size = min(batch_size or max_batch_size, max_batch_size)
+
+        by_key = {external_key(obj.source, obj.external_id): obj for obj in objs}
+        inserted = 0
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(objs), batch_size):
+                query = InsertQuery(self.model, on_conflict=OnConflict.IGNORE)
+                query.insert_values(fields, objs[start : start + batch_size])
+                compiler = query.get_compiler(using=self.db)
+                compiler.returning_fields = [
+                    opts.pk,
+                    opts.get_field("source"),
+                    opts.get_field("external_id"),
+                ]
+                with connection.cursor() as cursor:
+                    for sql, params in compiler.as_sql():
+                        cursor.execute(sql, params)
+                    rows = cursor.fetchall()
+                for pk, source, external_id in rows:
+                    obj = by_key[external_key(source, external_id)]
+                    obj.pk = pk
+                    obj._state.adding = False
+                    obj._state.db = self.db
+                inserted += len(rows)
+            MonthlyTotals.objects.db_manager(self.db).refresh_months(
+                {(obj.date.year, obj.date.month) for obj in objs if obj.date}
+            )
+        bump_data_version("records", using=self.db)
+        return inserted
+
+    def mark_synced(self, ids):
+        """
+        Mark the records with the given external ids as synced. An id shared
+        by records of several sources marks all of them.
+
+        On PostgreSQL the update and the classification of the ids run in a
+        single statement, joining the records against the ids passed as one
+        array parameter. Other databases use a lookup plus an update.
+
+        Returns:
+            Dictionary with the 'updated', 'already_synced' and 'unknown' ids
+        """
+        ids = list(dict.fromkeys(ids))
+        connection = connections[self.db]
+
+        if connection.vendor == "postgresql":
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    WITH input AS (
+                        SELECT unnest(%s::varchar[]) AS external_id
+                    ), updated AS (
+                        UPDATE {table} AS r SET sync = true
+                        FROM input
+                        WHERE r.external_id = input.external_id AND r.sync = false
+                        RETURNING r.external_id
+                    )
+                    SELECT input.external_id,
+                        bool_or(updated.external_id IS NOT NULL),
+                        bool_or(r.id IS NOT NULL)
+                    FROM input
+                    LEFT JOIN updated ON updated.external_id = input.external_id
+                    LEFT JOIN {table} AS r ON r.external_id = input.external_id
+                    GROUP BY input.external_id
+                    """,
+                    [ids],
+                )
+                rows = cursor.fetchall()
+            bump_data_version("records", using=self.db)
+        else:
+            rows = []
+            for start in range(0, len(ids), SYNC_FALLBACK_BATCH_SIZE):
+                batch = ids[start : start + SYNC_FALLBACK_BATCH_SIZE]
+                # Whether every record with the id was already synced
+                stored = {}
+                for external_id, sync in self.filter(external_id__in=batch).values_list(
+                    "external_id", "sync"
+                ):
+                    stored[external_id] = stored.get(external_id, True) and sync
+                self.filter(external_id__in=batch, sync=False).update(sync=True)
+                rows.extend(
+                    (
+                        external_id,
+                        external_id in stored and not stored[external_id],
+                        external_id in stored,
+                    )
+                    for external_id in batch
+                )
+
+        result = {"updated": [], "already_synced": [], "unknown": []}
+        for external_id, updated, known in rows:
+            if updated:
+                result["updated"].append(external_id)
+            elif known:
+                result["already_synced"].append(external_id)
+            else:
+                result["unknown"].append(external_id)
+        return result
+
+    def update(self, **kwargs):
+        if not ROLLUP_FIELDS.intersection(kwargs):
+            rows = super().update(**kwargs)
+            bump_data_version("records", using=self.db)
+            return rows
+        with transaction.atomic(using=self.db):
+            months = self.rollup_months()
+            if "date" in kwargs:
+                pks = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            if "date" in kwargs:
+                months |= (
+                    Records.objects.using(self.db).filter(pk__in=pks).rollup_months()
+                )
+            MonthlyTotals.objects.db_manager(self.db).refresh_months(months)
+        bump_data_version("records", using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            months = self.rollup_months()
+            result = super().delete()
+            MonthlyTotals.objects.db_manager(self.db).refresh_months(months)
+        bump_data_version("records", using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class Records(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    # Id given by the source (e.g. the bank operation), unique per source
+    external_id = models.CharField(max_length=40, default=uuid.uuid4)
     description = models.CharField(max_length=350, blank=True, null=True)
     date = models.DateField(null=True, blank=True)
     time = models.TimeField(null=True, blank=True)
     category = models.ForeignKey(
         Categories, null=True, blank=True, on_delete=models.CASCADE
     )
-    amount = models.DecimalField(decimal_places=2, max_digits=10)
+    # Amount in centavos, read and written in pesos through 'amount'
+    amount_cents = models.BigIntegerField()
     sync = models.BooleanField(default=False)
     source = models.CharField(
         max_length=50, blank=True, null=True, choices=SOURCE_CHOICES
     )
+    # Set by a database trigger on every insert and update
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    objects = RecordsQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the record contributes to the monthly totals so an
+        # update does not need to read the row again
+        if not instance.get_deferred_fields().intersection(
+            {"date", "category_id", "amount_cents", "source"}
+        ):
+            instance._saved_rollup_state = instance.rollup_state()
+        return instance
+
+    @property
+    def amount(self):
+        """Amount in pesos, as a two-decimal Decimal."""
+        return from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_cents = to_cents(value)
+
+    def rollup_state(self):
+        """Return the (bucket, amount_cents) this record adds to MonthlyTotals."""
+        if not self.date:
+            return None
+        bucket = (self.date.year, self.date.month, self.category_id, self.source)
+        return bucket, self.amount_cents
+
+    def saved_rollup_state(self):
+        """Return the rollup state of the record as stored in the database."""
+        if hasattr(self, "_saved_rollup_state"):
+            return self._saved_rollup_state
+        stored = (
+            Records.objects.filter(pk=self.pk)
+            .only("date", "category_id", "amount_cents", "source")
+            .first()
+        )
+        return stored.rollup_state() if stored else None
 
     def save(self, *args, **kwargs):
-        if not self.id:
-            self.id = str(uuid.uuid4())
-        super().save(*args, **kwargs)
+        if not self.external_id:
+            self.external_id = str(uuid.uuid4())
+
+        using = kwargs.get("using") or router.db_for_write(Records, instance=self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not ROLLUP_FIELDS.intersection(update_fields):
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic(using=using):
+                # New instances are always inserted, the pk is set by the database
+                previous = None if self._state.adding else self.saved_rollup_state()
+                super().save(*args, **kwargs)
+                current = self.rollup_state()
+                MonthlyTotals.objects.db_manager(using).apply_change(previous, current)
+                self._saved_rollup_state = current
+        bump_data_version("records", using=using)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(Records, instance=self)
+        with transaction.atomic(using=using):
+            previous = self.saved_rollup_state()
+            result = super().delete(*args, **kwargs)
+            MonthlyTotals.objects.db_manager(using).apply_change(previous, None)
+        if hasattr(self, "_saved_rollup_state"):
+            del self._saved_rollup_state
+        bump_data_version("records", using=using)
+        return result
 
     class Meta:
         db_table = "records"
+        indexes = [
+            models.Index(
+                *(expression.desc() for expression in records_keyset_expressions()),
+                name="records_keyset_idx",
+            ),
+        ]
+        constraints = [
+            # Leads with external_id so it also serves lookups by id alone
+            models.UniqueConstraint(
+                "external_id",
+                Coalesce("source", Value("")),
+                name="records_source_external_id_unique",
+            ),
+        ]
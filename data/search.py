@@ -0,0 +1,155 @@
+"""Indexed full-text and fuzzy search over record descriptions."""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Text search configuration of the PostgreSQL index. Queries must build the
+# exact same expression for the planner to use it
+SEARCH_CONFIG = "spanish"
+
+# SQLite FTS5 table kept in sync with records.description by triggers
+SQLITE_SEARCH_TABLE = "records_search"
+
+WORD_RE = re.compile(r"\w+")
+
+
+class DescriptionVector(Func):
+    """to_tsvector of a text column, as indexed by records_description_fts_idx"""
+
+    template = f"to_tsvector('{SEARCH_CONFIG}', coalesce(%(expressions)s, ''))"
+
+
+class WebSearchQuery(Func):
+    function = "websearch_to_tsquery"
+    template = f"%(function)s('{SEARCH_CONFIG}', %(expressions)s)"
+
+
+class TextMatch(Func):
+    arg_joiner = " @@ "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+class TrigramMatch(Func):
+    """pg_trgm similarity operator, served by records_description_trgm_idx"""
+
+    arg_joiner = " %% "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+class TrigramContains(Func):
+    """
+    Case-insensitive containment as a plain ILIKE, which the gin_trgm_ops
+    index of records_description_trgm_idx serves. Django's icontains
+    compiles to UPPER(...) LIKE UPPER(...) instead, which no index serves.
+    """
+
+    arg_joiner = " ILIKE "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+class TextRank(Func):
+    function = "ts_rank"
+    output_field = FloatField()
+
+
+class TrigramSimilarity(Func):
+    function = "similarity"
+    output_field = FloatField()
+
+
+def sqlite_match_expression(query):
+    """
+    Builds an FTS5 MATCH expression that requires every word of the query
+    as a prefix, so partially typed words still match. Returns None when
+    the query has no words.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def like_pattern(query):
+    """
+    ILIKE pattern matching the query anywhere, with its wildcards escaped.
+
+    Examples:
+        >>> like_pattern("50% off")
+        '%50\\\\% off%'
+    """
+    escaped = re.sub(r"([\\%_])", r"\\\1", query)
+    return f"%{escaped}%"
+
+
+def search_postgresql(queryset, query):
+    vector = DescriptionVector(F("description"))
+    text_query = WebSearchQuery(Value(query))
+    return queryset.annotate(
+        rank=TextRank(vector, text_query)
+        + TrigramSimilarity(F("description"), Value(query))
+    ).filter(
+        Q(TextMatch(vector, text_query))
+        | Q(TrigramMatch(F("description"), Value(query)))
+        # Substrings too short or too partial to reach the similarity
+        # threshold, e.g. "mercad"
+        | Q(TrigramContains(F("description"), Value(like_pattern(query))))
+    )
+
+
+def search_sqlite(queryset, query):
+    match = sqlite_match_expression(query)
+    if match is None:
+        return queryset.none()
+
+    table = queryset.model._meta.db_table
+    search = SQLITE_SEARCH_TABLE
+    return queryset.annotate(
+        rank=RawSQL(
+            f"SELECT -bm25({search}) FROM {search} "
+            f"WHERE {search} MATCH %s AND {search}.rowid = {table}.rowid",
+            (match,),
+            output_field=FloatField(),
+        )
+    ).filter(
+        RawSQL(
+            f"{table}.rowid IN (SELECT rowid FROM {search} WHERE {search} MATCH %s)",
+            (match,),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def search_records(queryset, query):
+    """
+    Filters a records queryset to the rows whose description matches the
+    query, annotated with a 'rank' (higher is better) and ordered by it.
+
+    On PostgreSQL it combines full-text search, which matches stemmed
+    words, with trigram similarity, which tolerates typos and partial
+    words, both served by GIN indexes. On SQLite it uses the FTS5 table
+    with prefix matching and bm25 ranking. Other databases fall back to a
+    case-insensitive containment scan.
+
+    Args:
+        queryset: Records queryset to search in
+        query: Text entered by the user
+
+    Returns:
+        Filtered and annotated queryset ordered by rank
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        queryset = search_postgresql(queryset, query)
+    elif vendor == "sqlite":
+        queryset = search_sqlite(queryset, query)
+    else:
+        queryset = queryset.annotate(rank=Value(1.0)).filter(
+            description__icontains=query
+        )
+    return queryset.order_by("-rank", "-date", "-time")
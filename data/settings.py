@@ -45,11 +45,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "data.metrics.MetricsMiddleware",
+    "data.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -74,23 +75,65 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "data.wsgi.application"
+ASGI_APPLICATION = "data.asgi.application"
+
+# Serve the read-heavy endpoints with the async views of
+# api/views/async_views.py. Enabled by data/asgi.py: under WSGI each async
+# view would run in an event loop of its own.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS") == "1"
+
+# Bearer token of the Prometheus scraper for /metrics, staff users can read
+# it with their session. Without a token only staff users can.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# The port 6543 is a transaction-mode pooler, see data/backends/postgresql.
+# Each thread keeps its connection for CONN_MAX_AGE seconds, checked before
+# its reuse in a request. data/asgi.py disables it: under ASGI every request
+# runs in a new thread and would leave its connection behind.
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "data.backends.postgresql",
         "HOST": os.getenv("host"),
         "USER": os.getenv("user"),
         "PASSWORD": os.getenv("password"),
         "NAME": "postgres",
         "PORT": 6543,
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 300)),
+        "CONN_HEALTH_CHECKS": True,
     },
 }
 
 
+# Bulk endpoints receive up to tens of thousands of ids or records per request
+DATA_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared Redis cache in production, local memory otherwise. Cached API
+# responses are invalidated through per-table versions, which are also checked
+# against the tables (see data.versions) to follow the writes of processes that
+# don't share the cache.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,7 +190,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": ("rest_framework.pagination.PageNumberPagination"),
     "PAGE_SIZE": 100,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "api.renderers.FastJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
 }
@@ -0,0 +1,48 @@
+import hashlib
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.http import urlencode
+
+from data.versions import get_data_versions
+
+register = template.Library()
+
+
+def cached_date_hierarchy(cl):
+    """
+    Date hierarchy of the changelist, cached until the records are written.
+    Computing it takes a MIN/MAX and a DISTINCT date query over the filtered
+    records, which scan the table when no filter narrows them.
+    """
+    version = get_data_versions("records")["records"]
+    fingerprint = "|".join(
+        [
+            cl.model._meta.label,
+            urlencode(sorted(cl.params.items())),
+            translation.get_language() or "",
+            f"records:{version}",
+        ]
+    )
+    key = (
+        f"admin-date-hierarchy:{hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()}"
+    )
+    context = cache.get(key)
+    if context is None:
+        context = date_hierarchy(cl)
+        cache.set(key, context)
+    return context
+
+
+@register.tag(name="cached_date_hierarchy")
+def cached_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=cached_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
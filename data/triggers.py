@@ -0,0 +1,67 @@
+"""
+SQLite triggers of the records table.
+
+SQLite has no ALTER TABLE for most schema changes, so Django migrations
+rebuild the table (create a copy, move the rows, drop the original), which
+drops its triggers and renumbers its rowids. Migrations that alter records
+call reinstall_records_triggers afterwards to restore the change sequence
+stamping and the full-text index.
+"""
+
+from data.search import SQLITE_SEARCH_TABLE
+
+SEARCH_INSERT = (
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, description) "
+    "VALUES (NEW.rowid, NEW.description);"
+)
+SEARCH_DELETE = (
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}, rowid, description) "
+    "VALUES ('delete', OLD.rowid, OLD.description);"
+)
+CHANGE_SEQ_STAMP = """
+    UPDATE change_seq SET value = value + 1 WHERE id = 1;
+    UPDATE records SET change_seq = (SELECT value FROM change_seq WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+"""
+
+RECORDS_TRIGGERS = {
+    "records_change_seq_insert": f"""
+        CREATE TRIGGER records_change_seq_insert AFTER INSERT ON records
+        BEGIN {CHANGE_SEQ_STAMP} END
+    """,
+    "records_change_seq_update": f"""
+        CREATE TRIGGER records_change_seq_update AFTER UPDATE ON records
+        WHEN NEW.change_seq = OLD.change_seq
+            OR NEW.change_seq < (SELECT value FROM change_seq WHERE id = 1)
+        BEGIN {CHANGE_SEQ_STAMP} END
+    """,
+    f"{SQLITE_SEARCH_TABLE}_insert": f"""
+        CREATE TRIGGER {SQLITE_SEARCH_TABLE}_insert AFTER INSERT ON records
+        BEGIN {SEARCH_INSERT} END
+    """,
+    f"{SQLITE_SEARCH_TABLE}_delete": f"""
+        CREATE TRIGGER {SQLITE_SEARCH_TABLE}_delete AFTER DELETE ON records
+        BEGIN {SEARCH_DELETE} END
+    """,
+    f"{SQLITE_SEARCH_TABLE}_update": f"""
+        CREATE TRIGGER {SQLITE_SEARCH_TABLE}_update
+        AFTER UPDATE OF description ON records
+        BEGIN {SEARCH_DELETE} {SEARCH_INSERT} END
+    """,
+}
+
+
+def reinstall_records_triggers(apps, schema_editor):
+    """
+    Migration operation (for RunPython) that recreates the SQLite triggers of
+    records and rebuilds the full-text index. Does nothing on other
+    databases, where altering a table keeps its triggers.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for name, statement in RECORDS_TRIGGERS.items():
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        schema_editor.execute(statement)
+    schema_editor.execute(
+        f"INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')"
+    )
@@ -21,8 +21,13 @@ from django.urls import path, include
 from django.conf.urls.static import static
 
 from data import settings
+from data.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.api_urls")),
+    path("metrics", metrics_view, name="metrics"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+if settings.ASYNC_VIEWS:
+    urlpatterns.insert(1, path("api/", include("api.async_urls")))
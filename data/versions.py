@@ -0,0 +1,154 @@
+"""Per-table data versions used to invalidate cached API responses."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+
+VERSION_KEY = "data-version:{table}"
+
+# The versions are bumped by the writes of the processes sharing the cache:
+# with the default LocMemCache none but the current one, and the scrapers and
+# load scripts don't share it either. Every CHECK_INTERVAL seconds (once per
+# cache, the key expires) the max(change_seq) and count of each table are
+# read and the version is bumped when they changed, so the other writes are
+# seen within that time
+CHECK_INTERVAL = 5
+CHECK_KEY = "data-version-check:{table}"
+FINGERPRINT_KEY = "data-fingerprint:{table}"
+
+# Versions read inside a data_versions_snapshot() block
+_snapshot: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "data_versions_snapshot", default=None
+)
+
+
+def _initial_version() -> int:
+    """
+    Starting value of a version. It is time based so a version that was
+    evicted from the cache never goes back to a value seen before.
+    """
+    return time.time_ns()
+
+
+@contextmanager
+def data_versions_snapshot():
+    """
+    Read each data version from the cache once for the whole block, so the
+    responses computed in it are cached and validated against the same
+    versions. Writes made in the block are still seen.
+    """
+    token = _snapshot.set({})
+    try:
+        yield
+    finally:
+        _snapshot.reset(token)
+
+
+def get_data_versions(*tables: str) -> Dict[str, int]:
+    """
+    Get the current data version of each table.
+
+    Args:
+        tables: Database table names (e.g. "records", "categories")
+
+    Returns:
+        Dictionary mapping each table to its version
+    """
+    snapshot = _snapshot.get()
+    if snapshot is None:
+        return _read_versions(tables)
+    missing = [table for table in tables if table not in snapshot]
+    if missing:
+        snapshot.update(_read_versions(missing))
+    return {table: snapshot[table] for table in tables}
+
+
+def table_fingerprint(table: str) -> Tuple[int, int]:
+    """
+    Last change sequence and number of rows of a table. Inserts and updates
+    raise the first one, deletions lower the second one.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(MAX(change_seq), 0), COUNT(*) "
+            f"FROM {connection.ops.quote_name(table)}"
+        )
+        return tuple(cursor.fetchone())
+
+
+def _check_table(table: str) -> None:
+    """Bump the version of a table if its fingerprint changed"""
+    key = FINGERPRINT_KEY.format(table=table)
+    fingerprint = table_fingerprint(table)
+    if cache.get(key) != fingerprint:
+        cache.set(key, fingerprint, timeout=None)
+        _bump([table])
+
+
+def _read_versions(tables) -> Dict[str, int]:
+    for table in tables:
+        if cache.add(CHECK_KEY.format(table=table), True, timeout=CHECK_INTERVAL):
+            _check_table(table)
+    keys = {VERSION_KEY.format(table=table): table for table in tables}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, _initial_version(), timeout=None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+async def aget_data_versions(*tables: str) -> Dict[str, int]:
+    """Async version of get_data_versions, for async views."""
+    snapshot = _snapshot.get()
+    if snapshot is None:
+        return await _aread_versions(tables)
+    missing = [table for table in tables if table not in snapshot]
+    if missing:
+        snapshot.update(await _aread_versions(missing))
+    return {table: snapshot[table] for table in tables}
+
+
+async def _aread_versions(tables) -> Dict[str, int]:
+    for table in tables:
+        key = CHECK_KEY.format(table=table)
+        if await cache.aadd(key, True, timeout=CHECK_INTERVAL):
+            await sync_to_async(_check_table)(table)
+    keys = {VERSION_KEY.format(table=table): table for table in tables}
+    versions = await cache.aget_many(keys)
+    for key in keys.keys() - versions.keys():
+        await cache.aadd(key, _initial_version(), timeout=None)
+        versions[key] = await cache.aget(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def _bump(tables) -> None:
+    snapshot = _snapshot.get()
+    for table in tables:
+        if snapshot is not None:
+            snapshot.pop(table, None)
+        key = VERSION_KEY.format(table=table)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def bump_data_version(*tables: str, using: str = None) -> None:
+    """
+    Invalidate the cached responses that depend on the given tables.
+
+    The version is bumped right away and again when the current transaction
+    commits, so a response computed from the old data by a concurrent request
+    before the commit is not served afterwards.
+
+    Args:
+        tables: Database table names that were written
+        using: Database alias of the transaction
+    """
+    _bump(tables)
+    transaction.on_commit(lambda: _bump(tables), using=using)
@@ -1,19 +1,28 @@
 """Macro bank transaction extraction module."""
 
-import hashlib
 import os
-from time import sleep
+from typing import Optional
+
+from lxml.html import HtmlElement
 
 from utils.category_inference import macro_inference
 from services.selenium_service import SeleniumService, SeleniumDebuggerDriver
+from selenium.webdriver.common.by import By
 from django.core.wsgi import get_wsgi_application
-from utils.date_format import parse_day_month_year
+from parsers.macro import (
+    XP_MOVEMENTS,
+    movement_concept,
+    movement_rows,
+    parse_movement,
+)
 
 # Django configuration
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data.settings")
 application = get_wsgi_application()
 
-from data.models import Records, Categories
+from data.categories import get_category_registry
+from data.models import Records
+from load.records_load import RecordsLoader
 
 # Configuration constants
 PATH = "/Users/msticchi/Documents/dev/matias/scraping/chrome-driver"
@@ -21,21 +30,33 @@ WEB_URL = "https://www.macro.com.ar/bancainternet/#"
 SOURCE = "macro"
 
 
-def get_record_id(text: str) -> str:
+def build_record(row: HtmlElement, categories) -> Optional[Records]:
     """
-    Generate a unique record ID using SHA1 hash.
+    Build the record of a movements table row.
 
     Args:
-        text: Text to hash (combination of date, transaction number, and amount)
+        row: Row element of the movements page, see parsers.macro
+        categories: Category registry used to resolve the inferred category
 
     Returns:
-        SHA1 hash string of the input text
-
-    Examples:
-        >>> get_record_id("2024-01-15,12345,100.50")
-        'a1b2c3d4e5f6...'
+        Unsaved Records instance, or None if the description doesn't match
+        any category
     """
-    return hashlib.sha1(text.encode('ascii')).hexdigest()
+    # Infer category based on description, the rows without one are
+    # skipped before parsing the rest of their fields
+    category = categories.get(macro_inference(movement_concept(row)))
+    if category is None:
+        return None
+
+    movement = parse_movement(row)
+    return Records(
+        external_id=movement["id"],
+        description=movement["description"],
+        amount=movement["amount"],
+        category=category,
+        date=movement["date"],
+        source=SOURCE,
+    )
 
 
 def extract_macro_transactions() -> None:
@@ -45,8 +66,9 @@ def extract_macro_transactions() -> None:
     This function:
     1. Connects to Macro bank website using Selenium
     2. Navigates to the movements section
-    3. Extracts transaction data from the table
-    4. Processes and saves new transactions to the database
+    3. Waits for the movements to load and parses the page source, failing
+       with TimeoutException if no movement is shown in time
+    4. Saves the new transactions to the database in a single batch
     5. Skips transactions that don't match any category
     """
     # Initialize Selenium driver
@@ -54,71 +76,34 @@ def extract_macro_transactions() -> None:
     driver.get(WEB_URL)
 
     # Navigate to movements section
-    menu_movs = driver.find_elements(by="xpath", value=".//li[@id='menu_movs']")
-    driver.driver.execute_script("arguments[0].click();", menu_movs[1])
-
-    # Wait for page to load
-    sleep(10)
-
-    # Find all transaction rows
-    movs = driver.find_elements(
-        by="xpath",
-        value="//tr[@class='evenRow' or @class='oddRow']"
+    menu_movs = driver.wait_for_stable_count(
+        By.XPATH, ".//li[@id='menu_movs']", min_count=2
+    )
+    # Count the requests the click makes, to wait for them below
+    driver.track_network()
+    driver.execute_script("arguments[0].click();", menu_movs[1])
+
+    # Wait for the movements to be loaded and rendered. An empty table is
+    # not accepted, it's what a slow load looks like
+    driver.wait_for_network_idle()
+    driver.wait_for_stable_count(By.XPATH, XP_MOVEMENTS)
+
+    # Read all transaction rows from the page source, in one round trip
+    rows = movement_rows(driver.page_source())
+
+    # Build the records of the categorized transactions
+    categories = get_category_registry()
+    loader = RecordsLoader()
+    for row in rows:
+        loader.add(build_record, row, categories)
+
+    # Save the records that don't exist yet
+    result = loader.load()
+    print(
+        f"Inserted {result['inserted']} records, skipped {result['skipped']}, "
+        f"failed {result['failed']}"
     )
 
-    # Process each transaction
-    for mov in movs:
-        # Extract transaction details
-        description = mov.find_element(
-            by="xpath",
-            value="./td[@headers='_Descripción']"
-        ).text
-
-        # Infer category based on description
-        category_id = macro_inference(description)
-        if category_id == 0:
-            continue
-
-        # Extract date and convert to date object
-        date = mov.find_element(
-            by="xpath",
-            value="./td[@headers='_Fecha']"
-        ).text
-        date_obj = parse_day_month_year(date)
-
-        # Extract transaction number
-        transaction_number = mov.find_element(
-            by="xpath",
-            value="./td[@headers='_Nro. transacción']"
-        ).text
-
-        # Extract and clean amount
-        amount = mov.find_element(
-            by="xpath",
-            value="./td[@headers='_Importe']"
-        ).text
-        amount = amount.replace("$ ", "").replace(".", "").replace(",", ".")
-
-        # Generate unique record ID
-        record_id = get_record_id(f"{date},{transaction_number},{amount}")
-
-        # Get category object
-        category = Categories.objects.get(pk=category_id)
-
-        # Save record if it doesn't exist
-        try:
-            Records.objects.get(pk=record_id)
-        except Records.DoesNotExist:
-            record = Records(
-                id=record_id,
-                description=f"{description}. {date}",
-                amount=float(amount),
-                category=category,
-                date=date_obj,
-                source=SOURCE
-            )
-            record.save()
-
-
-if __name__ == '__main__':
+
+if __name__ == "__main__":
     extract_macro_transactions()
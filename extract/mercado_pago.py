@@ -1,95 +1,232 @@
-from time import sleep
-
+"""
+Mercado Pago transaction extraction from the API responses of the spending
+tracking page. EXPERIMENTAL: extract/mp_categories.py is the extractor to
+use, this one is not validated against a live session yet.
+
+Instead of opening every transaction to read its operation number, the page
+of each month is loaded once and the movements are read from the JSON
+responses the page fetches, captured from the Chrome performance log.
+
+The API path, the shape of its responses, the sign of the amounts and the
+movement id being the operation number are assumptions (see
+parsers.mercado_pago), only checked against synthetic responses. If one of
+them is wrong the records duplicate the ones of mp_categories.py under other
+ids, so by default the responses are only captured and nothing is saved:
+
+    python extract/mercado_pago.py --record capture.json
+
+Check the capture first, the movements must match the records of
+mp_categories.py, and replace the synthetic fixture of the tests with it
+anonymized. Only then save the records, with --save, from the browser or
+offline from a recording with --replay:
+
+    python extract/mercado_pago.py --replay capture.json --save
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+from django.core.wsgi import get_wsgi_application
 from services.selenium_service import SeleniumService, SeleniumDebuggerDriver
 from selenium.webdriver.common.by import By
 
-
-WEB = "https://www.mercadopago.com.ar/finance/spending-tracking"
-
-
-def get_operation_number(driver, expense_obj):
-    OP_NUM = "Número de operación"
-    sleep(1)
-    expense_obj.click()
-
-    op_label = driver.find_element(by="xpath", value=f"//span[contains(text(), '{OP_NUM}')]").text
-    op_number = op_label.replace(OP_NUM, "").replace(" ", "")
-
-    return op_number
-
-def get_amount(section):
-    spans = section.find_elements(by='xpath', value='./span')
-    amount_split = []
-    for span in spans:
-        amount_split.append(span.text)
-    try:
-        amount = float(amount_split[2].replace(".", ""))
-    except ValueError:
-        amount = float(amount_split[1].replace(".", ""))
-    return amount
-
-
-
-def extract_from_category(driver, category_name, category_obj):
-    sleep(1)
-    category_obj.click()
-
-    container_expenses = driver.find_elements(by="xpath",
-                                             value="//ul[@class='andes-list__group--sublist' and @aria-labelledby='basic-list-0']/div")
-    for expense_list in container_expenses:
-        description_amount = expense_list.find_elements(by="xpath", value="./li/a/section/div[@class='ui-rowfeed-content-rows']/div/span")
-        description = description_amount[0].text
-        amount = get_amount(description_amount[1])
-        expense_detail = get_operation_number(driver, expense_list)
-        print(category_name, description, amount, expense_detail)
-
-
-def extract():
-    driver = SeleniumService(SeleniumDebuggerDriver().driver)
-    driver.get(WEB)
-
-    # button_previous_month = driver.find_element(by="xpath", value="//button[@data-testid='month-button-previous']")
-    # button_previous_month.click()
-
-    xp_categories = "//ul[@aria-label='Listado de categorías organizadas del mayor al menor gasto.']//li"
-    xp_cat_name = ".//span[contains(@class, 'andes-list__item-primary')]"
-
-    container_categories = driver.find_elements(By.XPATH, value=xp_categories)
-    for i in range(len(container_categories)):
-        category_name = container_categories[i].find_element(By.XPATH, value=xp_cat_name).text
-        extract_from_category(driver, category_name, container_categories[i])
-
-        driver.get(WEB)
-        container_categories = driver.find_elements(By.XPATH, value=xp_categories)
-
-    driver.get(WEB)
-    button_previous_month = driver.find_element(by="xpath", value="//button[@data-testid='month-button-previous']")
-    button_previous_month.click()
-
-    container_categories = driver.find_elements(By.XPATH, value=xp_categories)
-    for i in range(len(container_categories)):
-        category_name = container_categories[i].find_element(By.XPATH, value=xp_cat_name).text
-        extract_from_category(driver, category_name, container_categories[i])
-
-        driver.get(WEB)
-        button_previous_month = driver.find_element(by="xpath", value="//button[@data-testid='month-button-previous']")
-        button_previous_month.click()
-
-        container_categories = driver.find_elements(By.XPATH, value=xp_categories)
-
-
-def extract_category():
-    driver = SeleniumService(SeleniumDebuggerDriver().driver)
-    driver.get(WEB)
-
-    xp_categories = "//ul[@aria-label='Listado de categorías organizadas del mayor al menor gasto.']//li"
-    xp_cat_name = ".//span[contains(@class, 'andes-list__item-primary')]"
-
-    container_categories = driver.find_elements(By.XPATH, value=xp_categories)
-    for category in container_categories:
-        category_name = category.find_element(By.XPATH, value=xp_cat_name).text
-        category_amount =
-
-
-if __name__ == '__main__':
-    extract_category()
\ No newline at end of file
+from parsers.mercado_pago import (
+    API_PATH,
+    movement_items,
+    movements_total,
+    parse_movement,
+)
+
+# Django configuration
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data.settings")
+application = get_wsgi_application()
+
+from data.categories import get_category_registry
+from data.models import Records
+from load.records_load import RecordsLoader
+
+# Configuration constants
+WEB_URL = "https://www.mercadopago.com.ar/finance/spending-tracking"
+SOURCE = "mercado pago"
+XP_PREVIOUS_MONTH = "//button[@data-testid='month-button-previous']"
+
+# Scrolls to the end of the movements, for the page to fetch the next ones
+SCROLL_SCRIPT = "window.scrollTo(0, document.body.scrollHeight);"
+
+
+def build_record(item: Dict[str, Any]) -> Records:
+    """
+    Build the record of a movement with category lookup.
+
+    Args:
+        item: Movement of an API response, see parsers.mercado_pago
+
+    Returns:
+        Unsaved Records instance
+    """
+    movement = parse_movement(item)
+    category_obj = get_category_registry().match(movement["category"])
+    return Records(
+        external_id=movement["id"],
+        description=movement["description"],
+        amount=movement["amount"],
+        category=category_obj,
+        date=movement["date"],
+        source=SOURCE,
+    )
+
+
+def capture_month(driver: SeleniumService) -> List[Dict[str, Any]]:
+    """
+    Capture the API responses of the month shown by the page.
+
+    The page fetches the movements a page at a time, it's scrolled down
+    until all of them are received or no more are fetched.
+
+    Args:
+        driver: Selenium driver, created with performance logging
+
+    Returns:
+        The responses of the month
+    """
+    driver.wait_for_network_idle()
+    responses = driver.network_responses(API_PATH)
+
+    while len(movement_items(responses)) < movements_total(responses):
+        driver.execute_script(SCROLL_SCRIPT)
+        driver.wait_for_network_idle()
+        more = driver.network_responses(API_PATH)
+        if not more:
+            break
+        responses.extend(more)
+
+    return responses
+
+
+def capture(driver: SeleniumService, months: int) -> List[List[Dict[str, Any]]]:
+    """
+    Capture the API responses of the last months, one page load per month.
+
+    Args:
+        driver: Selenium driver, created with performance logging
+        months: Number of months, counting the current one
+
+    Returns:
+        The responses of each month, from the current one
+    """
+    # Drop the responses received before loading the page
+    driver.network_responses(API_PATH)
+    driver.get(WEB_URL)
+
+    captured = [capture_month(driver)]
+    for _ in range(months - 1):
+        driver.wait_for_clickable(By.XPATH, XP_PREVIOUS_MONTH).click()
+        captured.append(capture_month(driver))
+    return captured
+
+
+def count_movements(captured: List[List[Dict[str, Any]]]) -> int:
+    """
+    Number of movements of the captured months.
+
+    Args:
+        captured: Responses of each month, see capture
+    """
+    return sum(len(movement_items(responses)) for responses in captured)
+
+
+def load_months(captured: List[List[Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Save the new movements of the captured months.
+
+    Args:
+        captured: Responses of each month, see capture
+
+    Returns:
+        Dictionary with the 'inserted', 'skipped' and 'failed' counts
+    """
+    loader = RecordsLoader()
+    for responses in captured:
+        for item in movement_items(responses):
+            loader.add(build_record, item)
+    return loader.load()
+
+
+def main() -> None:
+    """
+    Main function to extract Mercado Pago transactions from the API
+    responses.
+
+    This function:
+    1. Captures the API responses of each month from the spending tracking
+       page, or reads them from a recording
+    2. Saves them to a recording if requested
+    3. Only with --save, saves the new transactions to the database in a
+       single batch
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Extract the Mercado Pago transactions of the last months "
+            "(experimental, see extract/mp_categories.py)"
+        )
+    )
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=1,
+        help="Number of months to extract, counting the current one",
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="Save the captured responses to a JSON file"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="Extract the responses of a recording instead of the browser",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help=(
+            "Save the new movements to the database, only once a real "
+            "capture was checked against extract/mp_categories.py"
+        ),
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as file:
+            captured = json.load(file)
+    else:
+        driver = SeleniumService(SeleniumDebuggerDriver().driver)
+        captured = capture(driver, args.months)
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as file:
+            json.dump(captured, file, ensure_ascii=False, indent=2)
+
+    if not args.save:
+        print(
+            f"Read {count_movements(captured)} movements, nothing saved "
+            "(experimental, see --save)"
+        )
+        return
+
+    print(
+        "Experimental extraction, the API responses are not validated yet: "
+        "check the records against extract/mp_categories.py",
+        file=sys.stderr,
+    )
+    # Save the records that don't exist yet
+    result = load_months(captured)
+    print(
+        f"Inserted {result['inserted']} records, skipped {result['skipped']}, "
+        f"failed {result['failed']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
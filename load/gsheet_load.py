@@ -11,7 +11,7 @@ from services.google_sheet_actions import GoogleSheet
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data.settings")
 application = get_wsgi_application()
 
-from data.models import Records
+from data.models import Records, from_cents
 
 # Google Sheets configuration
 FILE_NAME_SA = "E:\\expensy-465801-22bce19d4412.json"
@@ -19,14 +19,14 @@ DOCUMENT_NAME = "Expensy"
 SHEET_NAME = "records"
 
 
-def sync_record(record_id: int) -> None:
+def sync_record(record_id: str) -> None:
     """
     Mark a record as synchronized in the database.
 
     Args:
-        record_id: The ID of the record to mark as synced
+        record_id: The external ID of the record to mark as synced
     """
-    Records.objects.filter(pk=record_id).update(sync=True)
+    Records.objects.filter(external_id=record_id).update(sync=True)
 
 
 def load_records_to_sheet() -> None:
@@ -44,11 +44,18 @@ def load_records_to_sheet() -> None:
 
     # Get unsynchronized records from database
     queryset = Records.objects.filter(sync=False).values_list(
-        "id", "description", "date", "category__name", "amount", "source"
+        "external_id",
+        "description",
+        "date",
+        "category__name",
+        "amount_cents",
+        "source",
     )
 
-    # Serialize records for Google Sheets
-    serialized_data = records_serializer(queryset)
+    # Serialize records for Google Sheets, amounts are stored in centavos
+    serialized_data = records_serializer(
+        (*record[:4], from_cents(record[4]), record[5]) for record in queryset
+    )
 
     # Get the range for writing data
     data_range = google.get_last_row_range(amount_rows=len(serialized_data))
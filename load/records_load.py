@@ -0,0 +1,71 @@
+"""Batched saving of the transactions read by the extractors."""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from data.models import Records
+
+logger = logging.getLogger(__name__)
+
+# Errors of a row that can't be turned into a record, e.g. an amount or date
+# in an unexpected format. They fail that row only, not the whole run.
+PARSE_ERRORS = (ArithmeticError, LookupError, TypeError, ValueError)
+
+
+class RecordsLoader:
+    """
+    Collects the records of an extraction run and saves the new ones in a
+    single batch with Records.objects.bulk_upsert: one query for the ids
+    already stored and one insert, inside one transaction.
+
+    Examples:
+        >>> loader = RecordsLoader()
+        >>> for row in rows:
+        ...     loader.add(parse_movement, row, categories)
+        >>> loader.load()
+        {'inserted': 3, 'skipped': 1, 'failed': 0}
+    """
+
+    def __init__(self) -> None:
+        self.records: List[Records] = []
+        self.skipped = 0
+        self.failed = 0
+
+    def add(self, parse: Callable[..., Optional[Records]], *args: Any) -> None:
+        """
+        Parse a row and collect its record.
+
+        Args:
+            parse: Function building the unsaved record of the row, or
+                returning None for rows that must not be saved
+            *args: Arguments of the parse function
+
+        A row the parse function returns None for is counted as skipped, one
+        it raises one of PARSE_ERRORS for is logged and counted as failed.
+        """
+        try:
+            record = parse(*args)
+        except PARSE_ERRORS:
+            logger.exception("Could not parse the row %r", args[:1])
+            self.failed += 1
+            return
+
+        if record is None:
+            self.skipped += 1
+        else:
+            self.records.append(record)
+
+    def load(self) -> Dict[str, int]:
+        """
+        Save the collected records that don't exist yet.
+
+        Returns:
+            Dictionary with the 'inserted', 'skipped' (already stored or not
+            to be saved) and 'failed' counts of the run
+        """
+        result = Records.objects.bulk_upsert(self.records)
+        return {
+            "inserted": result["inserted"],
+            "skipped": result["skipped"] + self.skipped,
+            "failed": self.failed,
+        }
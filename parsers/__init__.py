@@ -0,0 +1,57 @@
+"""
+Parsers of the bank pages, working on their saved HTML.
+
+The extractors only fetch the source of each page with Selenium, the
+transactions are read from it here with lxml. Reading the fields takes no
+browser round trips and the parsers can be tested and benchmarked offline.
+"""
+
+from lxml import html
+from lxml.html import HtmlElement
+
+
+def parse_html(page: str) -> HtmlElement:
+    """
+    Parse the source of a page.
+
+    Args:
+        page: HTML of the page, e.g. SeleniumService.page_source()
+
+    Returns:
+        Root element of the page
+    """
+    return html.fromstring(page)
+
+
+def get_text(element: HtmlElement) -> str:
+    """
+    Text of an element with its whitespace collapsed, as WebElement.text.
+
+    Examples:
+        >>> get_text(html.fromstring("<p> 1/jun\\n <b>2025</b> </p>"))
+        '1/jun 2025'
+    """
+    return " ".join(element.text_content().split())
+
+
+def find(element: HtmlElement, xpath: str) -> HtmlElement:
+    """
+    First element matching an XPath expression.
+
+    Raises:
+        ValueError: If no element matches
+    """
+    found = element.xpath(xpath)
+    if not found:
+        raise ValueError(f"No element matches {xpath!r}")
+    return found[0]
+
+
+def find_text(element: HtmlElement, xpath: str) -> str:
+    """
+    Text of the first element matching an XPath expression.
+
+    Raises:
+        ValueError: If no element matches
+    """
+    return get_text(find(element, xpath))
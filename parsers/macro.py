@@ -0,0 +1,105 @@
+"""Parser of the movements page of the Macro home banking."""
+
+import hashlib
+from typing import Any, Dict, List
+
+from lxml.html import HtmlElement
+
+from parsers import get_text, parse_html
+from utils.date_format import parse_day_month_year
+
+# Rows of the movements table
+XP_MOVEMENTS = "//tr[@class='evenRow' or @class='oddRow']"
+# Header of the cell with the concept of a movement
+CONCEPT_HEADER = "_Descripción"
+
+
+def get_record_id(text: str) -> str:
+    """
+    Generate a unique record ID using SHA1 hash.
+
+    Args:
+        text: Text to hash (combination of date, transaction number, and amount)
+
+    Returns:
+        SHA1 hash string of the input text
+
+    Examples:
+        >>> get_record_id("2024-01-15,12345,100.50")
+        'a1b2c3d4e5f6...'
+    """
+    return hashlib.sha1(text.encode("ascii")).hexdigest()
+
+
+def parse_amount(text: str) -> str:
+    """
+    Convert an amount as shown in the movements table to a decimal string.
+
+    Examples:
+        >>> parse_amount("$ 1.234,56")
+        '1234.56'
+    """
+    return text.replace("$ ", "").replace(".", "").replace(",", ".")
+
+
+def movement_rows(page: str) -> List[HtmlElement]:
+    """
+    Rows of the movements table of a page.
+
+    Args:
+        page: HTML of the movements page
+
+    Returns:
+        The row elements, to be parsed with parse_movement
+    """
+    return parse_html(page).xpath(XP_MOVEMENTS)
+
+
+def movement_concept(row: HtmlElement) -> str:
+    """
+    Concept of a row of the movements table, the category is inferred from
+    it. Reading it alone lets the rows without a category be skipped before
+    their date and amount are parsed.
+    """
+    for cell in row.iter("td"):
+        if cell.get("headers") == CONCEPT_HEADER:
+            return get_text(cell)
+    return ""
+
+
+def parse_movement(row: HtmlElement) -> Dict[str, Any]:
+    """
+    Read a row of the movements table.
+
+    Args:
+        row: Row element, from movement_rows
+
+    Returns:
+        Dictionary with the record 'id', 'description', 'date' and 'amount'
+        (a decimal string), and the 'concept' of the movement the category
+        is inferred from
+
+    Raises:
+        ValueError: If the date or the amount can't be parsed
+    """
+    # Text of the cells by the header they belong to, read in one pass
+    cells = {cell.get("headers"): get_text(cell) for cell in row.iter("td")}
+    concept = cells.get(CONCEPT_HEADER, "")
+    date = cells.get("_Fecha", "")
+    transaction_number = cells.get("_Nro. transacción", "")
+    amount = parse_amount(cells.get("_Importe", ""))
+
+    return {
+        "id": get_record_id(f"{date},{transaction_number},{amount}"),
+        "description": f"{concept}. {date}",
+        "concept": concept,
+        "date": parse_day_month_year(date),
+        "amount": amount,
+    }
+
+
+def parse_movements(page: str) -> List[Dict[str, Any]]:
+    """
+    Read every row of the movements table of a page, see parse_movement.
+    """
+    return [parse_movement(row) for row in movement_rows(page)]
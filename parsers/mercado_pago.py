@@ -0,0 +1,215 @@
+"""Parsers of the spending tracking pages of Mercado Pago and of their API."""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List
+
+from lxml.html import HtmlElement
+
+from parsers import find, find_text, get_text, parse_html
+from utils.date_format import parse_day_month, parse_month_year
+from utils.string_format import parse_amount_to_float
+
+# Spending categories of the month, and the name of each one
+XP_CATEGORIES = (
+    "//ul[@aria-label='Listado de categorías organizadas del mayor al "
+    "menor gasto.']//li"
+)
+XP_CATEGORY_NAME = ".//span[contains(@class, 'andes-list__item-primary')]"
+# Month shown by the page
+XP_MONTH = "//div[@class='navigator__date']"
+
+# Transactions of a category, and their fields
+XP_TRANSACTIONS = ".//div[@class='detail-row-wrapper']"
+XP_TITLE = ".//span[@class='ui-rowfeed-title']"
+XP_DESCRIPTION = ".//p[@class='ui-rowfeed-description__text']"
+XP_AMOUNT = (
+    ".//span[@class='andes-money-amount ui-rowfeed-amount "
+    "ui-rowfeed-amount--primary-color andes-money-amount--cents-comma']"
+)
+XP_DATE = ".//p[@class='ui-rowfeed-date']"
+# Parts of the text of an amount, e.g. "-", "$", "8.868" and "06"
+XP_AMOUNT_SIGN = ".//span[@class='andes-money-amount__sign']"
+XP_AMOUNT_FRACTION = ".//span[@class='andes-money-amount__fraction']"
+XP_AMOUNT_CENTS = ".//span[@class='andes-money-amount__cents']"
+
+# Operation number, shown in the detail of a transaction
+XP_OPERATION_ID = (
+    ".//span[@class='c-copy-operation__text c-copy-operation__text--initial']"
+)
+
+# API the spending tracking page fetches the movements of a month from.
+# EXPERIMENTAL: the path and the shape below are not checked against a real
+# capture yet, see extract/mercado_pago.py. Its responses are a page of
+# movements, {"results": [...], "paging": {"total"}}, each movement with its
+# operation "id", "title", "description", "amount": {"value"}, "date"
+# (ISO 8601) and "category": {"name"}
+API_PATH = "/finance/spending-tracking/api/movements"
+
+
+def parse_categories(page: str) -> List[str]:
+    """
+    Names of the spending categories of a page, from the largest spending.
+
+    Args:
+        page: HTML of the spending tracking page
+    """
+    return [
+        find_text(category, XP_CATEGORY_NAME)
+        for category in parse_html(page).xpath(XP_CATEGORIES)
+    ]
+
+
+def parse_month(page: str) -> date:
+    """
+    First day of the month shown by a page, e.g. "Junio 2025".
+
+    Args:
+        page: HTML of the spending tracking page
+    """
+    return parse_month_year(find_text(parse_html(page), XP_MONTH))
+
+
+def transaction_rows(page: str) -> List[HtmlElement]:
+    """
+    Transactions of the category shown by a page.
+
+    Args:
+        page: HTML of the spending tracking page, with a category expanded
+
+    Returns:
+        The transaction elements, to be parsed with parse_transaction
+    """
+    return parse_html(page).xpath(XP_TRANSACTIONS)
+
+
+def parse_amount_text(amount: HtmlElement) -> float:
+    """
+    Amount read from the parts of its text, e.g. "-", "$", "8.868" and "06"
+    for -8868.06.
+
+    Raises:
+        ValueError: If the amount has no integer part or it can't be parsed
+    """
+    value = float(find_text(amount, XP_AMOUNT_FRACTION).replace(".", ""))
+    cents = amount.xpath(XP_AMOUNT_CENTS)
+    if cents:
+        value += int(get_text(cents[0])) / 100
+    sign = amount.xpath(XP_AMOUNT_SIGN)
+    return -value if sign and get_text(sign[0]) == "-" else value
+
+
+def parse_amount(row: HtmlElement) -> float:
+    """
+    Amount of a transaction, read from its aria-label
+    (e.g. '-8868 pesos con 06 centavos').
+
+    Selenium's accessible_name, read before, is computed from the text of
+    the element when it has no aria-label: the amount is then read from its
+    text with parse_amount_text.
+
+    Raises:
+        ValueError: If the amount can't be parsed
+    """
+    amount = find(row, XP_AMOUNT)
+    label = amount.get("aria-label")
+    if not label:
+        return parse_amount_text(amount)
+    return parse_amount_to_float(label)
+
+
+def parse_transaction(row: HtmlElement, month: date) -> Dict[str, Any]:
+    """
+    Read a transaction of a category.
+
+    Args:
+        row: Transaction element, from transaction_rows
+        month: Month shown by the page, the dates only have day and month
+
+    Returns:
+        Dictionary with the 'description', 'amount' and 'date' of the
+        transaction
+
+    Raises:
+        ValueError: If a field is missing or can't be parsed
+    """
+    title = find_text(row, XP_TITLE)
+    action = find_text(row, XP_DESCRIPTION)
+    return {
+        "description": f"{title} - {action}",
+        "amount": parse_amount(row),
+        "date": parse_day_month(find_text(row, XP_DATE), month.year, month.month),
+    }
+
+
+def parse_operation_id(page: str) -> str:
+    """
+    Operation number of the transaction whose detail a page shows.
+
+    Args:
+        page: HTML of the transaction detail
+
+    Examples:
+        The detail shows "Operación #123456789", '123456789' is returned
+    """
+    text = get_text(find(parse_html(page), XP_OPERATION_ID))
+    if not text:
+        raise ValueError("The operation number is empty")
+    return text.split()[-1]
+
+
+def parse_movement(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read a movement of a response of the API_PATH API. Experimental: the
+    amounts are assumed negative for spending, as the page shows them, and
+    the movement id to be the operation number mp_categories.py reads.
+
+    Args:
+        item: Movement of the "results" of a response
+
+    Returns:
+        Dictionary with the operation 'id', 'description', 'amount', 'date'
+        and 'category' name of the movement, the description formatted as
+        the one read from the page
+
+    Raises:
+        ValueError: If the date or the amount can't be parsed
+        KeyError: If a field is missing
+        TypeError: If a field has an unexpected type
+    """
+    return {
+        "id": str(item["id"]),
+        "description": f"{item['title']} - {item['description']}",
+        "amount": float(item["amount"]["value"]),
+        # The local date, the time and offset are not kept
+        "date": date.fromisoformat(item["date"][:10]),
+        "category": (item.get("category") or {}).get("name", ""),
+    }
+
+
+def movement_items(responses: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Movements of the responses of the API_PATH API, each operation once.
+
+    Args:
+        responses: Responses captured for a month, see
+            SeleniumService.network_responses
+
+    Returns:
+        The movements, to be parsed with parse_movement
+    """
+    items = {}
+    for response in responses:
+        for item in response["body"].get("results", []):
+            items.setdefault(item.get("id"), item)
+    return list(items.values())
+
+
+def movements_total(responses: Iterable[Dict[str, Any]]) -> int:
+    """
+    Number of movements of the month according to the paging of the
+    responses, 0 if there are none.
+    """
+    return max(
+        (response["body"].get("paging", {}).get("total", 0) for response in responses),
+        default=0,
+    )
@@ -1,21 +1,94 @@
 """Selenium service for web automation and browser control."""
 
-from typing import List
+import base64
+import json
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Union
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
 from selenium import webdriver
 
-
 # Chrome debugging setup instructions:
 # chrome --remote-debugging-port=9222 --user-data-dir=remote-profile
 # "C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
 # --remote-debugging-port=9222 --user-data-dir="C:\remote-profile"
 DRIVER_PATH = "C:\\chromedriver.exe"
 
+# Seconds the wait primitives wait for the page before raising
+# TimeoutException, and how often they check it
+DEFAULT_TIMEOUT = 30
+POLL_FREQUENCY = 0.2
+# Seconds a row count or the network activity has to stay unchanged to be
+# considered settled
+SETTLE_TIME = 0.5
+
+# Chrome capability logging the DevTools network events, read by
+# SeleniumService.network_responses
+PERFORMANCE_LOGGING = ("goog:loggingPrefs", {"performance": "ALL"})
+
+# Counts the fetch and XMLHttpRequest calls in flight, installed in the page
+# on the first call (it lasts until the page navigates), and returns the
+# state of the page loading
+NETWORK_STATE_SCRIPT = """
+if (window.__expensyPending === undefined) {
+    window.__expensyPending = 0;
+    const done = () => { window.__expensyPending -= 1; };
+    const fetch = window.fetch;
+    window.fetch = function (...args) {
+        window.__expensyPending += 1;
+        return fetch.apply(this, args).finally(done);
+    };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        window.__expensyPending += 1;
+        this.addEventListener("loadend", done, {once: true});
+        return send.apply(this, args);
+    };
+    performance.setResourceTimingBufferSize(10000);
+}
+return [
+    document.readyState,
+    window.__expensyPending,
+    performance.getEntriesByType("resource").length,
+];
+"""
+
+
+class SettledCondition:
+    """
+    Wait condition met once a value read from the page stays the same for
+    'settle_time' seconds and is accepted, e.g. the rows of a table that is
+    being filled.
+
+    The last value read is kept in 'value'.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[WebDriver], Any],
+        accept: Callable[[Any], bool],
+        settle_time: float = SETTLE_TIME,
+    ):
+        self.read = read
+        self.accept = accept
+        self.settle_time = settle_time
+        self.value = None
+        self.since = None
+
+    def __call__(self, driver: WebDriver) -> bool:
+        value = self.read(driver)
+        now = monotonic()
+        if self.since is None or value != self.value:
+            self.value = value
+            self.since = now
+        return now - self.since >= self.settle_time and self.accept(value)
+
 
 class SeleniumService:
     """
@@ -33,6 +106,9 @@ class SeleniumService:
             driver: WebDriver instance to use for automation
         """
         self.driver = driver
+        # Responses seen in the performance log whose body is still loading,
+        # by request id, kept between calls to network_responses
+        self._pending_responses: Dict[str, Dict[str, Any]] = {}
 
     def get(self, url: str) -> None:
         """
@@ -73,6 +149,243 @@ class SeleniumService:
         """
         return self.driver.find_elements(by, value)
 
+    def page_source(self) -> str:
+        """
+        Get the HTML of the current page, as rendered by the browser.
+
+        The fields are then read offline by the parsers package, without a
+        browser round trip per element.
+
+        Returns:
+            The page source
+        """
+        return self.driver.page_source
+
+    def network_responses(self, url_part: str) -> List[Dict[str, Any]]:
+        """
+        Get the JSON responses the page received since the last call.
+
+        The responses are found in the Chrome performance log, so the driver
+        must be created with PERFORMANCE_LOGGING, and their bodies are read
+        through the DevTools protocol. Reading the log drains it: a response
+        whose body is still loading is kept and returned by the call that
+        sees it finish. Call it once the network is idle to get them all.
+
+        Args:
+            url_part: Text the URL of the requests must contain, e.g. the
+                path of an API
+
+        Returns:
+            List of dictionaries with the 'url', 'status' and parsed JSON
+            'body' of each successful response, in the order received
+        """
+        pending = self._pending_responses
+        finished = set()
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+            if message["method"] == "Network.responseReceived":
+                response = params["response"]
+                if (
+                    url_part in response["url"]
+                    and response["status"] == 200
+                    and "json" in response.get("mimeType", "")
+                ):
+                    pending[params["requestId"]] = response
+            elif message["method"] == "Network.loadingFinished":
+                finished.add(params["requestId"])
+            elif message["method"] == "Network.loadingFailed":
+                pending.pop(params["requestId"], None)
+
+        responses = []
+        done = [request_id for request_id in pending if request_id in finished]
+        for request_id in done:
+            response = pending.pop(request_id)
+            result = self.driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": request_id}
+            )
+            body = result["body"]
+            if result.get("base64Encoded"):
+                body = base64.b64decode(body)
+            responses.append(
+                {
+                    "url": response["url"],
+                    "status": response["status"],
+                    "body": json.loads(body),
+                }
+            )
+        return responses
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        """
+        Run JavaScript in the current page and return its result.
+
+        Reading many values with a single script costs one round trip to
+        the browser, instead of one per element and attribute.
+
+        Args:
+            script: JavaScript function body, its return value is returned
+            args: Values available to the script as arguments[0], ...
+
+        Returns:
+            The value returned by the script, converted to Python (lists,
+            dicts, strings, numbers, booleans, None or WebElements)
+        """
+        return self.driver.execute_script(script, *args)
+
+    def wait_for_element(
+        self,
+        by: By,
+        value: str,
+        timeout: Optional[float] = None,
+    ) -> WebElement:
+        """
+        Wait until an element is present on the page.
+
+        Args:
+            by: The method to use for finding the element
+            value: The value to search for
+            timeout: Seconds to wait, DEFAULT_TIMEOUT by default
+
+        Returns:
+            The element, as soon as it is found
+
+        Raises:
+            TimeoutException: If the element is not found in time
+        """
+        return self._wait(timeout).until(
+            expected_conditions.presence_of_element_located((by, value)),
+            f"No element found by {by} {value!r}",
+        )
+
+    def wait_for_clickable(
+        self,
+        by: Union[By, WebElement],
+        value: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> WebElement:
+        """
+        Wait until an element is visible and enabled.
+
+        Args:
+            by: The method to use for finding the element, or the element
+                itself
+            value: The value to search for, when 'by' is a method
+            timeout: Seconds to wait, DEFAULT_TIMEOUT by default
+
+        Returns:
+            The element, ready to be clicked
+
+        Raises:
+            TimeoutException: If the element is not clickable in time
+
+        Examples:
+            >>> driver.wait_for_clickable(By.XPATH, "//button").click()
+            >>> driver.wait_for_clickable(row).click()
+        """
+        target = by if isinstance(by, WebElement) else (by, value)
+        return self._wait(timeout).until(
+            expected_conditions.element_to_be_clickable(target),
+            f"Element not clickable: {value or by}",
+        )
+
+    def wait_for_stable_count(
+        self,
+        by: By,
+        value: str,
+        min_count: int = 1,
+        timeout: Optional[float] = None,
+    ) -> List[WebElement]:
+        """
+        Wait until the elements found stop changing, e.g. while the rows of
+        a list are being rendered.
+
+        Args:
+            by: The method to use for finding the elements
+            value: The value to search for
+            min_count: Least number of elements to wait for
+            timeout: Seconds to wait, DEFAULT_TIMEOUT by default
+
+        Returns:
+            The elements, once the same ones were found for SETTLE_TIME
+            seconds
+
+        Raises:
+            TimeoutException: If the elements don't settle in time
+        """
+        condition = SettledCondition(
+            lambda driver: driver.find_elements(by, value),
+            lambda elements: len(elements) >= min_count,
+        )
+        self._wait(timeout).until(
+            condition, f"Less than {min_count} stable elements found by {by} {value!r}"
+        )
+        return condition.value
+
+    def wait_for_url_change(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Wait until the page navigates away from a URL.
+
+        Args:
+            url: The URL before the navigation, e.g. driver.current_url
+            timeout: Seconds to wait, DEFAULT_TIMEOUT by default
+
+        Returns:
+            The new URL
+
+        Raises:
+            TimeoutException: If the URL doesn't change in time
+        """
+        self._wait(timeout).until(
+            expected_conditions.url_changes(url), f"Still on {url}"
+        )
+        return self.driver.current_url
+
+    def track_network(self) -> None:
+        """
+        Start counting the fetch and XMLHttpRequest calls of the page.
+
+        Call it before an action that makes requests, e.g. a click, for
+        wait_for_network_idle to wait for them: the calls made before the
+        counting started are never seen in flight.
+        """
+        self.driver.execute_script(NETWORK_STATE_SCRIPT)
+
+    def wait_for_network_idle(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait until the page is loaded and its requests are done.
+
+        The page is idle when it's loaded, no fetch or XMLHttpRequest call is
+        in flight and no resource finished loading for SETTLE_TIME seconds.
+        Only the calls made after track_network, or after the first check,
+        are counted as in flight.
+
+        Args:
+            timeout: Seconds to wait, DEFAULT_TIMEOUT by default
+
+        Raises:
+            TimeoutException: If the page is still busy after the timeout
+        """
+        condition = SettledCondition(
+            lambda driver: driver.execute_script(NETWORK_STATE_SCRIPT),
+            lambda state: state[0] == "complete" and state[1] == 0,
+        )
+        self._wait(timeout).until(condition, "The network is still busy")
+
+    def _wait(self, timeout: Optional[float]) -> WebDriverWait:
+        """
+        Build a WebDriverWait with the given or the default timeout.
+        """
+        return WebDriverWait(
+            self.driver,
+            DEFAULT_TIMEOUT if timeout is None else timeout,
+            poll_frequency=POLL_FREQUENCY,
+        )
+
     def click(self, element: WebElement) -> None:
         """
         Click on a web element.
@@ -122,6 +435,7 @@ class SeleniumDebuggerDriver:
         """
         options = Options()
         options.add_experimental_option("debuggerAddress", "localhost:9222")
+        options.set_capability(*PERFORMANCE_LOGGING)
         # options.add_argument("--start-maximized")
         # options.add_argument("--disable-blink-features=AutomationControlled")
         # service = Service(executable_path=DRIVER_PATH)
@@ -143,8 +457,7 @@ class SeleniumDriver:
         options = Options()
         options.add_argument("--start-maximized")
         options.add_argument("--disable-blink-features=AutomationControlled")
+        options.set_capability(*PERFORMANCE_LOGGING)
         service = Service(executable_path=DRIVER_PATH)
-        driver = webdriver.Chrome(
-            service=service, options=options
-        )
-        self.driver=driver
+        driver = webdriver.Chrome(service=service, options=options)
+        self.driver = driver